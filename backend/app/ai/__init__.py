@@ -21,6 +21,7 @@ from .dependency_service import DependencyService
 from .workload_service import WorkloadService
 from .vector_db import VectorDBManager
 from .aggregator import AIServiceAggregator
+from .container import AIServiceContainer, ai_services
 
 __all__ = [
     'AIServiceBase',
@@ -36,5 +37,7 @@ __all__ = [
     'DependencyService',
     'WorkloadService',
     'VectorDBManager',
-    'AIServiceAggregator'
+    'AIServiceAggregator',
+    'AIServiceContainer',
+    'ai_services'
 ]
\ No newline at end of file
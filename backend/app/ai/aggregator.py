@@ -21,7 +21,7 @@ from .similarity_service import SimilarityService
 from .priority_service import PriorityService
 from .dependency_service import DependencyService
 from .workload_service import WorkloadService
-from .vector_db import VectorDBManager
+from .vector_db import VectorDBManager, VectorResources
 
 
 @dataclass
@@ -61,20 +61,20 @@ class TaskCreationSuggestion:
 class AIServiceAggregator:
     """Central coordinator for all AI services"""
     
-    def __init__(self, db_session, cache=None):
+    def __init__(self, db_session, cache=None, vector_resources: Optional[VectorResources] = None):
         self.db = db_session
         
+        # Vector database manager, shared with the similarity service
+        self.vector_db = VectorDBManager(db_session, resources=vector_resources)
+        
         # Initialize all AI services
         self.nlp_service = NLPService(db_session, cache)
         self.classification_service = ClassificationService(db_session, cache)
-        self.similarity_service = SimilarityService(db_session, cache)
+        self.similarity_service = SimilarityService(db_session, cache, vector_db=self.vector_db)
         self.priority_service = PriorityService(db_session, cache)
         self.dependency_service = DependencyService(db_session, cache)
         self.workload_service = WorkloadService(db_session, cache)
         
-        # Vector database manager
-        self.vector_db = VectorDBManager(db_session)
-        
         # Service registry
         self.services = {
             AIOperationType.PARSE: self.nlp_service,
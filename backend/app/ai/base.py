@@ -2,13 +2,15 @@
 AI Service Base Classes and Common Components for TaskWall v3.0
 """
 
+import asyncio
 import hashlib
 import json
+import os
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 
 try:
@@ -20,7 +22,10 @@ except ImportError:
 
 from sqlmodel import Session
 
-from ..models import AILog, AIFeedback
+from ..deps import DATA_DIR
+from ..models import AIFeedback
+from .cache import COUNTERS, DiskCacheTier, MemoryCacheTier, SingleFlight
+from .log_writer import AILogWriter, ai_log_writer
 
 
 class AIOperationType(str, Enum):
@@ -63,11 +68,38 @@ class AIError(Exception):
         super().__init__(message)
 
 
+# Local tiers shared by every AICache in the process
+AI_CACHE_MAX_BYTES = int(os.getenv("TASKWALL_AI_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+AI_CACHE_REDIS_URL = os.getenv("TASKWALL_AI_CACHE_REDIS_URL", "redis://localhost:6379/1")
+# Persistent tier: "auto" uses it only when Redis is unavailable, or "on" / "off"
+AI_CACHE_DISK = os.getenv("TASKWALL_AI_CACHE_DISK", "auto").lower()
+AI_CACHE_DISK_PATH = os.getenv("TASKWALL_AI_CACHE_DISK_PATH", os.path.join(DATA_DIR, "ai_cache.db"))
+AI_CACHE_DISK_MAX_BYTES = int(os.getenv("TASKWALL_AI_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024))
+_memory_tier = MemoryCacheTier(AI_CACHE_MAX_BYTES)
+_redis_client: Any = None
+_redis_checked = False
+_disk_tier: Optional[DiskCacheTier] = None
+# In-flight computations per cache key, shared by every service in the process
+_single_flight = SingleFlight()
+
+
 class AICache:
-    """AI result caching system"""
+    """AI result caching system: a process-wide in-memory LRU (per-operation
+    TTLs, byte budget) in front of an optional Redis tier and, by default
+    when Redis is unavailable, a persistent SQLite tier under data/"""
+    
+    DEFAULT_TTL = 1800
     
-    def __init__(self, redis_client: Optional[Any] = None):
+    def __init__(
+        self,
+        redis_client: Optional[Any] = None,
+        memory: Optional[MemoryCacheTier] = None,
+        disk: Optional[DiskCacheTier] = None
+    ):
         self.redis_client = redis_client or self._create_redis_client()
+        self.memory = memory or _memory_tier
+        self.stats = self.memory.stats
+        self.disk = disk or self._create_disk_tier()
         self.cache_ttl = {
             AIOperationType.PARSE: 3600,      # 1 hour
             AIOperationType.CLASSIFY: 7200,   # 2 hours
@@ -78,14 +110,36 @@ class AICache:
         }
     
     def _create_redis_client(self) -> Any:
-        """Create Redis client with fallback"""
+        """Shared Redis client, or None when Redis is not installed or not
+        reachable. Checked once per process, so a missing server costs one
+        failed ping instead of an error on every get/set."""
+        global _redis_client, _redis_checked
         if not REDIS_AVAILABLE:
             return None
-        try:
-            return redis.Redis(host='localhost', port=6379, db=1, decode_responses=True)
-        except Exception:
-            # Return a mock client if Redis is not available
+        if not _redis_checked:
+            _redis_checked = True
+            try:
+                client = redis.Redis.from_url(
+                    AI_CACHE_REDIS_URL, decode_responses=True, socket_connect_timeout=0.5
+                )
+                client.ping()
+                _redis_client = client
+            except Exception as e:
+                print(f"Redis cache unavailable, using the in-process cache only: {e}")
+        return _redis_client
+    
+    def _create_disk_tier(self) -> Optional[DiskCacheTier]:
+        """Shared persistent tier per TASKWALL_AI_CACHE_DISK, or None"""
+        global _disk_tier
+        if AI_CACHE_DISK == "off" or (AI_CACHE_DISK == "auto" and self.redis_client is not None):
             return None
+        if _disk_tier is None:
+            try:
+                _disk_tier = DiskCacheTier(AI_CACHE_DISK_PATH, AI_CACHE_DISK_MAX_BYTES, _memory_tier.stats)
+            except Exception as e:
+                print(f"Disk cache unavailable: {e}")
+                return None
+        return _disk_tier
     
     def _generate_cache_key(self, operation: AIOperationType, input_data: Dict[str, Any]) -> str:
         """Generate cache key from operation and input data"""
@@ -93,53 +147,107 @@ class AICache:
         input_hash = hashlib.md5(input_str.encode()).hexdigest()
         return f"ai_cache:{operation.value}:{input_hash}"
     
+    @staticmethod
+    def _from_dict(result_dict: Dict[str, Any]) -> AIResult:
+        return AIResult(
+            success=result_dict["success"],
+            data=result_dict["data"],
+            confidence=result_dict["confidence"],
+            reasoning=result_dict.get("reasoning"),
+            execution_time=result_dict.get("execution_time"),
+            model_used=result_dict.get("model_used")
+        )
+    
     def get(self, operation: AIOperationType, input_data: Dict[str, Any]) -> Optional[AIResult]:
-        """Get cached result"""
-        if not self.redis_client:
-            return None
-            
+        """Get cached result. Memory hits return a shallow copy of the cached
+        AIResult; treat its data as read-only."""
         try:
             cache_key = self._generate_cache_key(operation, input_data)
-            cached_data = self.redis_client.get(cache_key)
-            
-            if cached_data:
-                result_dict = json.loads(cached_data)
-                return AIResult(
-                    success=result_dict["success"],
-                    data=result_dict["data"],
-                    confidence=result_dict["confidence"],
-                    reasoning=result_dict.get("reasoning"),
-                    execution_time=result_dict.get("execution_time"),
-                    model_used=result_dict.get("model_used")
-                )
         except Exception as e:
             print(f"Cache get error: {e}")
+            return None
+        
+        cached = self.memory.get(cache_key)
+        if cached is not None:
+            self.stats.record(operation.value, "hits")
+            self.stats.record(operation.value, "memory_hits")
+            return replace(cached)
         
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline()
+                pipe.get(cache_key)
+                pipe.ttl(cache_key)
+                cached_data, ttl = pipe.execute()
+                
+                if cached_data:
+                    result = self._from_dict(json.loads(cached_data))
+                    if ttl and ttl > 0:
+                        # Promote for the rest of the entry's Redis lifetime
+                        self.memory.set(cache_key, operation.value, result, len(cached_data), ttl)
+                    self.stats.record(operation.value, "hits")
+                    self.stats.record(operation.value, "remote_hits")
+                    return replace(result)
+            except Exception as e:
+                print(f"Cache get error: {e}")
+        
+        if self.disk:
+            stored = self.disk.get(cache_key)
+            if stored is not None:
+                cached_data, ttl = stored
+                try:
+                    result = self._from_dict(json.loads(cached_data))
+                except Exception as e:
+                    print(f"Cache get error: {e}")
+                else:
+                    self.memory.set(cache_key, operation.value, result, len(cached_data), ttl)
+                    self.stats.record(operation.value, "hits")
+                    self.stats.record(operation.value, "disk_hits")
+                    return replace(result)
+        
+        self.stats.record(operation.value, "misses")
         return None
     
     def set(self, operation: AIOperationType, input_data: Dict[str, Any], result: AIResult):
         """Cache result"""
+        try:
+            cache_key = self._generate_cache_key(operation, input_data)
+            payload = json.dumps(result.to_dict())
+        except Exception as e:
+            # Results that cannot be serialized are not cached in either tier
+            print(f"Cache set error: {e}")
+            return
+        ttl = self.cache_ttl.get(operation, self.DEFAULT_TTL)
+        self.memory.set(cache_key, operation.value, replace(result), len(payload), ttl)
+        if self.disk:
+            self.disk.set(cache_key, operation.value, payload, ttl)
+        
         if not self.redis_client:
             return
-            
         try:
-            cache_key = self._generate_cache_key(operation, input_data)
-            ttl = self.cache_ttl.get(operation, 1800)
-            
-            self.redis_client.setex(
-                cache_key,
-                ttl,
-                json.dumps(result.to_dict())
-            )
+            self.redis_client.setex(cache_key, ttl, payload)
         except Exception as e:
             print(f"Cache set error: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters per operation type plus the memory tier's occupancy"""
+        counters = self.stats.snapshot()
+        empty = {**dict.fromkeys(COUNTERS, 0), "hit_rate": 0.0}
+        return {
+            "operations": {op.value: counters.get(op.value, empty) for op in AIOperationType},
+            "memory": self.memory.info(),
+            "disk": self.disk.info() if self.disk else None,
+            "redis": self.redis_client is not None,
+            "in_flight": _single_flight.in_flight()
+        }
 
 
 class AIMonitor:
     """AI performance and quality monitoring"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, log_writer: Optional[AILogWriter] = None):
         self.db = db
+        self.log_writer = log_writer or ai_log_writer
     
     def log_operation(
         self,
@@ -150,21 +258,22 @@ class AIMonitor:
         task_id: Optional[int] = None,
         error: Optional[str] = None
     ):
-        """Log AI operation for monitoring"""
+        """Queue an AILog row for the background writer (sampled, and
+        without payloads under load); never blocks the caller"""
         try:
-            ai_log = AILog(
-                task_id=task_id,
-                operation=operation.value,
-                model=model,
-                input_data=json.dumps(input_data),
-                output_data=json.dumps(result.to_dict()) if result else None,
-                duration_ms=int(result.execution_time * 1000) if result and result.execution_time else 0,
-                confidence=result.confidence if result else 0.0,
-                error_message=error
+            self.log_writer.submit(
+                self.db.get_bind(),
+                operation.value,
+                {
+                    "task_id": task_id,
+                    "model": model,
+                    "duration_ms": int(result.execution_time * 1000) if result and result.execution_time else 0,
+                    "confidence": result.confidence if result else 0.0,
+                    "error_message": error
+                },
+                input_data=input_data,
+                output_data=result.to_dict() if result else None
             )
-            
-            self.db.add(ai_log)
-            self.db.commit()
         except Exception as e:
             print(f"Failed to log AI operation: {e}")
     
@@ -215,15 +324,53 @@ class AIServiceBase(ABC):
         """Internal processing method to be implemented by subclasses"""
         pass
     
+    def _flight_key(self, input_data: Dict[str, Any]) -> Optional[str]:
+        try:
+            return self.cache._generate_cache_key(self.operation_type, input_data)
+        except Exception:
+            return None
+    
     def process(self, input_data: Dict[str, Any], use_cache: bool = True) -> AIResult:
-        """Main processing method with caching and monitoring"""
-        start_time = time.time()
+        """Main processing method with caching and monitoring. Concurrent
+        cached calls with the same input share one computation."""
+        if not use_cache:
+            return self._compute(input_data, use_cache=False)
         
         # Check cache first
-        if use_cache:
-            cached_result = self.cache.get(self.operation_type, input_data)
-            if cached_result:
-                return cached_result
+        cached_result = self.cache.get(self.operation_type, input_data)
+        if cached_result:
+            return cached_result
+        
+        key = self._flight_key(input_data)
+        if key is None:
+            return self._compute(input_data)
+        result, shared = _single_flight.do(key, lambda: self._compute(input_data))
+        if shared:
+            self.cache.stats.record(self.operation_type.value, "coalesced")
+            return replace(result)
+        return result
+    
+    async def aprocess(self, input_data: Dict[str, Any], use_cache: bool = True) -> AIResult:
+        """process() for async callers, run in the default executor so the
+        event loop is not blocked"""
+        loop = asyncio.get_running_loop()
+        key = self._flight_key(input_data) if use_cache else None
+        if key is None:
+            return await loop.run_in_executor(None, self.process, input_data, use_cache)
+        # Not self.process: that would wait on this very flight from inside it
+        result, shared = await _single_flight.do_async(key, lambda: self._cached_or_compute(input_data))
+        if shared:
+            self.cache.stats.record(self.operation_type.value, "coalesced")
+            return replace(result)
+        return result
+    
+    def _cached_or_compute(self, input_data: Dict[str, Any]) -> AIResult:
+        cached_result = self.cache.get(self.operation_type, input_data)
+        return cached_result or self._compute(input_data)
+    
+    def _compute(self, input_data: Dict[str, Any], use_cache: bool = True) -> AIResult:
+        """Run the service, then cache and log the result"""
+        start_time = time.time()
         
         try:
             # Process the request
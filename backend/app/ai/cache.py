@@ -0,0 +1,297 @@
+"""
+Local tiers and counters for AICache.
+
+AICache instances are cheap facades created per service; the memory tier
+and the counters below are shared by every instance in the process, so a
+result computed for one request is a dictionary lookup for the next one
+instead of a Redis round trip plus JSON decoding.
+
+DiskCacheTier persists serialized results in a small SQLite file under
+data/ for deployments without Redis: results survive restarts and are
+shared by every uvicorn worker on the host. SQLite's file locking (WAL
+plus a busy timeout) serializes writers across processes; every
+statement runs in autocommit, and a locked or failing cache degrades to a
+miss rather than an error.
+
+SingleFlight deduplicates concurrent computations per cache key: while a
+result is being computed, identical requests from other threads or
+coroutines wait for it instead of computing it again.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+COUNTERS = ("hits", "misses", "memory_hits", "remote_hits", "disk_hits", "evictions", "expired", "coalesced")
+
+
+class CacheStats:
+    """Hit/miss/eviction counters per operation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, operation: str, counter: str, amount: int = 1):
+        with self._lock:
+            counters = self._counters.setdefault(operation, dict.fromkeys(COUNTERS, 0))
+            counters[counter] = counters.get(counter, 0) + amount
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for operation, counters in self._counters.items():
+                lookups = counters["hits"] + counters["misses"]
+                result[operation] = {**counters, "hit_rate": counters["hits"] / lookups if lookups else 0.0}
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class MemoryCacheTier:
+    """Thread-safe LRU with per-entry expiry and a byte budget. Entries are
+    (operation, value, size, expires_at); `size` is the caller's estimate
+    (the serialized length), evictions are counted per operation."""
+
+    def __init__(self, max_bytes: int, stats: Optional[CacheStats] = None):
+        self.max_bytes = max_bytes
+        self.stats = stats or CacheStats()
+        self._entries: "OrderedDict[str, Tuple[str, Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            operation, value, size, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._bytes -= size
+                self.stats.record(operation, "expired")
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, operation: str, value: Any, size: int, ttl: float):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (operation, value, size, time.time() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted_operation, _, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats.record(evicted_operation, "evictions")
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class DiskCacheTier:
+    """Persistent key -> serialized result store with expiry and a byte
+    budget. Eviction drops expired rows, then the least recently read ones;
+    read times are refreshed at most every TOUCH_INTERVAL seconds so hits
+    rarely need a write lock."""
+
+    TOUCH_INTERVAL = 60
+    PRUNE_EVERY = 50  # sets between budget checks
+    BUSY_TIMEOUT = 2.0
+
+    def __init__(self, path: str, max_bytes: int, stats: Optional[CacheStats] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = stats or CacheStats()
+        self._local = threading.local()
+        self._sets = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache ("
+                " key TEXT PRIMARY KEY, operation TEXT NOT NULL, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_cache_accessed_at ON ai_cache (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_cache_expires_at ON ai_cache (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread, in autocommit mode"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """(payload, remaining ttl in seconds) for a live entry, else None"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT operation, value, expires_at, accessed_at FROM ai_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            operation, value, expires_at, accessed_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM ai_cache WHERE key = ? AND expires_at <= ?", (key, now))
+                self.stats.record(operation, "expired")
+                return None
+            if now - accessed_at > self.TOUCH_INTERVAL:
+                conn.execute("UPDATE ai_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return value, expires_at - now
+        except sqlite3.Error as e:
+            print(f"Disk cache get error: {e}")
+            return None
+
+    def set(self, key: str, operation: str, payload: str, ttl: float):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO ai_cache (key, operation, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, operation, payload, size, now + ttl, now)
+            )
+        except sqlite3.Error as e:
+            print(f"Disk cache set error: {e}")
+            return
+        self._sets += 1
+        if self._sets % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired entries, then evict least recently read ones until the
+        table fits the budget. Returns the number of evictions."""
+        evicted = 0
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (time.time(),))
+            total = conn.execute("SELECT coalesce(sum(size), 0) FROM ai_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            # Walk the LRU order once, picking the oldest entries that cover the excess
+            excess, victims = total - self.max_bytes, []
+            for key, operation, size in conn.execute(
+                "SELECT key, operation, size FROM ai_cache ORDER BY accessed_at"
+            ):
+                victims.append((key, operation))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("DELETE FROM ai_cache WHERE key = ?", [(key,) for key, _ in victims])
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            for _, operation in victims:
+                self.stats.record(operation, "evictions")
+            evicted = len(victims)
+        except sqlite3.Error as e:
+            print(f"Disk cache prune error: {e}")
+        return evicted
+
+    def clear(self):
+        try:
+            self._connect().execute("DELETE FROM ai_cache")
+        except sqlite3.Error as e:
+            print(f"Disk cache clear error: {e}")
+
+    def info(self) -> Dict[str, Any]:
+        try:
+            entries, size = self._connect().execute(
+                "SELECT count(*), coalesce(sum(size), 0) FROM ai_cache"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Per-key in-flight call deduplication. The first caller for a key runs
+    fn; callers arriving before it finishes get its result (or exception).
+    Both entry points return (result, shared) where shared is True for the
+    callers that did not run fn themselves."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[Tuple[int, str], "asyncio.Future"] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """do() for coroutines: fn runs in the loop's default executor, so it
+        also joins calls in flight on other threads. Coroutines on the same
+        loop share one executor job rather than each occupying a thread."""
+        loop = asyncio.get_running_loop()
+        flight = (id(loop), key)
+        future = self._futures.get(flight)
+        leader = future is None
+        if leader:
+            future = loop.run_in_executor(None, self.do, key, fn)
+            self._futures[flight] = future
+            future.add_done_callback(lambda _: self._futures.pop(flight, None))
+        # shield: a cancelled waiter must not cancel the shared job
+        result, shared = await asyncio.shield(future)
+        return result, shared or not leader
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
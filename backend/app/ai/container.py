@@ -0,0 +1,59 @@
+"""
+Application-scoped AI service container.
+
+Building an AIServiceAggregator per request used to construct six
+services, each with its own AICache, and two VectorDBManagers, each
+opening a ChromaDB client and loading the SentenceTransformer model.
+The container owns the heavy, thread-safe parts (the cache facade and
+the vector resources), loads them once, and builds request-scoped
+aggregators around them. The aggregator and its services are cheap
+objects bound to one request's Session; they are not shared between
+requests, because the Session is not thread-safe.
+"""
+import os
+import threading
+from typing import Optional
+
+from sqlmodel import Session
+
+from .aggregator import AIServiceAggregator
+from .base import AICache
+from .vector_db import VectorResources, get_vector_resources
+
+AI_PRELOAD = os.getenv("TASKWALL_AI_PRELOAD", "0").lower() in ("1", "true", "yes")
+
+
+class AIServiceContainer:
+    def __init__(self, persist_directory: str = "./data/chroma"):
+        self.persist_directory = persist_directory
+        self._cache: Optional[AICache] = None
+        self._vector_resources: Optional[VectorResources] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self) -> AICache:
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = AICache()
+        return self._cache
+
+    @property
+    def vector_resources(self) -> VectorResources:
+        if self._vector_resources is None:
+            # get_vector_resources serializes the load itself
+            self._vector_resources = get_vector_resources(self.persist_directory)
+        return self._vector_resources
+
+    def aggregator(self, db: Session) -> AIServiceAggregator:
+        """An aggregator bound to db, reusing the shared cache and vector resources"""
+        return AIServiceAggregator(db, cache=self.cache, vector_resources=self.vector_resources)
+
+    def warm_up(self):
+        """Load everything up front instead of on the first AI request"""
+        self.cache
+        self.vector_resources
+
+
+# Global AI service container instance
+ai_services = AIServiceContainer()
@@ -0,0 +1,238 @@
+"""
+Background, batched writer for AILog rows.
+
+AIMonitor.log_operation used to insert and commit one AILog row with the
+full input and output JSON inside every AIServiceBase.process call. It
+now hands a plain dict to AILogWriter.submit, which never blocks: a
+daemon thread drains the queue and inserts rows in batches, every
+flush_ms milliseconds or as soon as batch_size rows are waiting, one
+executemany and one commit per batch.
+
+On the way in, records are
+
+- sampled per operation (errors are always kept),
+- shrunk: payloads above max_payload bytes are zlib-compressed
+  ("zlib:" + base64, see decode_payload) or, if still too large, cut to
+  max_payload with a truncation marker,
+- stripped of input_data/output_data while the queue is above its high
+  watermark, and dropped outright when it is full, so a slow database
+  costs log detail rather than request latency.
+"""
+import base64
+import json
+import os
+import queue
+import random
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from ..models import AILog
+
+COMPRESSED_PREFIX = "zlib:"
+TRUNCATED_MARKER = "...[truncated {} bytes]"
+LOG_COUNTERS = ("submitted", "written", "sampled_out", "stripped", "dropped",
+                "compressed", "truncated", "failed", "batches")
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"similarity=0.1,workload=0.5" -> {"similarity": 0.1, "workload": 0.5}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        operation, _, rate = item.partition("=")
+        rates[operation.strip()] = float(rate)
+    return rates
+
+
+def decode_payload(value: Optional[str]) -> Optional[str]:
+    """The original JSON text of a stored input_data/output_data value
+    (truncated values are returned as stored)"""
+    if value and value.startswith(COMPRESSED_PREFIX):
+        return zlib.decompress(base64.b64decode(value[len(COMPRESSED_PREFIX):])).decode()
+    return value
+
+
+class AILogWriter:
+    """Queue plus background thread writing AILog rows in batches. Records
+    carry the engine to write to, so services bound to different databases
+    can share one writer."""
+
+    def __init__(
+        self,
+        flush_ms: int = 500,
+        batch_size: int = 100,
+        max_queue: int = 5000,
+        max_payload: int = 4096,
+        sample_rates: Optional[Dict[str, float]] = None,
+        high_watermark: float = 0.5
+    ):
+        self.flush_ms = flush_ms
+        self.batch_size = batch_size
+        self.max_payload = max_payload
+        self.sample_rates = sample_rates or {}
+        self.high_watermark = int(max_queue * high_watermark)
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(LOG_COUNTERS, 0)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "AILogWriter":
+        return cls(
+            flush_ms=int(os.getenv("TASKWALL_AI_LOG_FLUSH_MS", 500)),
+            batch_size=int(os.getenv("TASKWALL_AI_LOG_BATCH_SIZE", 100)),
+            max_queue=int(os.getenv("TASKWALL_AI_LOG_MAX_QUEUE", 5000)),
+            max_payload=int(os.getenv("TASKWALL_AI_LOG_MAX_PAYLOAD", 4096)),
+            sample_rates=_parse_sample_rates(os.getenv("TASKWALL_AI_LOG_SAMPLE", "")),
+        )
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _shrink(self, payload: Optional[str]) -> Optional[str]:
+        if payload is None or len(payload) <= self.max_payload:
+            return payload
+        compressed = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(payload.encode())).decode()
+        if len(compressed) <= self.max_payload:
+            self._count("compressed")
+            return compressed
+        self._count("truncated")
+        return payload[:self.max_payload] + TRUNCATED_MARKER.format(len(payload) - self.max_payload)
+
+    def submit(
+        self,
+        bind,
+        operation: str,
+        values: Dict[str, Any],
+        input_data: Any = None,
+        output_data: Any = None
+    ) -> bool:
+        """Queue one AILog row for `bind` (an engine). input_data and
+        output_data are serialized here, and only if the row is kept.
+        Returns False when the row was sampled out or dropped."""
+        self._count("submitted")
+        rate = self.sample_rates.get(operation, 1.0)
+        if not values.get("error_message") and rate < 1.0 and random.random() >= rate:
+            self._count("sampled_out")
+            return False
+
+        row = {**values, "operation": operation, "created_at": datetime.utcnow()}
+        stripped = self._queue.qsize() >= self.high_watermark
+        if not stripped:
+            row["input_data"] = self._shrink(json.dumps(input_data) if input_data is not None else None)
+            row["output_data"] = self._shrink(json.dumps(output_data) if output_data is not None else None)
+        try:
+            self._queue.put_nowait((bind, row))
+        except queue.Full:
+            self._count("dropped")
+            return False
+        if stripped:
+            self._count("stripped")
+        self._ensure_started()
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="ai-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self) -> List[Any]:
+        """Records arriving within flush_ms, fewer if the batch fills up first"""
+        deadline = time.monotonic() + self.flush_ms / 1000
+        batch = []
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Any]):
+        by_bind: Dict[Any, List[Dict[str, Any]]] = {}
+        for bind, row in batch:
+            by_bind.setdefault(bind, []).append(row)
+        for bind, rows in by_bind.items():
+            try:
+                with Session(bind) as db:
+                    self._insert(db, rows)
+            except Exception as e:
+                print(f"Failed to write AI log batch: {e}")
+                self._count("failed", len(rows))
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _insert(self, db: Session, rows: List[Dict[str, Any]]):
+        try:
+            # Rows have different key sets (stripped ones lack the payloads), insert per shape
+            shapes: Dict[tuple, List[Dict[str, Any]]] = {}
+            for row in rows:
+                shapes.setdefault(tuple(sorted(row)), []).append(row)
+            for shape_rows in shapes.values():
+                db.exec(insert(AILog), params=shape_rows)
+            db.commit()
+            self._count("written", len(rows))
+            self._count("batches")
+            return
+        except Exception as e:
+            db.rollback()
+            print(f"AI log batch insert failed, retrying rows one by one: {e}")
+        # One bad row (e.g. a task deleted meanwhile) must not lose the whole batch
+        for row in rows:
+            try:
+                db.exec(insert(AILog), params=[row])
+                db.commit()
+                self._count("written")
+            except Exception:
+                db.rollback()
+                self._count("failed")
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued record is written. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """Write what is queued and stop the background thread"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "sample_rates": self.sample_rates,
+        }
+
+
+# Global AI log writer instance
+ai_log_writer = AILogWriter.from_env()
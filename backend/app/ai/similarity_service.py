@@ -483,10 +483,10 @@ class TaskSimilarityAnalyzer:
 class SimilarityService(AIServiceBase):
     """Similarity detection service for TaskWall v3.0"""
     
-    def __init__(self, db, cache=None):
+    def __init__(self, db, cache=None, vector_db: Optional[VectorDBManager] = None):
         super().__init__(db, cache)
         self.analyzer = TaskSimilarityAnalyzer()
-        self.vector_db = VectorDBManager(db)
+        self.vector_db = vector_db or VectorDBManager(db)
     
     def get_operation_type(self) -> AIOperationType:
         return AIOperationType.SIMILARITY
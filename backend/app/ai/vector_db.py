@@ -10,6 +10,7 @@ Handles:
 
 import json
 import os
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
@@ -26,14 +27,24 @@ try:
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
 
+from ..crud import TaskCRUD
 from ..models import Task, TaskVector
 
 
-class VectorDBManager:
-    """Manages vector database operations for task similarity"""
+COLLECTION_NAME = "task_vectors"
+COLLECTION_METADATA = {
+    "description": "Task content vectors for similarity search",
+    "version": "3.0"
+}
+
+
+class VectorResources:
+    """ChromaDB client, task collection and embedding model. Loading them
+    takes seconds and hundreds of MB, so they are loaded once per persist
+    directory (see get_vector_resources) and shared by every
+    VectorDBManager, whatever Session it is bound to."""
     
-    def __init__(self, db_session, persist_directory: str = "./data/chroma"):
-        self.db_session = db_session
+    def __init__(self, persist_directory: str = "./data/chroma"):
         self.persist_directory = persist_directory
         self.client = None
         self.task_collection = None
@@ -57,11 +68,8 @@ class VectorDBManager:
             
             # Get or create task collection
             self.task_collection = self.client.get_or_create_collection(
-                name="task_vectors",
-                metadata={
-                    "description": "Task content vectors for similarity search",
-                    "version": "3.0"
-                }
+                name=COLLECTION_NAME,
+                metadata=COLLECTION_METADATA
             )
             
             print(f"ChromaDB initialized with {self.task_collection.count()} existing vectors")
@@ -80,6 +88,49 @@ class VectorDBManager:
         except Exception as e:
             print(f"Failed to load sentence transformer model: {e}")
             self.model = None
+
+
+_resources: Dict[str, VectorResources] = {}
+_resources_lock = threading.Lock()
+
+
+def get_vector_resources(persist_directory: str = "./data/chroma") -> VectorResources:
+    """The process-wide VectorResources for persist_directory, loaded on first use"""
+    key = os.path.abspath(persist_directory)
+    with _resources_lock:
+        if key not in _resources:
+            _resources[key] = VectorResources(persist_directory)
+        return _resources[key]
+
+
+class VectorDBManager:
+    """Manages vector database operations for task similarity"""
+    
+    def __init__(
+        self,
+        db_session,
+        persist_directory: str = "./data/chroma",
+        resources: Optional[VectorResources] = None
+    ):
+        self.db_session = db_session
+        self.persist_directory = persist_directory
+        self.resources = resources or get_vector_resources(persist_directory)
+    
+    @property
+    def client(self):
+        return self.resources.client
+    
+    @property
+    def task_collection(self):
+        return self.resources.task_collection
+    
+    @task_collection.setter
+    def task_collection(self, collection):
+        self.resources.task_collection = collection
+    
+    @property
+    def model(self):
+        return self.resources.model
     
     def is_available(self) -> bool:
         """Check if vector database is available"""
@@ -131,9 +182,8 @@ class VectorDBManager:
                 metadatas=[metadata]
             )
             
-            # Update task record
-            task.vector_id = vector_id
-            task.last_vector_update = datetime.utcnow()
+            # Update task record (versioned and recorded in the change feed)
+            TaskCRUD.set_vector_ref(self.db_session, task, vector_id, datetime.utcnow())
             
             # Update or create TaskVector record
             task_vector = self.db_session.query(TaskVector).filter(
@@ -237,8 +287,7 @@ class VectorDBManager:
                 self.db_session.delete(task_vector)
             
             # Clear task vector references
-            task.vector_id = None
-            task.last_vector_update = None
+            TaskCRUD.set_vector_ref(self.db_session, task, None, None)
             
             self.db_session.commit()
             return True
@@ -332,23 +381,17 @@ class VectorDBManager:
         
         try:
             # Clear ChromaDB collection
-            self.client.delete_collection("task_vectors")
+            self.client.delete_collection(COLLECTION_NAME)
             
             # Recreate collection
             self.task_collection = self.client.get_or_create_collection(
-                name="task_vectors",
-                metadata={
-                    "description": "Task content vectors for similarity search",
-                    "version": "3.0"
-                }
+                name=COLLECTION_NAME,
+                metadata=COLLECTION_METADATA
             )
             
             # Clear database records
             self.db_session.query(TaskVector).delete()
-            self.db_session.query(Task).update({
-                Task.vector_id: None,
-                Task.last_vector_update: None
-            })
+            TaskCRUD.clear_vector_refs(self.db_session)
             
             self.db_session.commit()
             return True
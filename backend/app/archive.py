@@ -0,0 +1,183 @@
+"""
+Hot/cold partitioning of finished tasks.
+
+DONE and ARCHIVED tasks untouched for N days are moved, with their History
+and every dependency that touches them, into the archived_* tables (see
+models._archive_table). Moves are set-based INSERT ... SELECT statements
+followed by TaskCRUD._cascade_delete, one transaction per chunk, so the
+search, spatial, closure and tag triggers, the aggregates and the change
+feed all see an ordinary delete. Everything reading the hot tables
+(read_all, the analyses in main.py and ai_v3.py, exports) then only
+touches the working set.
+
+A task is archived only together with its whole subtree, so live tasks
+never lose their parent. Archived rows keep their ids; the hot tables
+never hand out an id twice (AUTOINCREMENT on SQLite, sequences elsewhere,
+see migrations.ensure_autoincrement), so they cannot collide. Archived tasks stay reachable by id, can be
+included in search and export, and can be restored.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import and_, delete, func, insert, literal, or_
+from sqlmodel import Session, select
+
+from .crud import ChangeLogCRUD, TaskAggregateCRUD, TaskCRUD
+from .models import (
+    History, Task, TaskDependency, TaskStatus,
+    archived_dependency, archived_history, archived_task,
+)
+
+ARCHIVE_STATUSES = (TaskStatus.DONE, TaskStatus.ARCHIVED)
+CHUNK_SIZE = 500
+
+
+def archive_candidates(db: Session, older_than_days: int) -> List[int]:
+    """Ids of finished tasks older than the cutoff whose whole subtree
+    qualifies as well"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    finished = and_(
+        Task.status.in_(ARCHIVE_STATUSES),
+        func.coalesce(Task.completed_at, Task.updated_at) < cutoff,
+    )
+    ids: Set[int] = set(db.exec(select(Task.id).where(finished)).all())
+    links = db.exec(select(Task.parent_id, Task.id).where(Task.parent_id.is_not(None))).all()
+    # Drop parents of tasks that stay hot until nothing changes (one pass per tree level)
+    while True:
+        blocked = {parent for parent, child in links if parent in ids and child not in ids}
+        if not blocked:
+            return sorted(ids)
+        ids -= blocked
+
+
+def _copy(db: Session, source, target, condition, archived_at: datetime) -> int:
+    """INSERT INTO target SELECT source columns, archived_at WHERE condition"""
+    names = [column.name for column in source.columns]
+    statement = insert(target).from_select(
+        names + ["archived_at"],
+        select(*[source.c[name] for name in names], literal(archived_at, target.c.archived_at.type))
+        .where(condition)
+    )
+    return db.exec(statement).rowcount
+
+
+def archive_tasks(db: Session, older_than_days: int, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """Move finished tasks older than older_than_days to the archive tables.
+    Returns how many tasks, history entries and dependencies were moved."""
+    ids = archive_candidates(db, older_than_days)
+    moved = {"tasks": 0, "history": 0, "dependencies": 0}
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        now = datetime.utcnow()
+        try:
+            moved["history"] += _copy(db, History.__table__, archived_history,
+                                      History.task_id.in_(chunk), now)
+            moved["dependencies"] += _copy(
+                db, TaskDependency.__table__, archived_dependency,
+                TaskDependency.from_task_id.in_(chunk) | TaskDependency.to_task_id.in_(chunk), now
+            )
+            moved["tasks"] += _copy(db, Task.__table__, archived_task, Task.id.in_(chunk), now)
+            TaskCRUD._cascade_delete(db, chunk)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return moved
+
+
+def _archived_row_to_task(row) -> Task:
+    values = dict(row._mapping)
+    values.pop("archived_at", None)
+    return Task(**values)
+
+
+def read_archived(db: Session, task_id: int) -> Optional[Task]:
+    """An archived task as a detached Task object, or None"""
+    row = db.connection().execute(select(archived_task).where(archived_task.c.id == task_id)).first()
+    return _archived_row_to_task(row) if row else None
+
+
+def read_archived_history(db: Session, task_id: int, fields: Optional[List[str]] = None) -> List[History]:
+    statement = select(archived_history).where(archived_history.c.task_id == task_id)
+    if fields:
+        statement = statement.where(archived_history.c.field.in_(fields))
+    rows = db.connection().execute(
+        statement.order_by(archived_history.c.ts.desc(), archived_history.c.id.desc())
+    ).all()
+    return [History(**{k: v for k, v in row._mapping.items() if k != "archived_at"}) for row in rows]
+
+
+def archived_tasks(db: Session) -> List[Task]:
+    rows = db.connection().execute(select(archived_task).order_by(archived_task.c.id)).all()
+    return [_archived_row_to_task(row) for row in rows]
+
+
+def archived_dependencies(db: Session) -> List[TaskDependency]:
+    rows = db.connection().execute(select(archived_dependency).order_by(archived_dependency.c.id)).all()
+    return [TaskDependency(**{k: v for k, v in row._mapping.items() if k != "archived_at"})
+            for row in rows]
+
+
+def search_archived(db: Session, query: str, limit: int) -> List[Task]:
+    """Substring match on archived titles and descriptions, newest first"""
+    conditions = []
+    for term in query.split():
+        pattern = f"%{term}%"
+        conditions.append(or_(archived_task.c.title.ilike(pattern),
+                              archived_task.c.description.ilike(pattern)))
+    if not conditions:
+        return []
+    rows = db.connection().execute(
+        select(archived_task).where(*conditions)
+        .order_by(archived_task.c.updated_at.desc()).limit(limit)
+    ).all()
+    return [_archived_row_to_task(row) for row in rows]
+
+
+def restore_task(db: Session, task_id: int) -> bool:
+    """Move one archived task back to the hot tables with its history and the
+    dependencies whose other end is live. Its parent link is dropped if the
+    parent is not live. Returns False if the task is not archived."""
+    row = db.connection().execute(select(archived_task).where(archived_task.c.id == task_id)).first()
+    if row is None:
+        return False
+    if db.get(Task, task_id) is not None:
+        raise ValueError(f"Task id {task_id} is already in use")
+    values = {k: v for k, v in row._mapping.items() if k != "archived_at"}
+    if values["parent_id"] is not None and db.get(Task, values["parent_id"]) is None:
+        values["parent_id"] = None
+    # History and dependency rows get fresh ids in the hot tables
+    history_names = [column.name for column in History.__table__.columns if column.name != "id"]
+    dependency_names = [column.name for column in TaskDependency.__table__.columns if column.name != "id"]
+    live = select(Task.id)
+    try:
+        db.exec(insert(Task).values(**values))
+        dependency_ids = db.exec(select(archived_dependency.c.id).where(or_(
+            and_(archived_dependency.c.from_task_id == task_id, archived_dependency.c.to_task_id.in_(live)),
+            and_(archived_dependency.c.to_task_id == task_id, archived_dependency.c.from_task_id.in_(live)),
+        ))).all()
+        db.exec(insert(History).from_select(
+            history_names,
+            select(*[archived_history.c[name] for name in history_names])
+            .where(archived_history.c.task_id == task_id)
+        ))
+        db.exec(insert(TaskDependency).from_select(
+            dependency_names,
+            select(*[archived_dependency.c[name] for name in dependency_names])
+            .where(archived_dependency.c.id.in_(dependency_ids))
+        ))
+        db.exec(delete(archived_history).where(archived_history.c.task_id == task_id))
+        db.exec(delete(archived_dependency).where(archived_dependency.c.id.in_(dependency_ids)))
+        db.exec(delete(archived_task).where(archived_task.c.id == task_id))
+
+        TaskAggregateCRUD.add(db, [task_id])
+        ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, [task_id])
+        restored = db.exec(select(TaskDependency.id).where(
+            (TaskDependency.from_task_id == task_id) | (TaskDependency.to_task_id == task_id)
+        )).all()
+        ChangeLogCRUD.record(db, ChangeLogCRUD.DEPENDENCY, restored)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return True
@@ -0,0 +1,152 @@
+"""
+Async variants of the hot CRUD operations, for handlers running on the event loop.
+
+Reads are issued natively through AsyncSession. Writes reuse the sync CRUD
+methods via AsyncSession.run_sync, so history, change-feed and cascade logic
+stay in one place while the I/O still yields to the event loop.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .crud import TaskCRUD, ModuleCRUD, TaskDependencyCRUD, TaskAggregateCRUD
+from .models import Task, Module, TaskDependency, ChangeLog
+from .schemas import TaskUpdate
+
+
+class AsyncTaskCRUD:
+    @staticmethod
+    async def create(db: AsyncSession, obj: Task) -> Task:
+        return await db.run_sync(TaskCRUD.create, obj)
+
+    @staticmethod
+    async def read(db: AsyncSession, task_id: int) -> Optional[Task]:
+        return await db.get(Task, task_id)
+
+    @staticmethod
+    async def read_all(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Task]:
+        statement = TaskCRUD.select_fields(fields).order_by(Task.id).offset(skip)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return (await db.exec(statement)).all()
+
+    @staticmethod
+    async def count(db: AsyncSession) -> int:
+        return (await db.exec(select(func.count()).select_from(Task))).one()
+
+    @staticmethod
+    async def read_page(
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: str = "id",
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Task], Optional[str]]:
+        rows = (await db.exec(TaskCRUD.page_statement(limit, cursor, order_by, fields))).all()
+        return TaskCRUD.finish_page(rows, limit, order_by)
+
+    @staticmethod
+    async def update(db: AsyncSession, db_obj: Task, obj_in: TaskUpdate) -> Dict[str, Any]:
+        return await db.run_sync(TaskCRUD.update, db_obj, obj_in)
+
+    @staticmethod
+    async def read_version(db: AsyncSession, task_id: int) -> Optional[int]:
+        result = await db.exec(select(Task.version).where(Task.id == task_id))
+        return result.first()
+
+    @staticmethod
+    async def delete(db: AsyncSession, db_obj: Task) -> Task:
+        return await db.run_sync(TaskCRUD.delete, db_obj)
+
+    @staticmethod
+    async def delete_subtree(db: AsyncSession, db_obj: Task) -> List[int]:
+        return await db.run_sync(TaskCRUD.delete_subtree, db_obj)
+
+    @staticmethod
+    async def update_positions(
+        db: AsyncSession,
+        positions: Dict[int, Tuple[float, float]],
+        record_history: bool = False
+    ) -> List[int]:
+        return await db.run_sync(TaskCRUD.update_positions, positions, record_history)
+
+    @staticmethod
+    async def bulk_apply(
+        db: AsyncSession,
+        creates: Iterable[Task] = (),
+        updates: Iterable[Tuple[int, Dict[str, Any]]] = (),
+        deletes: Iterable[int] = ()
+    ) -> List[Dict[str, Any]]:
+        return await db.run_sync(TaskCRUD.bulk_apply, creates, updates, deletes)
+
+
+class AsyncModuleCRUD:
+    @staticmethod
+    async def create(db: AsyncSession, obj: Module) -> Module:
+        return await db.run_sync(ModuleCRUD.create, obj)
+
+    @staticmethod
+    async def read(db: AsyncSession, module_id: int) -> Optional[Module]:
+        return await db.get(Module, module_id)
+
+    @staticmethod
+    async def read_all(db: AsyncSession) -> List[Module]:
+        return (await db.exec(select(Module))).all()
+
+    @staticmethod
+    async def delete(db: AsyncSession, db_obj: Module) -> Module:
+        return await db.run_sync(ModuleCRUD.delete, db_obj)
+
+
+class AsyncTaskDependencyCRUD:
+    @staticmethod
+    async def create(db: AsyncSession, obj: TaskDependency) -> TaskDependency:
+        return await db.run_sync(TaskDependencyCRUD.create, obj)
+
+    @staticmethod
+    async def read_all(db: AsyncSession, fields: Optional[List[str]] = None) -> List[TaskDependency]:
+        """All dependencies; with fields, row tuples of just those columns"""
+        if fields is None:
+            return (await db.exec(select(TaskDependency))).all()
+        statement = select(*[getattr(TaskDependency, name) for name in fields])
+        return (await db.exec(statement.order_by(TaskDependency.id))).all()
+
+    @staticmethod
+    async def read_by_task(db: AsyncSession, task_id: int) -> List[TaskDependency]:
+        statement = select(TaskDependency).where(
+            (TaskDependency.from_task_id == task_id) |
+            (TaskDependency.to_task_id == task_id)
+        )
+        return (await db.exec(statement)).all()
+
+    @staticmethod
+    async def read_by_tasks(db: AsyncSession, from_task_id: int, to_task_id: int) -> Optional[TaskDependency]:
+        statement = select(TaskDependency).where(
+            TaskDependency.from_task_id == from_task_id,
+            TaskDependency.to_task_id == to_task_id
+        )
+        return (await db.exec(statement)).first()
+
+    @staticmethod
+    async def delete(db: AsyncSession, dependency: TaskDependency) -> bool:
+        return await db.run_sync(TaskDependencyCRUD.delete, dependency)
+
+
+class AsyncTaskAggregateCRUD:
+    @staticmethod
+    async def by_module(db: AsyncSession) -> List[Dict[str, Any]]:
+        return await db.run_sync(TaskAggregateCRUD.by_module)
+
+
+class AsyncChangeLogCRUD:
+    @staticmethod
+    async def version(db: AsyncSession, entity: str) -> int:
+        statement = select(func.max(ChangeLog.id)).where(ChangeLog.entity == entity)
+        return (await db.exec(statement)).one() or 0
@@ -1,13 +1,36 @@
+import base64
+import csv
+import io
+import json
 from datetime import datetime
-from typing import List, Optional
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from sqlalchemy import Select, bindparam, case, delete, func, insert, tuple_, update
 from sqlmodel import Session, select
-from .models import Task, Module, History, Setting, TaskDependency, Island
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm.attributes import set_committed_value
+from .models import Task, Module, History, Setting, TaskDependency, Island, ChangeLog, TaskAggregate
 from .schemas import TaskUpdate, ModuleCreate, SettingCreate, TaskDependencyCreate
 
+class TaskVersionConflict(Exception):
+    """The task was changed by someone else since the caller read it"""
+
+    def __init__(self, task_id: int, expected: int):
+        super().__init__(f"Task {task_id} is no longer at version {expected}")
+        self.task_id = task_id
+        self.expected = expected
+
+# NULL marker in COPY ... CSV payloads, so empty strings stay distinct from NULL
+COPY_NULL = "\\N"
+
 class TaskCRUD:
     @staticmethod
     def create(db: Session, obj: Task) -> Task:
         db.add(obj)
+        db.flush()
+        ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, [obj.id])
+        TaskAggregateCRUD.add(db, [obj.id])
         db.commit()
         db.refresh(obj)
         return obj
@@ -17,65 +40,521 @@ class TaskCRUD:
         return db.get(Task, task_id)
 
     @staticmethod
-    def read_all(db: Session, skip: int = 0, limit: int = 100) -> List[Task]:
-        statement = select(Task).offset(skip).limit(limit)
+    def read_all(
+        db: Session,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Task]:
+        """All tasks in id order; with fields, row tuples of just those columns"""
+        statement = TaskCRUD.select_fields(fields).order_by(Task.id).offset(skip)
+        if limit is not None:
+            statement = statement.limit(limit)
         return db.exec(statement).all()
 
     @staticmethod
-    def update(db: Session, db_obj: Task, obj_in: TaskUpdate) -> Task:
-        obj_data = obj_in.dict(exclude_unset=True)
+    def count(db: Session) -> int:
+        return db.exec(select(func.count()).select_from(Task)).one()
+
+    @staticmethod
+    def encode_cursor(order_by: str, task: Task) -> str:
+        """Build an opaque keyset cursor pointing just after `task`"""
+        key = {"o": order_by, "i": task.id}
+        if order_by == "updated_at":
+            key["u"] = task.updated_at.isoformat()
+        raw = json.dumps(key, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> dict:
+        """Decode a cursor from encode_cursor; raises ValueError if malformed"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            key["i"] = int(key["i"])
+            if key.get("o") == "updated_at":
+                key["u"] = datetime.fromisoformat(key["u"])
+            elif key.get("o") != "id":
+                raise ValueError("unknown cursor order")
+            return key
+        except (KeyError, TypeError, ValueError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {e}")
+
+    @staticmethod
+    def select_fields(fields: Optional[List[str]] = None, *extra: str):
+        """select(Task), or only the given columns (plus any extra helper
+        columns not already listed) when a projection is requested"""
+        if fields is None:
+            return select(Task)
+        names = list(fields) + [name for name in extra if name not in fields]
+        return select(*[getattr(Task, name) for name in names])
+
+    @staticmethod
+    def page_statement(
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: str = "id",
+        fields: Optional[List[str]] = None
+    ):
+        """Build the keyset query for read_page; fetches one extra row so the
+        caller can tell whether another page exists"""
+        statement = TaskCRUD.select_fields(fields, "id", order_by)
+        key = TaskCRUD.decode_cursor(cursor) if cursor else None
+        if key and key["o"] != order_by:
+            raise ValueError("Cursor was issued for a different order_by")
+
+        if order_by == "updated_at":
+            if key:
+                statement = statement.where(tuple_(Task.updated_at, Task.id) < tuple_(key["u"], key["i"]))
+            statement = statement.order_by(Task.updated_at.desc(), Task.id.desc())
+        else:
+            if key:
+                statement = statement.where(Task.id > key["i"])
+            statement = statement.order_by(Task.id)
+        return statement.limit(limit + 1)
+
+    @staticmethod
+    def finish_page(rows: List[Task], limit: int, order_by: str) -> Tuple[List[Task], Optional[str]]:
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = TaskCRUD.encode_cursor(order_by, rows[-1])
+        return rows, next_cursor
+
+    @staticmethod
+    def read_page(
+        db: Session,
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: str = "id",
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Task], Optional[str]]:
+        """Keyset-paginated read. order_by="id" ascends by id, "updated_at" returns
+        the most recently updated first with id as the tie-breaker."""
+        rows = db.exec(TaskCRUD.page_statement(limit, cursor, order_by, fields)).all()
+        return TaskCRUD.finish_page(rows, limit, order_by)
+
+    @staticmethod
+    def iter_all(
+        db: Session,
+        batch_size: int = 500,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Task]:
+        """Yield every task in id order, one keyset batch at a time, detaching
+        each batch from the session so memory stays bounded"""
+        statement = TaskCRUD.select_fields(fields, "id")
+        if db.get_bind().dialect.name == "postgresql":
+            # Server-side cursor: one query, rows streamed batch_size at a time
+            result = db.exec(
+                statement.order_by(Task.id).execution_options(yield_per=batch_size)
+            )
+            for batch in result.partitions():
+                db.expunge_all()
+                yield from batch
+            return
+
+        last_id = 0
+        while True:
+            batch = db.exec(
+                statement.where(Task.id > last_id).order_by(Task.id).limit(batch_size)
+            ).all()
+            if not batch:
+                return
+            last_id = batch[-1].id
+            db.expunge_all()
+            yield from batch
+
+    @staticmethod
+    def _history_rows(db_obj: Task, obj_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """History rows (as dicts) for the values in obj_data that differ from db_obj"""
+        history_rows = []
         for field, value in obj_data.items():
             if hasattr(db_obj, field):
                 # Log history for changes
                 old_val = str(getattr(db_obj, field))
                 if str(value) != old_val:
-                    history = History(
-                        task_id=db_obj.id,
-                        field=field,
-                        old_val=old_val,
-                        new_val=str(value)
+                    history_rows.append({
+                        "task_id": db_obj.id,
+                        "field": field,
+                        "old_val": old_val,
+                        "new_val": str(value),
+                        "ts": datetime.utcnow()
+                    })
+        return history_rows
+
+    @staticmethod
+    def _versioned_update(db: Session, db_obj: Task, expected: int, values: Dict[str, Any]) -> bool:
+        """UPDATE ... WHERE id = ? AND version = expected, bumping the version.
+        On success db_obj is synced in memory (values gains "version");
+        returns False if the row has moved on."""
+        result = db.exec(
+            update(Task)
+            .where(Task.id == db_obj.id, Task.version == expected)
+            .values(**values, version=Task.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+        values["version"] = expected + 1
+        for field, value in values.items():
+            set_committed_value(db_obj, field, value)
+        return True
+
+    @staticmethod
+    def update(db: Session, db_obj: Task, obj_in: TaskUpdate) -> Dict[str, Any]:
+        """Optimistic update: one UPDATE ... WHERE id = ? AND version = ?.
+
+        The expected version is obj_in.version when the client sends it, else
+        the version db_obj was loaded with. Raises TaskVersionConflict if the
+        row has moved on. Returns the id, the new version and the fields whose
+        values changed, without re-reading the row; db_obj is kept in sync in
+        memory."""
+        obj_data = obj_in.dict(exclude_unset=True)
+        expected = obj_data.pop("version", None)
+        if expected is None:
+            expected = db_obj.version
+        values = {field: value for field, value in obj_data.items() if hasattr(db_obj, field)}
+        history_rows = TaskCRUD._history_rows(db_obj, values)
+        changed = {row["field"] for row in history_rows}
+        values["updated_at"] = datetime.utcnow()
+        tracked = bool(TaskAggregateCRUD.TRACKED_FIELDS & changed)
+        try:
+            if tracked:
+                TaskAggregateCRUD.subtract(db, [db_obj.id])
+            if not TaskCRUD._versioned_update(db, db_obj, expected, values):
+                raise TaskVersionConflict(db_obj.id, expected)
+            if history_rows:
+                db.exec(insert(History), params=history_rows)
+            if tracked:
+                TaskAggregateCRUD.add(db, [db_obj.id])
+            ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, [db_obj.id])
+            
+            db.commit()
+        except Exception:
+            # e.g. the hierarchy trigger rejecting a reparent that would form a cycle
+            db.rollback()
+            raise
+        patch = {"id": db_obj.id, "version": values["version"], "updated_at": values["updated_at"]}
+        patch.update({field: values[field] for field in changed})
+        return patch
+
+    @staticmethod
+    def set_vector_ref(db: Session, db_obj: Task, vector_id: Optional[str], updated_at: Optional[datetime]) -> None:
+        """Point a task at its embedding (or clear it with None, None).
+
+        Bumps the version and records the change like any other write, so list
+        ETags and the change feed see it, but leaves updated_at alone:
+        needs_vector_update compares it against last_vector_update. Runs inside
+        the caller's transaction; does not commit."""
+        values = {"vector_id": vector_id, "last_vector_update": updated_at}
+        db.exec(
+            update(Task)
+            .where(Task.id == db_obj.id)
+            .values(**values, version=Task.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        values["version"] = (db_obj.version or 0) + 1
+        for field, value in values.items():
+            set_committed_value(db_obj, field, value)
+        ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, [db_obj.id])
+
+    @staticmethod
+    def clear_vector_refs(db: Session) -> List[int]:
+        """Clear vector_id/last_vector_update on every task that has one; same
+        bookkeeping as set_vector_ref. Returns the affected ids; does not commit."""
+        ids = list(db.exec(select(Task.id).where(
+            (Task.vector_id.is_not(None)) | (Task.last_vector_update.is_not(None))
+        )).all())
+        for start in range(0, len(ids), ChangeLogCRUD.CHUNK_SIZE):
+            chunk = ids[start:start + ChangeLogCRUD.CHUNK_SIZE]
+            db.exec(
+                update(Task)
+                .where(Task.id.in_(chunk))
+                .values(vector_id=None, last_vector_update=None, version=Task.version + 1)
+                .execution_options(synchronize_session="fetch")
+            )
+        ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, ids)
+        return ids
+
+    @staticmethod
+    def update_positions(
+        db: Session,
+        positions: Dict[int, Tuple[float, float]],
+        record_history: bool = False,
+        chunk_size: int = 500
+    ) -> List[int]:
+        """Move many tasks with one UPDATE ... CASE per chunk and a single commit.
+
+        Pure moves skip per-coordinate History; with record_history each moved
+        task gets one collapsed "position" entry. Returns the ids that exist.
+        """
+        ids = list(positions)
+        if not ids:
+            return []
+        now = datetime.utcnow()
+        updated: List[int] = []
+        history_rows = []
+        try:
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                if record_history:
+                    old = db.exec(
+                        select(Task.id, Task.position_x, Task.position_y).where(Task.id.in_(chunk))
+                    ).all()
+                    for task_id, old_x, old_y in old:
+                        new_x, new_y = positions[task_id]
+                        if (old_x, old_y) != (new_x, new_y):
+                            history_rows.append({
+                                "task_id": task_id,
+                                "field": "position",
+                                "old_val": f"{old_x},{old_y}",
+                                "new_val": f"{new_x},{new_y}",
+                                "ts": now
+                            })
+                db.exec(
+                    update(Task)
+                    .where(Task.id.in_(chunk))
+                    .values(
+                        position_x=case({i: positions[i][0] for i in chunk}, value=Task.id),
+                        position_y=case({i: positions[i][1] for i in chunk}, value=Task.id),
+                        updated_at=now,
+                        version=Task.version + 1
                     )
-                    db.add(history)
-                setattr(db_obj, field, value)
-        
-        db_obj.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+                    .execution_options(synchronize_session=False)
+                )
+                updated.extend(db.exec(select(Task.id).where(Task.id.in_(chunk))).all())
+            if history_rows:
+                db.exec(insert(History), params=history_rows)
+            ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, updated)
+            db.commit()
+            return updated
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def _cascade_delete(db: Session, task_ids: Union[List[int], Select]) -> List[int]:
+        """Set-based removal of tasks with their history and dependencies;
+        children outside the set are detached rather than deleted.
+
+        task_ids may be a list or a SELECT of ids (e.g. a recursive CTE), which
+        is then embedded in each statement instead of being bound as parameters.
+        Returns the deleted ids. Does not commit."""
+        ids = list(task_ids) if isinstance(task_ids, list) else db.exec(task_ids).all()
+        if not ids:
+            return []
+        target = task_ids
+
+        dependency_ids = db.exec(select(TaskDependency.id).where(
+            TaskDependency.from_task_id.in_(target) | TaskDependency.to_task_id.in_(target)
+        )).all()
+        child_ids = db.exec(select(Task.id).where(
+            Task.parent_id.in_(target), Task.id.not_in(target)
+        )).all()
+
+        TaskAggregateCRUD.subtract(db, target)
+        db.exec(delete(History).where(History.task_id.in_(target))
+                .execution_options(synchronize_session=False))
+        db.exec(delete(TaskDependency).where(
+            TaskDependency.from_task_id.in_(target) | TaskDependency.to_task_id.in_(target)
+        ).execution_options(synchronize_session=False))
+        db.exec(update(Task).where(Task.parent_id.in_(target), Task.id.not_in(target))
+                .values(parent_id=None).execution_options(synchronize_session="fetch"))
+        db.exec(delete(Task).where(Task.id.in_(target))
+                .execution_options(synchronize_session="fetch"))
+
+        ChangeLogCRUD.record(db, ChangeLogCRUD.DEPENDENCY, dependency_ids, ChangeLogCRUD.DELETE)
+        ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, child_ids)
+        ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, ids, ChangeLogCRUD.DELETE)
+        return ids
+
+    @staticmethod
+    def subtree_query(task_id: int) -> Select:
+        """SELECT of task_id and all of its descendants via a recursive CTE
+        over parent_id (UNION, so an accidental cycle still terminates)"""
+        tree = select(Task.id).where(Task.id == task_id).cte("subtree", recursive=True)
+        tree = tree.union(select(Task.id).where(Task.parent_id == tree.c.id))
+        return select(tree.c.id)
+
+    @staticmethod
+    def _column_values(obj: Task) -> Dict[str, Any]:
+        values = {}
+        for column in Task.__table__.columns:
+            if column.name == "id" and obj.id is None:
+                continue
+            value = getattr(obj, column.name)
+            # SQLAlchemy's Enum type stores member names, not values
+            values[column.name] = value.name if isinstance(value, Enum) else value
+        return values
+
+    @staticmethod
+    def _copy_tasks(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+        """PostgreSQL COPY of new task rows. Ids are reserved from the sequence
+        up front so they are known without RETURNING."""
+        ids = db.exec(
+            select(func.nextval(func.pg_get_serial_sequence("task", "id")))
+            .select_from(func.generate_series(1, len(rows)))
+        ).all()
+        columns = ["id"] + [c.name for c in Task.__table__.columns if c.name != "id"]
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for task_id, row in zip(ids, rows):
+            row = dict(row, id=task_id)
+            writer.writerow([
+                COPY_NULL if row.get(name) is None
+                else row[name].isoformat() if isinstance(row[name], datetime)
+                else row[name]
+                for name in columns
+            ])
+        buffer.seek(0)
+
+        sql = f"COPY task ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+        cursor = db.connection().connection.driver_connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+        return list(ids)
+
+    @staticmethod
+    def _insert_many(db: Session, tasks: Iterable[Task]) -> List[int]:
+        """Insert new tasks without loading them into the session and return
+        their ids in input order. Does not commit."""
+        rows = [TaskCRUD._column_values(task) for task in tasks]
+        if not rows:
+            return []
+        if db.get_bind().dialect.name == "postgresql" and all("id" not in row for row in rows):
+            return TaskCRUD._copy_tasks(db, rows)
+        return list(db.exec(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True), params=rows
+        ).scalars())
+
+    @staticmethod
+    def bulk_load(db: Session, tasks: Iterable[Task]) -> List[int]:
+        """Import many new tasks in one transaction: COPY on PostgreSQL, a
+        batched multi-row INSERT elsewhere. No history rows are written."""
+        try:
+            ids = TaskCRUD._insert_many(db, tasks)
+            ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, ids)
+            TaskAggregateCRUD.add(db, ids)
+            db.commit()
+            return ids
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def bulk_apply(
+        db: Session,
+        creates: Iterable[Task] = (),
+        updates: Iterable[Tuple[int, Dict[str, Any]]] = (),
+        deletes: Iterable[int] = ()
+    ) -> List[Dict[str, Any]]:
+        """Apply creates, (id, changes) updates and deletes in a single transaction.
+
+        Missing ids are reported per item and skipped; any database error rolls
+        back the whole batch. Returns one result dict per input item.
+        """
+        creates, updates, deletes = list(creates), list(updates), list(deletes)
+        results: List[Dict[str, Any]] = []
+        try:
+            created_ids = TaskCRUD._insert_many(db, creates)
+            ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, created_ids)
+            TaskAggregateCRUD.add(db, created_ids)
+            results.extend(
+                {"op": "create", "index": i, "id": task_id, "success": True}
+                for i, task_id in enumerate(created_ids)
+            )
+
+            update_ids = [task_id for task_id, _ in updates]
+            targets = {
+                task.id: task
+                for task in db.exec(select(Task).where(Task.id.in_(update_ids))).all()
+            } if update_ids else {}
+            tracked_ids = [
+                task_id for task_id, obj_data in updates
+                if task_id in targets and TaskAggregateCRUD.TRACKED_FIELDS & obj_data.keys()
+            ]
+            TaskAggregateCRUD.subtract(db, tracked_ids)
+            history_rows = []
+            for i, (task_id, obj_data) in enumerate(updates):
+                db_obj = targets.get(task_id)
+                if db_obj is None:
+                    results.append({"op": "update", "index": i, "id": task_id,
+                                    "success": False, "error": "Task not found"})
+                    continue
+                obj_data = dict(obj_data)
+                expected = obj_data.pop("version", None)
+                if expected is None:
+                    expected = db_obj.version
+                values = {field: value for field, value in obj_data.items() if hasattr(db_obj, field)}
+                rows = TaskCRUD._history_rows(db_obj, values)
+                values["updated_at"] = datetime.utcnow()
+                # Checked in SQL, so a write committed since the SELECT above is not overwritten
+                if not TaskCRUD._versioned_update(db, db_obj, expected, values):
+                    results.append({"op": "update", "index": i, "id": task_id,
+                                    "success": False, "error": "Version conflict"})
+                    continue
+                history_rows.extend(rows)
+                results.append({"op": "update", "index": i, "id": task_id, "success": True,
+                                "version": values["version"]})
+            TaskAggregateCRUD.add(db, tracked_ids)
+            if history_rows:
+                db.exec(insert(History), params=history_rows)
+            ChangeLogCRUD.record(db, ChangeLogCRUD.TASK, [
+                r["id"] for r in results if r["op"] == "update" and r["success"]
+            ])
+
+            existing = set(db.exec(select(Task.id).where(Task.id.in_(deletes))).all()) if deletes else set()
+            for i, task_id in enumerate(deletes):
+                if task_id in existing:
+                    results.append({"op": "delete", "index": i, "id": task_id, "success": True})
+                else:
+                    results.append({"op": "delete", "index": i, "id": task_id,
+                                    "success": False, "error": "Task not found"})
+            TaskCRUD._cascade_delete(db, list(existing))
+
+            db.commit()
+            return results
+        except Exception:
+            db.rollback()
+            raise
 
     @staticmethod
     def delete(db: Session, db_obj: Task) -> Task:
+        """Delete a task with its history and dependencies in one transaction;
+        its children are detached and kept"""
         try:
-            # 1. Delete task history records first
-            db.exec(
-                select(History).where(History.task_id == db_obj.id)
-            ).all()
-            for history in db.exec(select(History).where(History.task_id == db_obj.id)).all():
-                db.delete(history)
-            
-            # 2. Delete task dependencies (both incoming and outgoing)
-            for dep in db.exec(select(TaskDependency).where(TaskDependency.from_task_id == db_obj.id)).all():
-                db.delete(dep)
-            for dep in db.exec(select(TaskDependency).where(TaskDependency.to_task_id == db_obj.id)).all():
-                db.delete(dep)
-            
-            # 3. Update child tasks to remove parent reference
-            for child in db.exec(select(Task).where(Task.parent_id == db_obj.id)).all():
-                child.parent_id = None
-                db.add(child)
-            
-            # 4. Delete the task itself
-            db.delete(db_obj)
+            TaskCRUD._cascade_delete(db, [db_obj.id])
             db.commit()
             return db_obj
         except Exception as e:
             db.rollback()
             raise e
 
+    @staticmethod
+    def delete_subtree(db: Session, db_obj: Task) -> List[int]:
+        """Delete a task and all of its descendants in one transaction.
+        Returns the deleted ids."""
+        try:
+            deleted = TaskCRUD._cascade_delete(db, TaskCRUD.subtree_query(db_obj.id))
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            raise e
+
 class ModuleCRUD:
     @staticmethod
     def create(db: Session, obj: Module) -> Module:
         db.add(obj)
+        db.flush()
+        ChangeLogCRUD.record(db, ChangeLogCRUD.MODULE, [obj.id])
         db.commit()
         db.refresh(obj)
         return obj
@@ -91,15 +570,142 @@ class ModuleCRUD:
 
     @staticmethod
     def delete(db: Session, db_obj: Module) -> Module:
+        ChangeLogCRUD.record(db, ChangeLogCRUD.MODULE, [db_obj.id], ChangeLogCRUD.DELETE)
         db.delete(db_obj)
         db.commit()
         return db_obj
 
 class HistoryCRUD:
+    CHUNK_SIZE = 500
+
     @staticmethod
-    def read_by_task(db: Session, task_id: int) -> List[History]:
-        statement = select(History).where(History.task_id == task_id).order_by(History.ts.desc())
-        return db.exec(statement).all()
+    def read_by_task(db: Session, task_id: int, fields: Optional[List[str]] = None) -> List[History]:
+        statement = select(History).where(History.task_id == task_id)
+        if fields:
+            statement = statement.where(History.field.in_(fields))
+        return db.exec(statement.order_by(History.ts.desc(), History.id.desc())).all()
+
+    @staticmethod
+    def encode_cursor(entry: History) -> str:
+        raw = json.dumps({"t": entry.ts.isoformat(), "i": entry.id}, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decode a cursor from encode_cursor; raises ValueError if malformed"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return datetime.fromisoformat(key["t"]), int(key["i"])
+        except (KeyError, TypeError, ValueError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid cursor: {e}")
+
+    @staticmethod
+    def read_page(
+        db: Session,
+        task_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[History], Optional[str]]:
+        """Newest-first keyset page of a task's history on (ts, id), served by
+        ix_history_task_id_ts. Optionally restricted to the given fields."""
+        statement = select(History).where(History.task_id == task_id)
+        if fields:
+            statement = statement.where(History.field.in_(fields))
+        if cursor:
+            ts, entry_id = HistoryCRUD.decode_cursor(cursor)
+            statement = statement.where(tuple_(History.ts, History.id) < tuple_(ts, entry_id))
+        rows = db.exec(
+            statement.order_by(History.ts.desc(), History.id.desc()).limit(limit + 1)
+        ).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, HistoryCRUD.encode_cursor(rows[-1])
+        return rows, None
+
+    @staticmethod
+    def payload_bytes(db: Session, condition=None) -> int:
+        """Stored text size of matching history rows, an estimate of the space
+        their deletion frees"""
+        size = func.length(History.field) + func.length(History.old_val) + func.length(History.new_val)
+        statement = select(func.coalesce(func.sum(size), 0))
+        if condition is not None:
+            statement = statement.where(condition)
+        return int(db.exec(statement).one())
+
+    @staticmethod
+    def merge_runs(db: Session, window_seconds: float) -> Dict[str, int]:
+        """Collapse consecutive edits of the same field of the same task, each
+        within window_seconds of the previous one, into a single row spanning
+        the first old value to the last new value. Runs whose net effect is
+        no change are dropped. Does not commit."""
+        statement = select(History.id, History.task_id, History.field, History.old_val,
+                           History.new_val, History.ts) \
+            .order_by(History.task_id, History.field, History.ts, History.id) \
+            .execution_options(yield_per=HistoryCRUD.CHUNK_SIZE)
+        keep_updates: List[Dict[str, Any]] = []
+        delete_ids: List[int] = []
+        freed = 0
+
+        def close_run(run):
+            nonlocal freed
+            if len(run) < 2:
+                return
+            first, last = run[0], run[-1]
+            dropped = run[1:]
+            if first.old_val == last.new_val:
+                dropped = run
+            else:
+                keep_updates.append({"b_id": first.id, "b_new": last.new_val, "b_ts": last.ts})
+            delete_ids.extend(row.id for row in dropped)
+            freed += sum(len(row.field) + len(row.old_val) + len(row.new_val) for row in dropped)
+
+        run = []
+        for row in db.exec(statement):
+            if run and (row.task_id, row.field) == (run[-1].task_id, run[-1].field) \
+                    and (row.ts - run[-1].ts).total_seconds() <= window_seconds:
+                run.append(row)
+                continue
+            close_run(run)
+            run = [row]
+        close_run(run)
+
+        if keep_updates:
+            db.connection().execute(
+                update(History.__table__)
+                .where(History.__table__.c.id == bindparam("b_id"))
+                .values(new_val=bindparam("b_new"), ts=bindparam("b_ts")),
+                keep_updates
+            )
+        for start in range(0, len(delete_ids), HistoryCRUD.CHUNK_SIZE):
+            chunk = delete_ids[start:start + HistoryCRUD.CHUNK_SIZE]
+            db.exec(delete(History).where(History.id.in_(chunk)))
+        return {"merged": len(keep_updates), "deleted": len(delete_ids), "bytes": freed}
+
+    @staticmethod
+    def delete_older_than(db: Session, cutoff: datetime) -> Dict[str, int]:
+        """Age retention: drop history recorded before cutoff. Does not commit."""
+        condition = History.ts < cutoff
+        freed = HistoryCRUD.payload_bytes(db, condition)
+        deleted = db.exec(delete(History).where(condition)).rowcount
+        return {"deleted": deleted, "bytes": freed}
+
+    @staticmethod
+    def trim_per_task(db: Session, max_rows: int) -> Dict[str, int]:
+        """Size retention: keep only the newest max_rows entries of each task.
+        Does not commit."""
+        ranked = select(
+            History.id,
+            func.row_number().over(
+                partition_by=History.task_id,
+                order_by=(History.ts.desc(), History.id.desc())
+            ).label("rn")
+        ).subquery()
+        condition = History.id.in_(select(ranked.c.id).where(ranked.c.rn > max_rows))
+        freed = HistoryCRUD.payload_bytes(db, condition)
+        deleted = db.exec(delete(History).where(condition)).rowcount
+        return {"deleted": deleted, "bytes": freed}
 
 class SettingCRUD:
     @staticmethod
@@ -137,6 +743,8 @@ class TaskDependencyCRUD:
             return existing
         
         db.add(obj)
+        db.flush()
+        ChangeLogCRUD.record(db, ChangeLogCRUD.DEPENDENCY, [obj.id])
         db.commit()
         db.refresh(obj)
         return obj
@@ -166,6 +774,7 @@ class TaskDependencyCRUD:
     @staticmethod
     def delete(db: Session, dependency: TaskDependency) -> bool:
         """Delete a specific dependency object"""
+        ChangeLogCRUD.record(db, ChangeLogCRUD.DEPENDENCY, [dependency.id], ChangeLogCRUD.DELETE)
         db.delete(dependency)
         db.commit()
         return True
@@ -180,6 +789,7 @@ class TaskDependencyCRUD:
             )
         ).first()
         if dependency:
+            ChangeLogCRUD.record(db, ChangeLogCRUD.DEPENDENCY, [dependency.id], ChangeLogCRUD.DELETE)
             db.delete(dependency)
             db.commit()
             return True
@@ -190,6 +800,8 @@ class IslandCRUD:
     @staticmethod
     def create(db: Session, island: Island) -> Island:
         db.add(island)
+        db.flush()
+        ChangeLogCRUD.record(db, ChangeLogCRUD.ISLAND, [island.id])
         db.commit()
         db.refresh(island)
         return island
@@ -209,6 +821,7 @@ class IslandCRUD:
             if hasattr(db_obj, field):
                 setattr(db_obj, field, value)
         db_obj.updated_at = datetime.utcnow()
+        ChangeLogCRUD.record(db, ChangeLogCRUD.ISLAND, [db_obj.id])
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -217,6 +830,7 @@ class IslandCRUD:
     def delete(db: Session, island_id: int) -> bool:
         island = db.get(Island, island_id)
         if island:
+            ChangeLogCRUD.record(db, ChangeLogCRUD.ISLAND, [island.id], ChangeLogCRUD.DELETE)
             db.delete(island)
             db.commit()
             return True
@@ -227,6 +841,191 @@ class IslandCRUD:
         """Clear all islands"""
         statement = select(Island)
         islands = db.exec(statement).all()
+        ChangeLogCRUD.record(db, ChangeLogCRUD.ISLAND, [island.id for island in islands], ChangeLogCRUD.DELETE)
         for island in islands:
             db.delete(island)
-        db.commit()
\ No newline at end of file
+        db.commit()
+
+
+class ChangeLogCRUD:
+    TASK = "task"
+    DEPENDENCY = "dependency"
+    MODULE = "module"
+    ISLAND = "island"
+
+    UPSERT = "upsert"
+    DELETE = "delete"
+
+    CHUNK_SIZE = 500
+
+    @staticmethod
+    def record(db: Session, entity: str, entity_ids: Iterable[int], op: str = "upsert") -> None:
+        """Move the given entities to the head of the change feed. Keeps one row
+        per entity, so the feed stays proportional to the data, not the edits.
+        Runs inside the caller's transaction; does not commit."""
+        ids = list(dict.fromkeys(i for i in entity_ids if i is not None))
+        now = datetime.utcnow()
+        for start in range(0, len(ids), ChangeLogCRUD.CHUNK_SIZE):
+            chunk = ids[start:start + ChangeLogCRUD.CHUNK_SIZE]
+            db.exec(delete(ChangeLog).where(
+                ChangeLog.entity == entity, ChangeLog.entity_id.in_(chunk)
+            ))
+            db.exec(insert(ChangeLog), params=[
+                {"entity": entity, "entity_id": i, "op": op, "changed_at": now} for i in chunk
+            ])
+
+    @staticmethod
+    def current_cursor(db: Session) -> int:
+        return db.exec(select(func.max(ChangeLog.id))).one() or 0
+
+    @staticmethod
+    def version(db: Session, entity: str) -> int:
+        """Latest change sequence touching `entity`; changes on every CRUD write"""
+        return db.exec(select(func.max(ChangeLog.id)).where(ChangeLog.entity == entity)).one() or 0
+
+    @staticmethod
+    def read_since(db: Session, since: int, limit: int) -> Tuple[List[ChangeLog], bool]:
+        """Changes after `since` in sequence order, plus whether more remain"""
+        rows = db.exec(
+            select(ChangeLog).where(ChangeLog.id > since).order_by(ChangeLog.id).limit(limit + 1)
+        ).all()
+        return rows[:limit], len(rows) > limit
+
+
+class TaskAggregateCRUD:
+    """Per (module_id, status, urgency) counters behind the workload and module
+    dashboards. Writers call add/subtract with the affected task ids inside
+    their own transaction; reconcile rebuilds the table from scratch."""
+
+    NO_MODULE = -1
+    KEY = ("module_id", "status", "urgency")
+    SUMS = ("task_count", "estimated_hours", "actual_hours", "unestimated_count")
+    # Task fields whose change moves a task between buckets or changes its sums
+    TRACKED_FIELDS = {"module_id", "status", "urgency", "estimated_hours", "actual_hours"}
+    # Workload estimate for tasks without estimated_hours: P0=8h, P1=6h, P2=4h, P3=2h, P4=1h
+    DEFAULT_HOURS_BY_URGENCY = {0: 8.0, 1: 6.0, 2: 4.0, 3: 2.0, 4: 1.0}
+    DEFAULT_HOURS = 4.0
+
+    @staticmethod
+    def _grouped(task_ids: Union[List[int], Select, None], sign: int = 1) -> Select:
+        module = func.coalesce(Task.module_id, TaskAggregateCRUD.NO_MODULE)
+        signed = (lambda expr: expr) if sign > 0 else (lambda expr: -expr)
+        statement = select(
+            module,
+            Task.status,
+            Task.urgency,
+            signed(func.count()),
+            signed(func.coalesce(func.sum(Task.estimated_hours), 0.0)),
+            signed(func.coalesce(func.sum(Task.actual_hours), 0.0)),
+            signed(func.sum(case((Task.estimated_hours == 0, 1), else_=0))),
+        )
+        # SQLite needs a WHERE on INSERT ... SELECT ... ON CONFLICT, even a trivial one
+        statement = statement.where(Task.id.in_(task_ids) if task_ids is not None else Task.id.isnot(None))
+        return statement.group_by(module, Task.status, Task.urgency)
+
+    @staticmethod
+    def _apply(db: Session, task_ids: Union[List[int], Select], sign: int) -> None:
+        if isinstance(task_ids, list) and not task_ids:
+            return
+        dialect = db.get_bind().dialect.name
+        insert_fn = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        statement = insert_fn(TaskAggregate).from_select(
+            TaskAggregateCRUD.KEY + TaskAggregateCRUD.SUMS,
+            TaskAggregateCRUD._grouped(task_ids, sign)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=list(TaskAggregateCRUD.KEY),
+            set_={
+                name: getattr(TaskAggregate, name) + getattr(statement.excluded, name)
+                for name in TaskAggregateCRUD.SUMS
+            }
+        )
+        db.exec(statement)
+        if sign < 0:
+            db.exec(delete(TaskAggregate).where(TaskAggregate.task_count <= 0))
+
+    @staticmethod
+    def add(db: Session, task_ids: Union[List[int], Select]) -> None:
+        """Count the tasks' current rows in. Does not commit."""
+        TaskAggregateCRUD._apply(db, task_ids, 1)
+
+    @staticmethod
+    def subtract(db: Session, task_ids: Union[List[int], Select]) -> None:
+        """Count the tasks' current rows out; call before they change or go away.
+        Does not commit."""
+        TaskAggregateCRUD._apply(db, task_ids, -1)
+
+    @staticmethod
+    def reconcile(db: Session) -> Dict[str, int]:
+        """Rebuild every counter from the task table in one transaction. Returns
+        how many buckets were found to have drifted."""
+        before = {
+            (row.module_id, row.status, row.urgency): row
+            for row in db.exec(select(TaskAggregate)).all()
+        }
+        snapshot = {key: tuple(getattr(row, name) for name in TaskAggregateCRUD.SUMS)
+                    for key, row in before.items()}
+        db.expunge_all()
+        try:
+            db.exec(delete(TaskAggregate))
+            db.exec(insert(TaskAggregate).from_select(
+                TaskAggregateCRUD.KEY + TaskAggregateCRUD.SUMS,
+                TaskAggregateCRUD._grouped(None)
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        after = {
+            (row.module_id, row.status, row.urgency): tuple(getattr(row, name) for name in TaskAggregateCRUD.SUMS)
+            for row in db.exec(select(TaskAggregate)).all()
+        }
+        drifted = sum(
+            1 for key in set(snapshot) | set(after)
+            if not TaskAggregateCRUD._same_sums(snapshot.get(key), after.get(key))
+        )
+        return {"buckets": len(after), "drifted": drifted}
+
+    @staticmethod
+    def read_all(db: Session) -> List[TaskAggregate]:
+        return db.exec(select(TaskAggregate)).all()
+
+    @staticmethod
+    def estimate(urgency: int, estimated_hours: float) -> float:
+        """Workload hours for one task, falling back to the urgency default"""
+        if estimated_hours == 0.0:
+            return TaskAggregateCRUD.DEFAULT_HOURS_BY_URGENCY.get(urgency, TaskAggregateCRUD.DEFAULT_HOURS)
+        return estimated_hours
+
+    @staticmethod
+    def totals(db: Session) -> Dict[str, float]:
+        """Task count and workload hours over all tasks, read from the counters"""
+        task_count = 0
+        total_hours = 0.0
+        for row in TaskAggregateCRUD.read_all(db):
+            task_count += row.task_count
+            total_hours += row.estimated_hours
+            total_hours += row.unestimated_count * TaskAggregateCRUD.estimate(row.urgency, 0.0)
+        return {"task_count": task_count, "total_hours": total_hours}
+
+    @staticmethod
+    def by_module(db: Session) -> List[Dict[str, Any]]:
+        """Per-module task counts (total and by status) and hour sums"""
+        modules: Dict[int, Dict[str, Any]] = {}
+        for row in TaskAggregateCRUD.read_all(db):
+            stats = modules.setdefault(row.module_id, {
+                "module_id": None if row.module_id == TaskAggregateCRUD.NO_MODULE else row.module_id,
+                "task_count": 0, "by_status": {}, "estimated_hours": 0.0, "actual_hours": 0.0,
+            })
+            stats["task_count"] += row.task_count
+            status = row.status.value
+            stats["by_status"][status] = stats["by_status"].get(status, 0) + row.task_count
+            stats["estimated_hours"] += row.estimated_hours
+            stats["actual_hours"] += row.actual_hours
+        return list(modules.values())
+
+    @staticmethod
+    def _same_sums(a: Optional[Tuple], b: Optional[Tuple]) -> bool:
+        if a is None or b is None:
+            return a is b
+        return all(abs(x - y) < 1e-6 for x, y in zip(a, b))
@@ -1,6 +1,19 @@
 import os
+import weakref
+from dataclasses import dataclass, asdict
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlmodel import Session, create_engine
-from typing import Generator
+from typing import AsyncGenerator, Generator, Dict, Any
+
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    import aiosqlite  # noqa: F401
+    ASYNC_DB_AVAILABLE = True
+except ImportError:
+    ASYNC_DB_AVAILABLE = False
+    AsyncSession = None
 
 # Get the absolute path to the data directory
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -12,8 +25,246 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+@dataclass
+class EngineProfile:
+    """Engine tuning profile, configurable through TASKWALL_DB_* env vars.
+    PRAGMAs apply to SQLite only; pool settings apply to both backends."""
+    journal_mode: str = "WAL"        # WAL lets readers proceed while a writer commits
+    synchronous: str = "NORMAL"      # NORMAL is durable enough under WAL
+    cache_size: int = -64000         # negative = KiB, i.e. 64 MB page cache per connection
+    mmap_size: int = 268435456       # 256 MB memory-mapped I/O
+    busy_timeout: int = 5000         # ms to wait on a locked database instead of failing
+    foreign_keys: bool = False       # existing data was written without FK enforcement
+    workers: int = 1                 # uvicorn worker processes sharing the database
+    pool_budget: int = 20            # total connections across all workers
+    pool_size: int = 0               # 0 = derived from pool_budget / workers
+    max_overflow: int = -1           # -1 = same as pool_size
+    pool_timeout: int = 30
+    pool_pre_ping: bool = True       # PostgreSQL: test connections on checkout (server restarts, idle kills)
+    pool_recycle: int = 1800         # PostgreSQL: seconds before a pooled connection is replaced
+
+    @classmethod
+    def from_env(cls) -> "EngineProfile":
+        """Build a profile from environment variables"""
+        defaults = cls()
+        profile = cls(
+            journal_mode=os.getenv("TASKWALL_DB_JOURNAL_MODE", defaults.journal_mode).upper(),
+            synchronous=os.getenv("TASKWALL_DB_SYNCHRONOUS", defaults.synchronous).upper(),
+            cache_size=int(os.getenv("TASKWALL_DB_CACHE_SIZE", defaults.cache_size)),
+            mmap_size=int(os.getenv("TASKWALL_DB_MMAP_SIZE", defaults.mmap_size)),
+            busy_timeout=int(os.getenv("TASKWALL_DB_BUSY_TIMEOUT", defaults.busy_timeout)),
+            foreign_keys=os.getenv("TASKWALL_DB_FOREIGN_KEYS", "0").lower() in ("1", "true", "yes"),
+            workers=int(os.getenv("WEB_CONCURRENCY", os.getenv("UVICORN_WORKERS", defaults.workers))),
+            pool_budget=int(os.getenv("TASKWALL_DB_POOL_BUDGET", defaults.pool_budget)),
+            pool_size=int(os.getenv("TASKWALL_DB_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(os.getenv("TASKWALL_DB_MAX_OVERFLOW", defaults.max_overflow)),
+            pool_timeout=int(os.getenv("TASKWALL_DB_POOL_TIMEOUT", defaults.pool_timeout)),
+            pool_pre_ping=os.getenv("TASKWALL_DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes"),
+            pool_recycle=int(os.getenv("TASKWALL_DB_POOL_RECYCLE", defaults.pool_recycle)),
+        )
+        return profile
+
+    @property
+    def effective_pool_size(self) -> int:
+        """Per-process pool size: the connection budget split across workers"""
+        if self.pool_size > 0:
+            return self.pool_size
+        return max(2, self.pool_budget // max(1, self.workers))
+
+    @property
+    def effective_max_overflow(self) -> int:
+        if self.max_overflow >= 0:
+            return self.max_overflow
+        return self.effective_pool_size
+
+    def pragmas(self) -> Dict[str, Any]:
+        """PRAGMA statements applied to every new connection, in order"""
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size": self.cache_size,
+            "mmap_size": self.mmap_size,
+            "busy_timeout": self.busy_timeout,
+            "foreign_keys": "ON" if self.foreign_keys else "OFF",
+            "temp_store": "MEMORY",
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["effective_pool_size"] = self.effective_pool_size
+        data["effective_max_overflow"] = self.effective_max_overflow
+        return data
+
+
+# Profile each engine was built with, for reporting
+_engine_profiles: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_postgres(url: str) -> bool:
+    return url.startswith("postgresql") or url.startswith("postgres:")
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgresql:", "postgresql+psycopg2:", "postgres:")):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+
+def _sqlite_engine_kwargs(url: str, profile: EngineProfile) -> Dict[str, Any]:
+    is_memory = make_url(url).database in (None, "", ":memory:")
+    engine_kwargs: Dict[str, Any] = {
+        "connect_args": {
+            "check_same_thread": False,
+            # sqlite3's own lock wait, in seconds; mirrors busy_timeout
+            "timeout": profile.busy_timeout / 1000,
+        },
+    }
+    if not is_memory:
+        engine_kwargs.update(
+            pool_size=profile.effective_pool_size,
+            max_overflow=profile.effective_max_overflow,
+            pool_timeout=profile.pool_timeout,
+        )
+    return engine_kwargs
+
+
+def _postgres_engine_kwargs(profile: EngineProfile) -> Dict[str, Any]:
+    return {
+        "pool_size": profile.effective_pool_size,
+        "max_overflow": profile.effective_max_overflow,
+        "pool_timeout": profile.pool_timeout,
+        "pool_pre_ping": profile.pool_pre_ping,
+        "pool_recycle": profile.pool_recycle,
+    }
+
+
+def _normalize_postgres_url(url: str) -> str:
+    # SQLAlchemy no longer accepts the "postgres://" scheme many hosts hand out
+    if url.startswith("postgres:"):
+        return "postgresql:" + url.split(":", 1)[1]
+    return url
+
+
+def _install_pragmas(sync_engine, profile: EngineProfile) -> None:
+    pragmas = profile.pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL, profile: EngineProfile = None, **kwargs):
+    """Create an engine with the given tuning profile applied"""
+    profile = profile or EngineProfile.from_env()
+
+    if _is_postgres(url):
+        engine_kwargs = _postgres_engine_kwargs(profile)
+        engine_kwargs.update(kwargs)
+        new_engine = create_engine(_normalize_postgres_url(url), **engine_kwargs)
+    elif _is_sqlite(url):
+        engine_kwargs = _sqlite_engine_kwargs(url, profile)
+        engine_kwargs.update(kwargs)
+        new_engine = create_engine(url, **engine_kwargs)
+        _install_pragmas(new_engine, profile)
+    else:
+        return create_engine(url, **kwargs)
+
+    _engine_profiles[new_engine] = profile
+    return new_engine
+
+
+def create_async_db_engine(url: str = DATABASE_URL, profile: EngineProfile = None, **kwargs):
+    """Async counterpart of create_db_engine, sharing the same profile"""
+    if not ASYNC_DB_AVAILABLE:
+        raise RuntimeError("Async database support requires aiosqlite (or asyncpg for PostgreSQL)")
+    profile = profile or EngineProfile.from_env()
+    async_url = to_async_url(url)
+
+    if _is_postgres(url):
+        engine_kwargs = _postgres_engine_kwargs(profile)
+        engine_kwargs.update(kwargs)
+        new_engine = create_async_engine(async_url, **engine_kwargs)
+    elif _is_sqlite(url):
+        engine_kwargs = _sqlite_engine_kwargs(url, profile)
+        engine_kwargs.update(kwargs)
+        new_engine = create_async_engine(async_url, **engine_kwargs)
+        _install_pragmas(new_engine.sync_engine, profile)
+    else:
+        return create_async_engine(async_url, **kwargs)
+
+    _engine_profiles[new_engine.sync_engine] = profile
+    return new_engine
+
+
+def read_active_settings(target_engine=None) -> Dict[str, Any]:
+    """Read back the settings the database actually applied on a pooled connection"""
+    target_engine = target_engine or engine
+    profile = _engine_profiles.get(target_engine)
+    settings: Dict[str, Any] = {
+        "dialect": target_engine.dialect.name,
+        "url": target_engine.url.render_as_string(hide_password=True),
+        "pool": type(target_engine.pool).__name__,
+        "pool_status": target_engine.pool.status(),
+        "profile": profile.to_dict() if profile else None,
+    }
+    if target_engine.dialect.name == "sqlite":
+        active = {}
+        with target_engine.connect() as conn:
+            for name in ("journal_mode", "synchronous", "cache_size", "mmap_size",
+                         "busy_timeout", "foreign_keys", "temp_store"):
+                active[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        settings["pragmas"] = active
+    elif target_engine.dialect.name == "postgresql":
+        active = {}
+        with target_engine.connect() as conn:
+            for name in ("server_version", "max_connections", "shared_buffers",
+                         "work_mem", "statement_timeout"):
+                active[name] = conn.exec_driver_sql(f"SHOW {name}").scalar()
+        settings["server"] = active
+    return settings
+
+
+engine = create_db_engine(DATABASE_URL)
+
+
+def _create_default_async_engine():
+    if not ASYNC_DB_AVAILABLE:
+        return None
+    try:
+        return create_async_db_engine(DATABASE_URL)
+    except ImportError as e:
+        # e.g. PostgreSQL URL without asyncpg installed; async routes will report it
+        print(f"Async database engine unavailable: {e}")
+        return None
+
+
+async_engine = _create_default_async_engine()
 
 def get_db() -> Generator[Session, None, None]:
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def async_session_factory(target_engine):
+    # expire_on_commit=False: expired attributes cannot lazy-load outside the event loop's greenlet
+    return async_sessionmaker(target_engine, class_=AsyncSession, expire_on_commit=False)
+
+_async_sessions = async_session_factory(async_engine) if async_engine is not None else None
+
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    if _async_sessions is None:
+        raise RuntimeError("Async database support requires aiosqlite (or asyncpg for PostgreSQL)")
+    async with _async_sessions() as session:
+        yield session
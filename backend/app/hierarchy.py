@@ -0,0 +1,193 @@
+"""
+Task hierarchy queries backed by a closure table.
+
+`task_closure` holds one row per (ancestor, descendant) pair of the
+parent_id tree, including each task paired with itself at depth 0. On
+SQLite it is kept in sync by triggers, like task_fts and task_rtree, so
+creates, reparents (including the set-based detach in cascade deletes)
+and deletes on every write path are covered. A BEFORE UPDATE trigger
+rejects reparenting a task under its own descendant.
+
+Subtree, ancestor and rollup lookups are each a single indexed query.
+Where the triggers are not installed (e.g. PostgreSQL) the same functions
+fall back to recursive CTEs over parent_id.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, case, func, literal
+from sqlmodel import Session, select
+
+from .crud import TaskCRUD
+from .models import Task, TaskClosure, TaskStatus
+
+CLOSURE_TABLE = "task_closure"
+CYCLE_ERROR = "task hierarchy cycle"
+
+# Guards the backfill against cycles already present in old data
+MAX_DEPTH = 1000
+
+_TRIGGERS = {
+    f"{CLOSURE_TABLE}_ai": f"""
+        CREATE TRIGGER {CLOSURE_TABLE}_ai AFTER INSERT ON task BEGIN
+            INSERT INTO {CLOSURE_TABLE}(ancestor_id, descendant_id, depth)
+            VALUES (new.id, new.id, 0);
+            INSERT INTO {CLOSURE_TABLE}(ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, new.id, depth + 1 FROM {CLOSURE_TABLE}
+            WHERE descendant_id = new.parent_id;
+        END""",
+    f"{CLOSURE_TABLE}_bu": f"""
+        CREATE TRIGGER {CLOSURE_TABLE}_bu BEFORE UPDATE OF parent_id ON task
+        WHEN new.parent_id IS NOT NULL AND new.parent_id IN (
+            SELECT descendant_id FROM {CLOSURE_TABLE} WHERE ancestor_id = new.id
+        ) BEGIN
+            SELECT RAISE(ABORT, '{CYCLE_ERROR}');
+        END""",
+    f"{CLOSURE_TABLE}_au": f"""
+        CREATE TRIGGER {CLOSURE_TABLE}_au AFTER UPDATE OF parent_id ON task
+        WHEN old.parent_id IS NOT new.parent_id BEGIN
+            DELETE FROM {CLOSURE_TABLE}
+            WHERE descendant_id IN (
+                SELECT descendant_id FROM {CLOSURE_TABLE} WHERE ancestor_id = new.id
+            ) AND ancestor_id IN (
+                SELECT ancestor_id FROM {CLOSURE_TABLE}
+                WHERE descendant_id = new.id AND ancestor_id != new.id
+            );
+            INSERT INTO {CLOSURE_TABLE}(ancestor_id, descendant_id, depth)
+            SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+            FROM {CLOSURE_TABLE} a, {CLOSURE_TABLE} d
+            WHERE a.descendant_id = new.parent_id AND d.ancestor_id = new.id;
+        END""",
+    f"{CLOSURE_TABLE}_ad": f"""
+        CREATE TRIGGER {CLOSURE_TABLE}_ad AFTER DELETE ON task BEGIN
+            DELETE FROM {CLOSURE_TABLE} WHERE descendant_id = old.id OR ancestor_id = old.id;
+        END""",
+}
+
+
+def ensure_closure_table(engine) -> bool:
+    """Install the sync triggers if missing and rebuild the closure from
+    parent_id. Returns True when the closure was (re)built."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        installed = conn.exec_driver_sql(
+            "SELECT count(*) FROM sqlite_master WHERE type='trigger' AND name LIKE ?",
+            (f"{CLOSURE_TABLE}_%",)
+        ).scalar()
+        if installed == len(_TRIGGERS):
+            return False
+
+        for name, ddl in _TRIGGERS.items():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(f"DELETE FROM {CLOSURE_TABLE}")
+        conn.exec_driver_sql(
+            f"INSERT OR IGNORE INTO {CLOSURE_TABLE}(ancestor_id, descendant_id, depth) "
+            f"WITH RECURSIVE paths(ancestor_id, descendant_id, depth) AS ("
+            f"  SELECT id, id, 0 FROM task"
+            f"  UNION ALL"
+            f"  SELECT paths.ancestor_id, task.id, paths.depth + 1"
+            f"  FROM paths JOIN task ON task.parent_id = paths.descendant_id"
+            f"  WHERE paths.depth < {MAX_DEPTH}"
+            f") SELECT ancestor_id, descendant_id, min(depth) FROM paths "
+            f"GROUP BY ancestor_id, descendant_id"
+        )
+    return True
+
+
+def closure_available(db: Session) -> bool:
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    return db.connection().exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?", (f"{CLOSURE_TABLE}_ai",)
+    ).first() is not None
+
+
+def _descendants(db: Session, task_id: int):
+    """(descendant_id, depth) selectable for task_id's subtree, itself included"""
+    if closure_available(db):
+        return (
+            select(TaskClosure.descendant_id, TaskClosure.depth)
+            .where(TaskClosure.ancestor_id == task_id)
+            .subquery()
+        )
+    tree = select(Task.id.label("descendant_id"), literal(0, Integer).label("depth")) \
+        .where(Task.id == task_id).cte("subtree", recursive=True)
+    tree = tree.union_all(
+        select(Task.id, tree.c.depth + 1)
+        .where(Task.parent_id == tree.c.descendant_id, tree.c.depth < MAX_DEPTH)
+    )
+    return tree
+
+
+def _ancestors(db: Session, task_id: int):
+    """(ancestor_id, depth) selectable for task_id's ancestors, itself included"""
+    if closure_available(db):
+        return (
+            select(TaskClosure.ancestor_id, TaskClosure.depth)
+            .where(TaskClosure.descendant_id == task_id)
+            .subquery()
+        )
+    parent = Task.__table__.alias("parent")
+    chain = select(Task.id.label("ancestor_id"), Task.parent_id.label("next_id"),
+                   literal(0, Integer).label("depth")) \
+        .where(Task.id == task_id).cte("ancestors", recursive=True)
+    chain = chain.union_all(
+        select(parent.c.id, parent.c.parent_id, chain.c.depth + 1)
+        .where(parent.c.id == chain.c.next_id, chain.c.depth < MAX_DEPTH)
+    )
+    return chain
+
+
+def subtree(
+    db: Session,
+    task_id: int,
+    fields: Optional[List[str]] = None,
+    max_depth: Optional[int] = None
+) -> List[Any]:
+    """task_id and its descendants, breadth first (depth, then id). Rows are
+    the selected fields followed by depth."""
+    tree = _descendants(db, task_id)
+    statement = TaskCRUD.select_fields(fields).add_columns(tree.c.depth) \
+        .join(tree, tree.c.descendant_id == Task.id)
+    if max_depth is not None:
+        statement = statement.where(tree.c.depth <= max_depth)
+    return db.exec(statement.order_by(tree.c.depth, Task.id)).all()
+
+
+def ancestors(db: Session, task_id: int, fields: Optional[List[str]] = None) -> List[Any]:
+    """Ancestors of task_id from the root down to its parent; rows are the
+    selected fields followed by depth (distance from task_id)"""
+    chain = _ancestors(db, task_id)
+    statement = TaskCRUD.select_fields(fields).add_columns(chain.c.depth) \
+        .join(chain, chain.c.ancestor_id == Task.id) \
+        .where(chain.c.depth > 0)
+    return db.exec(statement.order_by(chain.c.depth.desc())).all()
+
+
+def rollup(db: Session, task_id: int) -> Optional[Dict[str, Any]]:
+    """Hour totals and completion over task_id's subtree, itself included.
+    Returns None when the task does not exist."""
+    tree = _descendants(db, task_id)
+    done = func.sum(case((Task.status == TaskStatus.DONE, 1), else_=0))
+    row = db.exec(
+        select(
+            func.count(Task.id).label("task_count"),
+            func.coalesce(func.sum(Task.estimated_hours), 0.0).label("estimated_hours"),
+            func.coalesce(func.sum(Task.actual_hours), 0.0).label("actual_hours"),
+            func.coalesce(done, 0).label("done_count"),
+            func.max(tree.c.depth).label("depth"),
+        ).join(tree, tree.c.descendant_id == Task.id)
+    ).one()
+    if not row.task_count:
+        return None
+    return {
+        "task_id": task_id,
+        "task_count": row.task_count,
+        "descendant_count": row.task_count - 1,
+        "depth": row.depth,
+        "estimated_hours": float(row.estimated_hours),
+        "actual_hours": float(row.actual_hours),
+        "done_count": row.done_count,
+        "done_ratio": row.done_count / row.task_count,
+    }
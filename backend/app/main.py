@@ -1,14 +1,16 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlmodel import SQLModel, Session
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
 from datetime import datetime, timedelta, date
 from typing import List
 
 from .deps import engine, get_db
+from .migrations import run_migrations
 from .models import Task, Module, History, Setting, TaskDependency, Island
-from .crud import TaskCRUD, ModuleCRUD, HistoryCRUD, SettingCRUD, TaskDependencyCRUD, IslandCRUD
+from .crud import TaskCRUD, ModuleCRUD, HistoryCRUD, SettingCRUD, TaskDependencyCRUD, IslandCRUD, ChangeLogCRUD, TaskAggregateCRUD
 from .schemas import (
     AIParseRequest, AIParseResponse,
     AIAssistantRequest, AIAssistantResponse,
@@ -20,18 +22,32 @@ from .schemas import (
     ThemeIslandRequest, ThemeIslandResponse,
     TaskUpdate, IslandRead
 )
-from .routers import ai_v3, tasks, modules, dependencies, settings, history, export_backup, ocr
+from .routers import ai_v3, tasks, modules, dependencies, settings, history, export_backup, ocr, database, changes
 from .utils.ai_client import ask, assistant_command, generate_subtasks, generate_weekly_report, find_similar_tasks, analyze_task_risks, create_theme_islands
 from .utils.backup import backup_service
-
-# Create database tables
-SQLModel.metadata.create_all(engine)
+from .utils.history_compaction import history_compaction_service
+from .ai.container import AI_PRELOAD, ai_services
+from .ai.log_writer import ai_log_writer
+from .utils.etag import conditional_list
+from .routers.changes import island_to_read
 
 app = FastAPI(title="TaskWall API", version="1.0.0")
 
+# Multi-worker deployments (e.g. PostgreSQL) should set TASKWALL_AUTO_MIGRATE=0
+# and run migrate_db.py once before starting the workers
+AUTO_MIGRATE = os.getenv("TASKWALL_AUTO_MIGRATE", "1").lower() in ("1", "true", "yes")
+
 # Start backup scheduler on startup
 @app.on_event("startup")
 async def startup_event():
+    # Create database tables and build any indexes missing from existing databases
+    if AUTO_MIGRATE:
+        run_migrations(engine)
+
+    # Load the vector store and embedding model now rather than on the first AI request
+    if AI_PRELOAD:
+        ai_services.warm_up()
+
     # Get backup interval from settings (default 4 hours)
     try:
         with Session(engine) as db:
@@ -42,9 +58,13 @@ async def startup_event():
         print(f"Failed to start backup scheduler: {e}")
         backup_service.start_scheduler(4)  # fallback to 4 hours
 
+    history_compaction_service.start_scheduler()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     backup_service.stop_scheduler()
+    history_compaction_service.stop_scheduler()
+    ai_log_writer.stop()
 
 # Configure CORS
 app.add_middleware(
@@ -53,6 +73,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "ETag"],
 )
 
 # Include routers
@@ -64,6 +85,8 @@ app.include_router(settings.router)
 app.include_router(history.router)
 app.include_router(export_backup.router)
 app.include_router(ocr.router)
+app.include_router(database.router)
+app.include_router(changes.router)
 
 # Mount static files for exports/backups
 app.mount("/static", StaticFiles(directory="data"), name="static")
@@ -79,7 +102,7 @@ async def root():
 
 # Legacy AI endpoints (for backward compatibility)
 @app.post("/api/ai/parse", response_model=AIParseResponse)
-async def ai_parse(request: AIParseRequest):
+def ai_parse(request: AIParseRequest):
     """AI解析任务（遗留接口）"""
     try:
         tasks = ask(request.prompt)
@@ -88,7 +111,7 @@ async def ai_parse(request: AIParseRequest):
         raise HTTPException(status_code=500, detail=f"AI parsing failed: {str(e)}")
 
 @app.post("/api/ai/assistant", response_model=AIAssistantResponse)
-async def ai_assistant(request: AIAssistantRequest):
+def ai_assistant(request: AIAssistantRequest):
     """AI助手（遗留接口）"""
     try:
         result = assistant_command(request.command, request.content, request.context)
@@ -101,7 +124,7 @@ async def ai_assistant(request: AIAssistantRequest):
         )
 
 @app.post("/api/ai/subtasks", response_model=AISubtaskResponse)
-async def ai_generate_subtasks(request: AISubtaskRequest):
+def ai_generate_subtasks(request: AISubtaskRequest):
     """AI生成子任务（遗留接口）"""
     try:
         subtasks = generate_subtasks(
@@ -118,7 +141,7 @@ async def ai_generate_subtasks(request: AISubtaskRequest):
         )
 
 @app.post("/api/ai/weekly-report", response_model=WeeklyReportResponse)
-async def ai_generate_weekly_report(request: WeeklyReportRequest, db: Session = Depends(get_db)):
+def ai_generate_weekly_report(request: WeeklyReportRequest, db: Session = Depends(get_db)):
     """AI生成周报（遗留接口）"""
     try:
         # Set default dates if not provided
@@ -158,34 +181,36 @@ async def ai_generate_weekly_report(request: WeeklyReportRequest, db: Session =
         )
 
 @app.post("/api/ai/workload-analysis", response_model=WorkloadAnalysisResponse)
-async def analyze_workload(request: WorkloadAnalysisRequest, db: Session = Depends(get_db)):
+def analyze_workload(request: WorkloadAnalysisRequest, db: Session = Depends(get_db)):
     """工作量分析（遗留接口）"""
     try:
         # Parse target date or use today
         target_date = datetime.fromisoformat(request.date).date() if request.date else date.today()
         
-        # Get all tasks and filter by due date
-        all_tasks = TaskCRUD.read_all(db)
-        daily_tasks = []
-        
-        for task in all_tasks:
-            # Include tasks due on target date or without due date (assume today)
-            if task.due_date is None or task.due_date.date() == target_date:
+        # Tasks due on the target date or without a due date (assume today),
+        # filtered in SQL and loaded as plain columns rather than full rows
+        day_start = datetime.combine(target_date, datetime.min.time())
+        rows = db.exec(
+            select(Task.id, Task.title, Task.description, Task.urgency,
+                   Task.estimated_hours, Task.due_date)
+            .where(or_(
+                Task.due_date.is_(None),
+                and_(Task.due_date >= day_start, Task.due_date < day_start + timedelta(days=1))
+            ))
+            .order_by(Task.id)
+        ).all()
+        daily_tasks = [
+            {
+                "id": row.id,
+                "title": row.title,
+                "description": row.description,
+                "urgency": row.urgency,
                 # Auto-estimate hours based on urgency if not set
-                estimated_hours = task.estimated_hours
-                if estimated_hours == 0.0:
-                    # Default estimates: P0=8h, P1=6h, P2=4h, P3=2h, P4=1h
-                    hour_map = {0: 8.0, 1: 6.0, 2: 4.0, 3: 2.0, 4: 1.0}
-                    estimated_hours = hour_map.get(task.urgency, 4.0)
-                
-                daily_tasks.append({
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "urgency": task.urgency,
-                    "estimated_hours": estimated_hours,
-                    "due_date": task.due_date.isoformat() if task.due_date else None
-                })
+                "estimated_hours": TaskAggregateCRUD.estimate(row.urgency, row.estimated_hours),
+                "due_date": row.due_date.isoformat() if row.due_date else None
+            }
+            for row in rows
+        ]
         
         # Calculate workload metrics
         total_hours = sum(task["estimated_hours"] for task in daily_tasks)
@@ -221,7 +246,7 @@ async def analyze_workload(request: WorkloadAnalysisRequest, db: Session = Depen
         )
 
 @app.post("/api/ai/similar-tasks", response_model=SimilarTaskResponse)
-async def find_similar_tasks_api(request: SimilarTaskRequest, db: Session = Depends(get_db)):
+def find_similar_tasks_api(request: SimilarTaskRequest, db: Session = Depends(get_db)):
     """相似任务检测（遗留接口）"""
     try:
         # Get all existing tasks
@@ -277,7 +302,7 @@ async def find_similar_tasks_api(request: SimilarTaskRequest, db: Session = Depe
         )
 
 @app.post("/api/ai/risk-analysis", response_model=RiskAnalysisResponse)
-async def analyze_risks(request: RiskAnalysisRequest, db: Session = Depends(get_db)):
+def analyze_risks(request: RiskAnalysisRequest, db: Session = Depends(get_db)):
     """风险分析（遗留接口）"""
     try:
         # Get tasks to analyze
@@ -318,7 +343,7 @@ async def analyze_risks(request: RiskAnalysisRequest, db: Session = Depends(get_
         )
 
 @app.post("/api/ai/theme-islands", response_model=ThemeIslandResponse)
-async def create_theme_islands_api(request: ThemeIslandRequest, db: Session = Depends(get_db)):
+def create_theme_islands_api(request: ThemeIslandRequest, db: Session = Depends(get_db)):
     """主题岛聚类（遗留接口）"""
     try:
         # Get tasks to analyze
@@ -394,6 +419,10 @@ async def create_theme_islands_api(request: ThemeIslandRequest, db: Session = De
 
 # Islands endpoint
 @app.get("/islands/", response_model=List[IslandRead])
-def get_islands(db: Session = Depends(get_db)):
+def get_islands(request: Request, response: Response, db: Session = Depends(get_db)):
     """获取所有主题岛"""
-    return IslandCRUD.read_all(db) 
\ No newline at end of file
+    not_modified, cache_headers = conditional_list(db, [ChangeLogCRUD.ISLAND], request)
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
+    return [island_to_read(island) for island in IslandCRUD.read_all(db)] 
\ No newline at end of file
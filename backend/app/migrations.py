@@ -0,0 +1,162 @@
+"""
+In-place schema migrations for existing TaskWall databases.
+
+`SQLModel.metadata.create_all` only creates missing tables; columns and
+indexes added to models later are never built on an existing file. The helpers here bring an
+existing database up to the declared schema without dropping any data.
+"""
+from typing import Dict, List
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateTable
+from sqlmodel import SQLModel, Session, select
+
+from . import models  # noqa: F401  (registers all tables on the metadata)
+from .crud import TaskAggregateCRUD
+from .hierarchy import ensure_closure_table
+from .search import ensure_bigram_index, ensure_fts_index
+from .spatial import ensure_spatial_index
+from .tags import ensure_tag_index
+
+
+def ensure_columns(engine) -> List[str]:
+    """Add model columns missing from existing tables. Only columns that are
+    nullable or have a server default can be added this way."""
+    added = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} " \
+                      f"{column.type.compile(dialect=conn.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+                elif not column.nullable:
+                    print(f"Cannot add required column {table.name}.{column.name} without a default")
+                    continue
+                conn.exec_driver_sql(ddl)
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+# Hot tables whose ids must never be reused, with the archive table holding their old rows
+ARCHIVED_ID_TABLES = {
+    "task": "archived_task",
+    "history": "archived_history",
+    "taskdependency": "archived_taskdependency",
+}
+
+
+def ensure_autoincrement(engine) -> List[str]:
+    """SQLite: rebuild tables declared with sqlite_autoincrement that were
+    created without it, so deleting the newest row no longer frees its id
+    for reuse. Then raise each table's sqlite_sequence above every id its
+    archive table holds. The rebuild drops the table's indexes and
+    triggers; run_migrations recreates them afterwards."""
+    if engine.dialect.name != "sqlite":
+        return []
+    rebuilt = []
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        foreign_keys = conn.exec_driver_sql("PRAGMA foreign_keys").scalar()
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        try:
+            for name in ARCHIVED_ID_TABLES:
+                table = SQLModel.metadata.tables[name]
+                sql = conn.exec_driver_sql(
+                    "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (name,)
+                ).scalar()
+                if sql is None or "AUTOINCREMENT" in sql.upper():
+                    continue
+                ddl = str(CreateTable(table).compile(dialect=conn.dialect)).strip()
+                ddl = ddl.replace(f"CREATE TABLE {name} (", f"CREATE TABLE _new_{name} (", 1)
+                existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({name})")}
+                columns = ", ".join(column.name for column in table.columns if column.name in existing)
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                try:
+                    conn.exec_driver_sql(ddl)
+                    conn.exec_driver_sql(f"INSERT INTO _new_{name} ({columns}) SELECT {columns} FROM {name}")
+                    conn.exec_driver_sql(f"DROP TABLE {name}")
+                    conn.exec_driver_sql(f"ALTER TABLE _new_{name} RENAME TO {name}")
+                    conn.exec_driver_sql("COMMIT")
+                except Exception:
+                    conn.exec_driver_sql("ROLLBACK")
+                    raise
+                rebuilt.append(name)
+
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            for name, archive in ARCHIVED_ID_TABLES.items():
+                high = conn.exec_driver_sql(
+                    f"SELECT max(coalesce((SELECT max(id) FROM {name}), 0), "
+                    f"coalesce((SELECT max(id) FROM {archive}), 0))"
+                ).scalar()
+                current = conn.exec_driver_sql("SELECT seq FROM sqlite_sequence WHERE name=?", (name,)).first()
+                if current is None:
+                    conn.exec_driver_sql("INSERT INTO sqlite_sequence(name, seq) VALUES (?, ?)", (name, high))
+                elif current[0] < high:
+                    conn.exec_driver_sql("UPDATE sqlite_sequence SET seq=? WHERE name=?", (high, name))
+            conn.exec_driver_sql("COMMIT")
+        finally:
+            conn.exec_driver_sql(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}")
+    return rebuilt
+
+
+def ensure_indexes(engine) -> List[str]:
+    """Create every index declared on the models that the database is missing"""
+    created = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    created.append(index.name)
+
+        # Refresh planner statistics so the new indexes are actually chosen
+        if created and conn.dialect.name in ("sqlite", "postgresql"):
+            conn.exec_driver_sql("ANALYZE")
+    return created
+
+
+def ensure_task_aggregates(engine) -> bool:
+    """Build the aggregate counters for a database that has tasks but no
+    counters yet (created before the table existed)"""
+    with Session(engine) as db:
+        if db.exec(select(models.TaskAggregate.id).limit(1)).first() is not None:
+            return False
+        if db.exec(select(models.Task.id).limit(1)).first() is None:
+            return False
+        TaskAggregateCRUD.reconcile(db)
+    return True
+
+
+def run_migrations(engine) -> Dict[str, List[str]]:
+    """Create missing tables, then add missing columns and indexes to existing ones"""
+    SQLModel.metadata.create_all(engine)
+    columns = ensure_columns(engine)
+    # Before the index and trigger steps, which restore what a rebuild drops
+    ensure_autoincrement(engine)
+    indexes = ensure_indexes(engine)
+    if ensure_fts_index(engine):
+        indexes.append("task_fts")
+    if ensure_bigram_index(engine):
+        indexes.append("task_fts_bigram")
+    if ensure_spatial_index(engine):
+        indexes.append("task_rtree")
+    if ensure_closure_table(engine):
+        indexes.append("task_closure")
+    if ensure_tag_index(engine):
+        indexes.append("task_tag")
+    if ensure_task_aggregates(engine):
+        indexes.append("taskaggregate")
+    return {"columns_added": columns, "indexes_created": indexes}
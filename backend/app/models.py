@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Optional, List
+from functools import lru_cache
+from typing import Any, Optional, List, Sequence, Tuple
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Column, DateTime, Index, Table
 from enum import Enum
 import json
 
@@ -31,7 +33,24 @@ class Module(SQLModel, table=True):
     color: str = "#FFE58F"  # default sticky yellow
     tasks: List["Task"] = Relationship(back_populates="module")
 
+@lru_cache(maxsize=4096)
+def decode_tags(raw: str) -> Tuple[Any, ...]:
+    """Decoded Task.tags; many tasks share the same few tag lists, so the
+    JSON is parsed once per distinct value"""
+    try:
+        tags = json.loads(raw)
+    except (TypeError, ValueError):
+        return ()
+    return tuple(tags) if isinstance(tags, list) else ()
+
 class Task(SQLModel, table=True):
+    __table_args__ = (
+        # Viewport fallback where the SQLite rtree module is unavailable (see spatial.py)
+        Index("ix_task_position", "position_x", "position_y"),
+        # Never reuse ids: archived tasks keep theirs and stay reachable by id (see archive.py)
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: str = ""
@@ -40,17 +59,17 @@ class Task(SQLModel, table=True):
     status: TaskStatus = Field(default=TaskStatus.TODO)
     
     # Classification and categorization 
-    module_id: Optional[int] = Field(default=None, foreign_key="module.id")
+    module_id: Optional[int] = Field(default=None, foreign_key="module.id", index=True)
     category: Optional[str] = Field(max_length=50)
     tags: Optional[str] = Field(default="")  # JSON string storing tags list
     
     # Hierarchical structure
-    parent_id: Optional[int] = Field(default=None, foreign_key="task.id")
+    parent_id: Optional[int] = Field(default=None, foreign_key="task.id", index=True)
     
     # Time information
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
-    deadline: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    deadline: Optional[datetime] = Field(default=None, index=True)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     due_date: Optional[datetime] = None  # Backwards compatibility
@@ -81,6 +100,9 @@ class Task(SQLModel, table=True):
     vector_id: Optional[str] = Field(max_length=100)  # ChromaDB vector ID
     last_vector_update: Optional[datetime] = None
 
+    # Optimistic concurrency: bumped on every write, checked by TaskCRUD.update
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+
     module: Optional[Module] = Relationship(back_populates="tasks")
     children: List["Task"] = Relationship(back_populates="parent", sa_relationship_kwargs={"cascade": "all, delete"})
     parent: Optional["Task"] = Relationship(back_populates="children", sa_relationship_kwargs={"remote_side": "Task.id"})
@@ -95,10 +117,7 @@ class Task(SQLModel, table=True):
     
     def get_tags(self) -> List[str]:
         """Get tags as a list"""
-        try:
-            return json.loads(self.tags) if self.tags else []
-        except:
-            return []
+        return list(decode_tags(self.tags)) if self.tags else []
     
     def set_tags(self, tags_list: List[str]):
         """Set tags from a list"""
@@ -128,7 +147,25 @@ class Task(SQLModel, table=True):
         return (self.last_vector_update is None or 
                 self.updated_at > self.last_vector_update)
 
+class TaskTag(SQLModel, table=True):
+    """One row per (task, tag) decoded from Task.tags, which stays the source
+    of truth. Maintained by triggers, see tags.py."""
+    __tablename__ = "task_tag"
+    __table_args__ = (
+        # Tag filters and facet counts: every task carrying a tag
+        Index("ix_task_tag_tag", "tag", "task_id"),
+    )
+
+    task_id: int = Field(primary_key=True)
+    tag: str = Field(primary_key=True)
+
 class History(SQLModel, table=True):
+    __table_args__ = (
+        # Backs HistoryCRUD.read_by_task (filter by task, newest first)
+        Index("ix_history_task_id_ts", "task_id", "ts"),
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     task_id: int = Field(foreign_key="task.id")
     field: str
@@ -136,10 +173,30 @@ class History(SQLModel, table=True):
     new_val: str
     ts: datetime = Field(default_factory=datetime.utcnow)
 
+class TaskClosure(SQLModel, table=True):
+    """Transitive closure of Task.parent_id: one row per (ancestor, descendant)
+    pair, including each task paired with itself at depth 0. Maintained by
+    triggers, see hierarchy.py."""
+    __tablename__ = "task_closure"
+    __table_args__ = (
+        # Ancestor lookups: every row with a given descendant, nearest first
+        Index("ix_task_closure_descendant", "descendant_id", "depth"),
+    )
+
+    ancestor_id: int = Field(primary_key=True)
+    descendant_id: int = Field(primary_key=True)
+    depth: int = 0
+
 class TaskDependency(SQLModel, table=True):
+    __table_args__ = (
+        # Backs the duplicate check in TaskDependencyCRUD.create and from_task_id lookups
+        Index("ix_taskdependency_from_to", "from_task_id", "to_task_id"),
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     from_task_id: int = Field(foreign_key="task.id")
-    to_task_id: int = Field(foreign_key="task.id")
+    to_task_id: int = Field(foreign_key="task.id", index=True)
     dependency_type: DependencyType = Field(default=DependencyType.BLOCKS)
     
     # AI inference related
@@ -218,7 +275,7 @@ class AILog(SQLModel, table=True):
     error_message: Optional[str] = None
     retry_count: int = 0
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
 class UserPreference(SQLModel, table=True):
     """User preferences for AI personalization"""
@@ -236,4 +293,57 @@ class TaskSimilarity(SQLModel, table=True):
     task2_id: int = Field(foreign_key="task.id")
     similarity_score: float = Field()
     similarity_type: str = Field(max_length=20)  # semantic, temporal, etc.
-    computed_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+class TaskAggregate(SQLModel, table=True):
+    """Task counts and hour sums per (module, status, urgency), maintained by
+    TaskCRUD in the same transaction as each task write"""
+    __table_args__ = (
+        Index("ix_taskaggregate_key", "module_id", "status", "urgency", unique=True),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    module_id: int = -1  # -1 means no module, so the unique key never holds NULL
+    status: TaskStatus = Field(default=TaskStatus.TODO)
+    urgency: int = 2
+    task_count: int = 0
+    estimated_hours: float = 0.0
+    actual_hours: float = 0.0
+    unestimated_count: int = 0  # tasks with estimated_hours == 0
+
+class ChangeLog(SQLModel, table=True):
+    """Change feed: latest change per entity, ordered by a monotonic sequence"""
+    __table_args__ = (
+        Index("ix_changelog_entity", "entity", "entity_id", unique=True),
+        # Backs per-entity max(id), the version behind list ETags
+        Index("ix_changelog_entity_seq", "entity", "id"),
+        # AUTOINCREMENT so a sequence number is never reused after its row is replaced
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)  # change sequence
+    entity: str = Field(max_length=20)  # task, dependency, module, island
+    entity_id: int
+    op: str = Field(max_length=10)  # upsert, delete
+    changed_at: datetime = Field(default_factory=datetime.utcnow)
+
+def _archive_table(source: Table, name: str, *indexes: Sequence[str]) -> Table:
+    """Cold-storage copy of a hot table: the same columns (all nullable except
+    the primary key, which keeps the original id), no foreign keys, plus the
+    time each row was archived. Derived from the model, so columns added to
+    it later reach the archive through migrations.ensure_columns."""
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key,
+               autoincrement=False, nullable=not column.primary_key)
+        for column in source.columns
+    ]
+    columns.append(Column("archived_at", DateTime, nullable=False, index=True))
+    table_indexes = [Index(f"ix_{name}_{'_'.join(cols)}", *cols) for cols in indexes]
+    return Table(name, SQLModel.metadata, *columns, *table_indexes)
+
+# Cold storage for finished tasks moved out of the hot tables, see archive.py
+archived_task = _archive_table(Task.__table__, "archived_task")
+archived_history = _archive_table(History.__table__, "archived_history", ("task_id", "ts"))
+archived_dependency = _archive_table(
+    TaskDependency.__table__, "archived_taskdependency", ("from_task_id",), ("to_task_id",)
+)
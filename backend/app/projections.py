@@ -0,0 +1,50 @@
+"""
+Sparse fieldsets for task list responses.
+
+A `fields=` query parameter is either the name of a projection below or a
+comma-separated list of TaskRead fields. Only those columns are selected in
+SQL and rows are returned as plain dicts, skipping ORM object construction
+and Pydantic validation of columns the client never reads.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .schemas import TaskRead
+
+TASK_READ_FIELDS = tuple(TaskRead.model_fields)
+
+TASK_PROJECTIONS = {
+    # What the canvas needs to draw a sticky note
+    "canvas": ("id", "title", "position_x", "position_y", "urgency", "module_id", "island_id"),
+    # Same columns as ExportService.export_to_json
+    "export": ("id", "title", "description", "urgency", "module_id", "parent_id",
+               "created_at", "updated_at", "ocr_src"),
+    "full": TASK_READ_FIELDS,
+}
+
+
+def resolve_task_fields(spec: Optional[str]) -> Optional[List[str]]:
+    """Turn a fields= value into an ordered column list that always includes
+    `id`. Returns None when no projection was requested; raises ValueError
+    for unknown projection or field names."""
+    if spec is None or not spec.strip():
+        return None
+    spec = spec.strip()
+    if spec in TASK_PROJECTIONS:
+        fields = list(TASK_PROJECTIONS[spec])
+    else:
+        fields = list(dict.fromkeys(f.strip() for f in spec.split(",") if f.strip()))
+        unknown = [f for f in fields if f not in TASK_READ_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Unknown task field(s): {', '.join(unknown)}. "
+                f"Use a projection ({', '.join(TASK_PROJECTIONS)}) or TaskRead fields."
+            )
+    if "id" not in fields:
+        fields.insert(0, "id")
+    return fields
+
+
+def project_rows(rows: Iterable[Sequence[Any]], fields: List[str]) -> List[Dict[str, Any]]:
+    """Map selected row tuples to dicts keyed by field name. Rows may carry
+    trailing helper columns (e.g. a sort key), which are dropped."""
+    return [dict(zip(fields, row)) for row in rows]
@@ -26,15 +26,17 @@ from ..schemas import (
 )
 from ..ai import AIServiceAggregator
 from ..ai.base import AIError
+from ..ai.container import ai_services
+from ..ai.log_writer import ai_log_writer
 
 router = APIRouter(prefix="/api/ai/v3", tags=["AI Services v3.0"])
 
 def get_ai_aggregator(db: Session = Depends(get_db)) -> AIServiceAggregator:
-    """获取AI服务聚合器实例"""
-    return AIServiceAggregator(db)
+    """获取绑定当前请求会话的AI服务聚合器（缓存、向量库与模型在进程内共享）"""
+    return ai_services.aggregator(db)
 
 @router.post("/parse-task", response_model=AITaskParseResponse)
-async def parse_natural_language_task(
+def parse_natural_language_task(
     request: AITaskParseRequest,
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
@@ -76,7 +78,7 @@ async def parse_natural_language_task(
         )
 
 @router.post("/analyze-task", response_model=AITaskAnalysisResponse)
-async def analyze_existing_task(
+def analyze_existing_task(
     request: AITaskAnalysisRequest,
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
@@ -120,7 +122,7 @@ async def analyze_existing_task(
         )
 
 @router.post("/batch-process", response_model=AIBatchProcessResponse)
-async def batch_process_tasks(
+def batch_process_tasks(
     request: AIBatchProcessRequest,
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
@@ -167,7 +169,7 @@ async def batch_process_tasks(
         )
 
 @router.post("/optimize-tasks", response_model=AIOptimizeTasksResponse)
-async def optimize_task_list(
+def optimize_task_list(
     request: AIOptimizeTasksRequest,
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
@@ -211,7 +213,7 @@ async def optimize_task_list(
         )
 
 @router.get("/insights", response_model=AIInsightsResponse)
-async def get_ai_insights(
+def get_ai_insights(
     user_id: str = "default",
     time_frame: str = "this_week",
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
@@ -254,7 +256,7 @@ async def get_ai_insights(
         )
 
 @router.get("/status", response_model=AIServiceStatusResponse)
-async def get_ai_service_status(
+def get_ai_service_status(
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
     """
@@ -285,7 +287,7 @@ async def get_ai_service_status(
 # 单独的AI服务端点（为高级用户提供）
 
 @router.post("/nlp/parse")
-async def nlp_parse_only(
+def nlp_parse_only(
     text: str,
     context: Dict[str, Any] = {},
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
@@ -301,7 +303,7 @@ async def nlp_parse_only(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/classification/classify")
-async def classify_task_only(
+def classify_task_only(
     task_content: str,
     user_context: Dict[str, Any] = {},
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
@@ -317,7 +319,7 @@ async def classify_task_only(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/similarity/find")
-async def find_similar_tasks_only(
+def find_similar_tasks_only(
     task_content: str,
     threshold: float = 0.7,
     max_results: int = 5,
@@ -335,7 +337,7 @@ async def find_similar_tasks_only(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/priority/assess")
-async def assess_priority_only(
+def assess_priority_only(
     task_data: Dict[str, Any],
     context: Dict[str, Any] = {},
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
@@ -351,7 +353,7 @@ async def assess_priority_only(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/dependency/detect")
-async def detect_dependencies_only(
+def detect_dependencies_only(
     tasks: List[Dict[str, Any]],
     context: Dict[str, Any] = {},
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
@@ -368,14 +370,14 @@ async def detect_dependencies_only(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/workload/analyze")
-async def analyze_workload_only(
+def analyze_workload_only(
     request: dict,
     db: Session = Depends(get_db),
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
     """分析工作负载 - 支持基于日期的任务分析"""
     try:
-        from ..crud import TaskCRUD
+        from ..crud import TaskCRUD, TaskAggregateCRUD
         from datetime import datetime, date as date_type
         
         # 解析请求中的日期
@@ -385,34 +387,22 @@ async def analyze_workload_only(
         else:
             target_date = date_type.today()
         
-        # 从数据库获取所有任务
-        all_tasks = TaskCRUD.read_all(db)
+        # 总量来自统计计数表（O(模块数) 行），任务明细只取前10个
+        totals = TaskAggregateCRUD.totals(db)
+        total_hours = totals["total_hours"]
         
-        # 转换为字典格式用于分析
         tasks_data = []
-        total_hours = 0.0
-        
-        for task in all_tasks:
-            # 估算任务时间（如果没有设置）
-            estimated_hours = task.estimated_hours
-            if estimated_hours == 0.0:
-                # 基于优先级的默认估算: P0=8h, P1=6h, P2=4h, P3=2h, P4=1h
-                hour_map = {0: 8.0, 1: 6.0, 2: 4.0, 3: 2.0, 4: 1.0}
-                estimated_hours = hour_map.get(task.urgency, 4.0)
-            
-            task_dict = {
+        for task in TaskCRUD.read_all(db, limit=10):
+            tasks_data.append({
                 "id": task.id,
                 "title": task.title,
                 "description": task.description,
                 "urgency": task.urgency,
-                "estimated_hours": estimated_hours,
+                "estimated_hours": TaskAggregateCRUD.estimate(task.urgency, task.estimated_hours),
                 "module_id": task.module_id,
                 "created_at": task.created_at.isoformat(),
                 "updated_at": task.updated_at.isoformat()
-            }
-            
-            tasks_data.append(task_dict)
-            total_hours += estimated_hours
+            })
         
         # 计算工作负载指标
         capacity_hours = 8.0  # 每日工作容量
@@ -432,8 +422,8 @@ async def analyze_workload_only(
             "total_hours": round(total_hours, 2),
             "workload_percentage": round(workload_percentage, 2),
             "capacity_hours": capacity_hours,
-            "tasks_count": len(tasks_data),
-            "tasks": tasks_data[:10],  # 只返回前10个任务以避免响应过大
+            "tasks_count": totals["task_count"],
+            "tasks": tasks_data,  # 只返回前10个任务以避免响应过大
             "conflict_level": conflict_level,
             "analysis_date": target_date.isoformat()
         }
@@ -451,10 +441,20 @@ async def analyze_workload_only(
             "error": str(e)
         }
 
+@router.get("/cache/stats")
+def get_ai_cache_stats():
+    """获取AI结果缓存统计：各操作类型的命中/未命中/淘汰次数及进程内缓存占用"""
+    return ai_services.cache.get_stats()
+
+@router.get("/logging/stats")
+def get_ai_logging_stats():
+    """获取AI日志后台写入统计：采样丢弃、负载下去除载荷、队列满丢弃及批量写入次数"""
+    return ai_log_writer.stats()
+
 # 向量数据库管理端点
 
 @router.get("/vector-db/stats")
-async def get_vector_db_stats(
+def get_vector_db_stats(
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
     """获取向量数据库统计信息"""
@@ -465,7 +465,7 @@ async def get_vector_db_stats(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/vector-db/update-all")
-async def update_all_vectors(
+def update_all_vectors(
     force: bool = False,
     aggregator: AIServiceAggregator = Depends(get_ai_aggregator)
 ):
@@ -482,7 +482,7 @@ async def update_all_vectors(
 # AI反馈和学习端点
 
 @router.post("/feedback")
-async def submit_ai_feedback(
+def submit_ai_feedback(
     operation_type: str,
     input_data: Dict[str, Any],
     ai_result: Dict[str, Any],
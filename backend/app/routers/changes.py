@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session, select
+from typing import Optional
+
+from ..deps import get_db
+from ..models import Task, TaskDependency, Module, Island
+from ..crud import ChangeLogCRUD
+from ..schemas import ChangeFeedResponse, IslandRead
+
+router = APIRouter(prefix="/api/changes", tags=["changes"])
+
+ENTITY_MODELS = {
+    ChangeLogCRUD.TASK: Task,
+    ChangeLogCRUD.DEPENDENCY: TaskDependency,
+    ChangeLogCRUD.MODULE: Module,
+    ChangeLogCRUD.ISLAND: Island,
+}
+
+def island_to_read(island: Island) -> IslandRead:
+    return IslandRead(
+        id=island.id,
+        name=island.name,
+        color=island.color,
+        size=island.size,
+        keywords=island.get_keywords(),
+        created_at=island.created_at,
+        updated_at=island.updated_at
+    )
+
+@router.get("/", response_model=ChangeFeedResponse)
+def get_changes(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """获取自游标以来的增量变更
+
+    不带 since 时只返回当前游标：客户端应先取游标，再全量加载列表，
+    之后用 ?since=<cursor> 轮询增量。删除以 deleted 中的 id 列表表示。
+    """
+    if since is None:
+        return ChangeFeedResponse(cursor=ChangeLogCRUD.current_cursor(db))
+
+    changes, has_more = ChangeLogCRUD.read_since(db, since, limit)
+    upserts = {entity: [] for entity in ENTITY_MODELS}
+    deleted = {entity: [] for entity in ENTITY_MODELS}
+    for change in changes:
+        target = deleted if change.op == ChangeLogCRUD.DELETE else upserts
+        target.setdefault(change.entity, []).append(change.entity_id)
+
+    rows = {}
+    for entity, model in ENTITY_MODELS.items():
+        ids = upserts.get(entity)
+        found = db.exec(select(model).where(model.id.in_(ids))).all() if ids else []
+        rows[entity] = found
+        # Rows removed outside the CRUD layer still surface as tombstones
+        missing = set(ids or []) - {row.id for row in found}
+        deleted[entity].extend(sorted(missing))
+
+    return ChangeFeedResponse(
+        cursor=changes[-1].id if changes else since,
+        has_more=has_more,
+        tasks=rows[ChangeLogCRUD.TASK],
+        dependencies=rows[ChangeLogCRUD.DEPENDENCY],
+        modules=rows[ChangeLogCRUD.MODULE],
+        islands=[island_to_read(island) for island in rows[ChangeLogCRUD.ISLAND]],
+        deleted={entity: ids for entity, ids in deleted.items() if ids}
+    )
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from ..deps import engine, get_db, read_active_settings
+from ..crud import TaskAggregateCRUD
+from ..archive import archive_tasks
+from ..utils.history_compaction import compact_history, history_compaction_service
+
+router = APIRouter(prefix="/api/db", tags=["database"])
+
+@router.get("/profile")
+def get_engine_profile():
+    """获取数据库引擎当前生效的配置"""
+    return read_active_settings(engine)
+
+@router.post("/reconcile-aggregates")
+def reconcile_aggregates(db: Session = Depends(get_db)):
+    """按任务表重建统计计数表，返回桶数量与发生偏差的桶数量"""
+    return TaskAggregateCRUD.reconcile(db)
+
+@router.post("/compact-history")
+def compact_task_history(db: Session = Depends(get_db)):
+    """立即执行一次历史记录压缩（合并短时间内的连续修改并执行保留策略），返回回收的空间"""
+    report = compact_history(db, history_compaction_service.policy)
+    history_compaction_service.last_report = report
+    return report
+
+@router.post("/archive")
+def archive_finished_tasks(
+    older_than_days: int = Query(90, ge=0, description="完成（或归档状态）超过该天数的任务才会移入归档表"),
+    db: Session = Depends(get_db)
+):
+    """把已完成/已归档且超过指定天数的任务连同历史记录、依赖移入归档表，返回移动的数量"""
+    return archive_tasks(db, older_than_days)
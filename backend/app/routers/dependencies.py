@@ -1,25 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List
 
-from ..deps import get_db
+from ..deps import get_async_db, AsyncSession
 from ..models import TaskDependency, Task
-from ..crud import TaskDependencyCRUD, TaskCRUD
+from ..crud import ChangeLogCRUD
+from ..async_crud import AsyncTaskDependencyCRUD, AsyncTaskCRUD
 from ..schemas import TaskDependencyCreate, TaskDependencyRead
+from ..projections import project_rows
+from ..utils.etag import async_conditional_list
+from ..utils.fast_json import FastJSONResponse
 
 router = APIRouter(prefix="/api/dependencies", tags=["dependencies"])
 
+DEPENDENCY_READ_FIELDS = list(TaskDependencyRead.model_fields)
+
 @router.get("/", response_model=List[TaskDependencyRead])
-def get_dependencies(db: Session = Depends(get_db)):
+async def get_dependencies(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """获取所有任务依赖关系"""
-    return TaskDependencyCRUD.read_all(db)
+    not_modified, cache_headers = await async_conditional_list(db, [ChangeLogCRUD.DEPENDENCY], request)
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
+    rows = await AsyncTaskDependencyCRUD.read_all(db, DEPENDENCY_READ_FIELDS)
+    return FastJSONResponse(project_rows(rows, DEPENDENCY_READ_FIELDS), headers=dict(response.headers))
 
 @router.post("/", response_model=TaskDependencyRead)
-def create_dependency(dependency: TaskDependencyCreate, db: Session = Depends(get_db)):
+async def create_dependency(dependency: TaskDependencyCreate, db: AsyncSession = Depends(get_async_db)):
     """创建任务依赖关系"""
     # Check if both tasks exist
-    from_task = TaskCRUD.read(db, dependency.from_task_id)
-    to_task = TaskCRUD.read(db, dependency.to_task_id)
+    from_task = await AsyncTaskCRUD.read(db, dependency.from_task_id)
+    to_task = await AsyncTaskCRUD.read(db, dependency.to_task_id)
     
     if not from_task:
         raise HTTPException(status_code=404, detail=f"From task {dependency.from_task_id} not found")
@@ -31,22 +41,22 @@ def create_dependency(dependency: TaskDependencyCreate, db: Session = Depends(ge
         raise HTTPException(status_code=400, detail="Cannot create dependency to self")
     
     dependency_obj = TaskDependency(**dependency.dict())
-    return TaskDependencyCRUD.create(db, dependency_obj)
+    return await AsyncTaskDependencyCRUD.create(db, dependency_obj)
 
 @router.get("/task/{task_id}", response_model=List[TaskDependencyRead])
-def get_task_dependencies(task_id: int, db: Session = Depends(get_db)):
+async def get_task_dependencies(task_id: int, db: AsyncSession = Depends(get_async_db)):
     """获取特定任务的所有依赖关系"""
     # Verify task exists
-    task = TaskCRUD.read(db, task_id)
+    task = await AsyncTaskCRUD.read(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return TaskDependencyCRUD.read_by_task(db, task_id)
+    return await AsyncTaskDependencyCRUD.read_by_task(db, task_id)
 
 @router.delete("/{from_task_id}/{to_task_id}")
-def delete_dependency(from_task_id: int, to_task_id: int, db: Session = Depends(get_db)):
+async def delete_dependency(from_task_id: int, to_task_id: int, db: AsyncSession = Depends(get_async_db)):
     """删除任务依赖关系"""
-    dependency = TaskDependencyCRUD.read_by_tasks(db, from_task_id, to_task_id)
+    dependency = await AsyncTaskDependencyCRUD.read_by_tasks(db, from_task_id, to_task_id)
     if not dependency:
         raise HTTPException(status_code=404, detail="Dependency not found")
-    TaskDependencyCRUD.delete(db, dependency)
-    return {"message": "Dependency deleted successfully"} 
\ No newline at end of file
+    await AsyncTaskDependencyCRUD.delete(db, dependency)
+    return {"message": "Dependency deleted successfully"}
\ No newline at end of file
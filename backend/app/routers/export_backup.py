@@ -1,8 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
 from sqlmodel import Session
-import tempfile
-import os
+import json
 
 from ..deps import get_db
 from ..crud import SettingCRUD
@@ -13,40 +12,28 @@ router = APIRouter(prefix="/api", tags=["export", "backup"])
 
 # Export endpoints
 @router.get("/export/json")
-def export_json(db: Session = Depends(get_db)):
+def export_json(
+    include_archived: bool = Query(False, description="同时导出已归档任务"),
+    db: Session = Depends(get_db)
+):
     """导出数据为JSON格式"""
     try:
-        export_service = ExportService(db)
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            export_service.export_to_json(f.name)
-            
-            # Read the file content
-            with open(f.name, 'r') as read_file:
-                content = read_file.read()
-            
-            # Clean up
-            os.unlink(f.name)
-            
-            return JSONResponse(content={"data": content, "filename": "taskwall_export.json"})
+        export_service = ExportService(db, include_archived)
+        content = json.dumps(export_service.export_to_json(), ensure_ascii=False, indent=2)
+        return JSONResponse(content={"data": content, "filename": "taskwall_export.json"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
 @router.get("/export/markdown")
-def export_markdown(db: Session = Depends(get_db)):
+def export_markdown(
+    include_archived: bool = Query(False, description="同时导出已归档任务"),
+    db: Session = Depends(get_db)
+):
     """导出数据为Markdown格式"""
     try:
-        export_service = ExportService(db)
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-            export_service.export_to_markdown(f.name)
-            
-            # Read the file content
-            with open(f.name, 'r') as read_file:
-                content = read_file.read()
-            
-            # Clean up
-            os.unlink(f.name)
-            
-            return JSONResponse(content={"data": content, "filename": "taskwall_export.md"})
+        export_service = ExportService(db, include_archived)
+        content = export_service.export_to_markdown()
+        return JSONResponse(content={"data": content, "filename": "taskwall_export.md"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
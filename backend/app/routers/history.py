@@ -1,18 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlmodel import Session
-from typing import List
+from typing import List, Optional
 
 from ..deps import get_db
 from ..crud import HistoryCRUD, TaskCRUD
+from ..archive import read_archived, read_archived_history
 from ..schemas import HistoryRead
 
 router = APIRouter(prefix="/api/tasks", tags=["history"])
 
 @router.get("/{task_id}/history", response_model=List[HistoryRead])
-async def read_task_history(task_id: int, db: Session = Depends(get_db)):
-    """获取任务历史记录"""
+def read_task_history(
+    task_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    field: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """获取任务历史记录（按时间倒序）
+
+    - field: 只返回这些字段的变更，可重复传入
+    - limit/cursor: 游标分页，下一页游标在 X-Next-Cursor 响应头中；不传则返回全部
+    """
     # Verify task exists
     task = TaskCRUD.read(db, task_id)
     if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return HistoryCRUD.read_by_task(db, task_id) 
\ No newline at end of file
+        # Archived tasks keep their history in the archive (not paginated)
+        if read_archived(db, task_id) is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        response.headers["X-Archived"] = "true"
+        return read_archived_history(db, task_id, field)[:limit]
+    if limit is None and cursor is None:
+        return HistoryCRUD.read_by_task(db, task_id, field)
+    try:
+        entries, next_cursor = HistoryCRUD.read_page(db, task_id, limit or 100, cursor, field)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return entries
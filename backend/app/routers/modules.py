@@ -1,38 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List
 
-from ..deps import get_db
+from ..deps import get_async_db, AsyncSession
 from ..models import Module
-from ..crud import ModuleCRUD
-from ..schemas import ModuleCreate, ModuleRead
+from ..crud import ChangeLogCRUD
+from ..async_crud import AsyncModuleCRUD, AsyncTaskAggregateCRUD
+from ..schemas import ModuleCreate, ModuleRead, ModuleStats
+from ..utils.etag import async_conditional_list
 
 router = APIRouter(prefix="/api/modules", tags=["modules"])
 
 @router.post("/", response_model=ModuleRead)
-async def create_module(module_in: ModuleCreate, db: Session = Depends(get_db)):
+async def create_module(module_in: ModuleCreate, db: AsyncSession = Depends(get_async_db)):
     """创建新模块"""
     module = Module(**module_in.dict())
-    return ModuleCRUD.create(db, module)
+    return await AsyncModuleCRUD.create(db, module)
 
 @router.get("/", response_model=List[ModuleRead])
-async def read_modules(db: Session = Depends(get_db)):
+async def read_modules(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """获取所有模块"""
-    return ModuleCRUD.read_all(db)
+    not_modified, cache_headers = await async_conditional_list(db, [ChangeLogCRUD.MODULE], request)
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
+    return await AsyncModuleCRUD.read_all(db)
+
+@router.get("/stats", response_model=List[ModuleStats])
+async def read_module_stats(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """获取各模块的任务数量（按状态）与工时合计，供侧边栏使用，读取统计计数表"""
+    not_modified, cache_headers = await async_conditional_list(
+        db, [ChangeLogCRUD.TASK, ChangeLogCRUD.MODULE], request
+    )
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
+    return await AsyncTaskAggregateCRUD.by_module(db)
 
 @router.get("/{module_id}", response_model=ModuleRead)
-async def read_module(module_id: int, db: Session = Depends(get_db)):
+async def read_module(module_id: int, db: AsyncSession = Depends(get_async_db)):
     """获取单个模块"""
-    module = ModuleCRUD.read(db, module_id)
+    module = await AsyncModuleCRUD.read(db, module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     return module
 
 @router.delete("/{module_id}")
-async def delete_module(module_id: int, db: Session = Depends(get_db)):
+async def delete_module(module_id: int, db: AsyncSession = Depends(get_async_db)):
     """删除模块"""
-    module = ModuleCRUD.read(db, module_id)
+    module = await AsyncModuleCRUD.read(db, module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
-    ModuleCRUD.delete(db, module)
+    await AsyncModuleCRUD.delete(db, module)
     return {"message": "Module deleted successfully"} 
\ No newline at end of file
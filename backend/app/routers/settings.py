@@ -9,12 +9,12 @@ from ..schemas import SettingCreate, SettingRead
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 @router.get("/", response_model=List[SettingRead])
-async def read_settings(db: Session = Depends(get_db)):
+def read_settings(db: Session = Depends(get_db)):
     """获取所有设置"""
     return SettingCRUD.read_all(db)
 
 @router.get("/{key}", response_model=SettingRead)
-async def read_setting(key: str, db: Session = Depends(get_db)):
+def read_setting(key: str, db: Session = Depends(get_db)):
     """获取特定设置"""
     setting = SettingCRUD.read(db, key)
     if not setting:
@@ -22,7 +22,7 @@ async def read_setting(key: str, db: Session = Depends(get_db)):
     return setting
 
 @router.put("/{key}", response_model=SettingRead)  
-async def create_or_update_setting(key: str, request: dict, db: Session = Depends(get_db)):
+def create_or_update_setting(key: str, request: dict, db: Session = Depends(get_db)):
     """创建或更新设置"""
     value = request.get("value", "")
     setting = SettingCRUD.create_or_update(db, key, value)
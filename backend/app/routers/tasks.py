@@ -1,17 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
-from ..deps import get_db
+from ..deps import get_db, get_async_db, AsyncSession
 from ..models import Task
-from ..crud import TaskCRUD
-from ..schemas import TaskCreate, TaskRead, TaskUpdate
+from ..crud import TaskCRUD, ChangeLogCRUD, TaskVersionConflict
+from ..async_crud import AsyncTaskCRUD
+from ..schemas import (
+    TaskCreate, TaskRead, TaskUpdate, TaskBulkRequest, TaskBulkResponse,
+    TaskPositionBatch, TaskPositionBatchResponse, TaskSearchResult, ViewportCellsResponse,
+    TaskRollup, TagCount
+)
+from ..hierarchy import CYCLE_ERROR, subtree as hierarchy_subtree, ancestors as hierarchy_ancestors, rollup as hierarchy_rollup
+from ..projections import TASK_READ_FIELDS, resolve_task_fields, project_rows
+from ..search import search_tasks as fts_search_tasks
+from ..spatial import tasks_in_viewport, viewport_cells
+from ..tags import tag_counts, tasks_with_tags
+from ..archive import read_archived, restore_task, search_archived
+from ..utils.etag import conditional_list, async_conditional_list
+from ..utils.fast_json import FastJSONResponse, dumps
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+FIELDS_QUERY = Query(
+    None,
+    description="投影：canvas / export / full，或逗号分隔的 TaskRead 字段名"
+)
+
+
+def check_viewport(x0: float, y0: float, x1: float, y1: float) -> None:
+    if x1 < x0 or y1 < y0:
+        raise HTTPException(status_code=400, detail="Viewport requires x0 <= x1 and y0 <= y1")
+
+
+async def apply_update(db: AsyncSession, task: Task, task_update: TaskUpdate) -> Dict[str, Any]:
+    try:
+        return await AsyncTaskCRUD.update(db, task, task_update)
+    except TaskVersionConflict as e:
+        current = await AsyncTaskCRUD.read_version(db, e.task_id)
+        raise HTTPException(status_code=409, detail={
+            "message": "Task was modified by someone else, reload it and retry",
+            "expected_version": e.expected,
+            "current_version": current,
+        })
+    except IntegrityError as e:
+        if CYCLE_ERROR in str(e.orig):
+            raise HTTPException(status_code=400, detail="Cannot move a task under itself or its own subtask")
+        raise
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Requested columns; without fields= every TaskRead field, in schema order"""
+    try:
+        return resolve_task_fields(fields) or list(TASK_READ_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=TaskRead)
-async def create_task(task_in: TaskCreate, db: Session = Depends(get_db)):
+async def create_task(task_in: TaskCreate, db: AsyncSession = Depends(get_async_db)):
     """创建新任务"""
     task_data = task_in.dict()
     # 设置创建时间
@@ -19,25 +72,229 @@ async def create_task(task_in: TaskCreate, db: Session = Depends(get_db)):
     task_data['updated_at'] = datetime.now()
     
     task = Task(**task_data)
-    return TaskCRUD.create(db, task)
+    return await AsyncTaskCRUD.create(db, task)
 
 @router.get("/", response_model=List[TaskRead])
-async def get_tasks(db: Session = Depends(get_db)):
-    """获取所有任务"""
-    return TaskCRUD.read_all(db)
+async def get_tasks(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", pattern="^(id|updated_at)$"),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """获取任务列表
+
+    不带 limit/cursor 时返回全部任务；带上时按键集分页，
+    下一页游标通过 X-Next-Cursor 响应头返回，总数通过 X-Total-Count 返回。
+    支持 If-None-Match 条件请求，未变化时返回 304。
+    只查询所需列（fields 投影，默认为 TaskRead 全部字段），由行元组直接
+    构建字典并快速编码，不经过逐行的 TaskRead 校验。
+    """
+    columns = parse_fields(fields)
+    not_modified, cache_headers = await async_conditional_list(db, [ChangeLogCRUD.TASK], request)
+    if not_modified:
+        return not_modified
+
+    response.headers.update(cache_headers)
+    response.headers["X-Total-Count"] = str(await AsyncTaskCRUD.count(db))
+    if limit is None and cursor is None:
+        tasks = await AsyncTaskCRUD.read_all(db, fields=columns)
+    else:
+        try:
+            tasks, next_cursor = await AsyncTaskCRUD.read_page(
+                db, limit or DEFAULT_PAGE_SIZE, cursor, order_by, columns
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
+    return FastJSONResponse(project_rows(tasks, columns), headers=dict(response.headers))
+
+@router.get("/stream")
+def stream_tasks(
+    request: Request,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_db)
+):
+    """流式返回全部任务（JSON数组），供画布加载大看板时使用"""
+    columns = parse_fields(fields)
+    not_modified, cache_headers = conditional_list(db, [ChangeLogCRUD.TASK], request)
+    if not_modified:
+        return not_modified
+
+    bind = db.get_bind()
+    total = TaskCRUD.count(db)
+
+    def generate():
+        # The request session may be closed before streaming finishes, so use our own
+        with Session(bind) as stream_db:
+            yield b"["
+            first = True
+            for task in TaskCRUD.iter_all(stream_db, STREAM_BATCH_SIZE, columns):
+                if not first:
+                    yield b","
+                first = False
+                yield dumps(dict(zip(columns, task)))
+            yield b"]"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/json",
+        headers={**cache_headers, "X-Total-Count": str(total)}
+    )
+
+@router.get("/tags", response_model=List[TagCount])
+def get_tag_facets(
+    request: Request,
+    within: Optional[List[str]] = Query(None, description="只统计同时带有这些标签的任务，可重复传入"),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    """标签分面统计：每个标签下的任务数，按数量降序，由标签索引支撑"""
+    not_modified, cache_headers = conditional_list(db, [ChangeLogCRUD.TASK], request)
+    if not_modified:
+        return not_modified
+
+    return FastJSONResponse(tag_counts(db, within or (), limit), headers=cache_headers)
+
+@router.get("/by-tag", response_model=List[TaskRead])
+def get_tasks_by_tag(
+    request: Request,
+    tag: List[str] = Query(..., description="标签，可重复传入"),
+    match: str = Query("all", pattern="^(all|any)$", description="all：带有全部标签；any：带有任一标签"),
+    fields: Optional[str] = FIELDS_QUERY,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    """按标签筛选任务（按 id 排序），由标签索引支撑"""
+    columns = parse_fields(fields)
+    not_modified, cache_headers = conditional_list(db, [ChangeLogCRUD.TASK], request)
+    if not_modified:
+        return not_modified
+
+    rows = tasks_with_tags(db, tag, match == "all", columns, limit)
+    return FastJSONResponse(project_rows(rows, columns), headers=cache_headers)
+
+@router.get("/viewport", response_model=List[TaskRead])
+def get_viewport_tasks(
+    request: Request,
+    x0: float,
+    y0: float,
+    x1: float,
+    y1: float,
+    fields: Optional[str] = Query("canvas", description="投影：canvas / export / full，或逗号分隔的 TaskRead 字段名"),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    """获取视口 [x0, x1] × [y0, y1] 内的任务（默认 canvas 投影），由空间索引支撑
+
+    坐标为便签锚点，前端应按便签尺寸适当扩大视口。
+    """
+    check_viewport(x0, y0, x1, y1)
+    columns = parse_fields(fields)
+    not_modified, cache_headers = conditional_list(db, [ChangeLogCRUD.TASK], request)
+    if not_modified:
+        return not_modified
+
+    rows = tasks_in_viewport(db, x0, y0, x1, y1, columns, limit)
+    return FastJSONResponse(project_rows(rows, columns), headers=cache_headers)
+
+@router.get("/viewport/cells", response_model=ViewportCellsResponse)
+def get_viewport_cells(
+    request: Request,
+    x0: float,
+    y0: float,
+    x1: float,
+    y1: float,
+    cell_size: float = Query(..., gt=0),
+    db: Session = Depends(get_db)
+):
+    """缩小视图用：按 cell_size 网格统计视口内各格的便签数量"""
+    check_viewport(x0, y0, x1, y1)
+    not_modified, cache_headers = conditional_list(db, [ChangeLogCRUD.TASK], request)
+    if not_modified:
+        return not_modified
+
+    cells = viewport_cells(db, x0, y0, x1, y1, cell_size)
+    content = {"cell_size": cell_size, "total": sum(c["count"] for c in cells), "cells": cells}
+    return FastJSONResponse(content, headers=cache_headers)
+
+@router.post("/bulk", response_model=TaskBulkResponse)
+async def bulk_tasks(request: TaskBulkRequest, db: AsyncSession = Depends(get_async_db)):
+    """批量创建/更新/删除任务（单个事务）"""
+    now = datetime.now()
+    creates = []
+    for task_in in request.create:
+        task_data = task_in.dict()
+        task_data['created_at'] = now
+        task_data['updated_at'] = now
+        creates.append(Task(**task_data))
+    updates = [
+        (item.id, item.dict(exclude_unset=True, exclude={"id"}))
+        for item in request.update
+    ]
+    
+    try:
+        results = await AsyncTaskCRUD.bulk_apply(db, creates, updates, request.delete)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk operation failed: {str(e)}")
+    
+    def succeeded(op: str) -> int:
+        return sum(1 for r in results if r["op"] == op and r["success"])
+    
+    return TaskBulkResponse(
+        results=results,
+        created=succeeded("create"),
+        updated=succeeded("update"),
+        deleted=succeeded("delete")
+    )
+
+@router.patch("/positions", response_model=TaskPositionBatchResponse)
+async def update_task_positions(batch: TaskPositionBatch, db: AsyncSession = Depends(get_async_db)):
+    """批量更新任务位置（多选拖拽一次提交）"""
+    try:
+        updated = await AsyncTaskCRUD.update_positions(db, batch.positions, batch.record_history)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Position update failed: {str(e)}")
+    updated_set = set(updated)
+    return TaskPositionBatchResponse(
+        updated=updated,
+        missing=[task_id for task_id in batch.positions if task_id not in updated_set]
+    )
 
 @router.get("/{task_id}", response_model=TaskRead)
-async def get_task(task_id: int, db: Session = Depends(get_db)):
-    """获取单个任务"""
-    task = TaskCRUD.read(db, task_id)
+async def get_task(task_id: int, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """获取单个任务（已归档的任务同样可按 id 查到，响应头 X-Archived: true）"""
+    task = await AsyncTaskCRUD.read(db, task_id)
     if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+        task = await db.run_sync(read_archived, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        response.headers["X-Archived"] = "true"
     return task
 
-@router.put("/{task_id}", response_model=TaskRead)
-async def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db)):
-    """更新任务"""
-    task = TaskCRUD.read(db, task_id)
+@router.post("/{task_id}/restore", response_model=TaskRead)
+async def restore_archived_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    """把已归档的任务（连同历史记录和仍有效的依赖）移回工作区"""
+    try:
+        restored = await db.run_sync(restore_task, task_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not restored:
+        raise HTTPException(status_code=404, detail="Archived task not found")
+    return await AsyncTaskCRUD.read(db, task_id)
+
+@router.put("/{task_id}", response_model=Dict[str, Any])
+async def update_task(task_id: int, task_update: TaskUpdate, db: AsyncSession = Depends(get_async_db)):
+    """更新任务
+
+    请求体可带 version（客户端读取到的版本号），版本不一致返回 409；
+    成功时只返回 id、新的 version、updated_at 以及值发生变化的字段
+    """
+    task = await AsyncTaskCRUD.read(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -45,12 +302,12 @@ async def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depen
     if not hasattr(task_update, 'updated_at') or task_update.updated_at is None:
         task_update.updated_at = datetime.now()
     
-    return TaskCRUD.update(db, task, task_update)
+    return await apply_update(db, task, task_update)
 
-@router.patch("/{task_id}", response_model=TaskRead)
-async def patch_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db)):
-    """部分更新任务"""
-    task = TaskCRUD.read(db, task_id)
+@router.patch("/{task_id}", response_model=Dict[str, Any])
+async def patch_task(task_id: int, task_update: TaskUpdate, db: AsyncSession = Depends(get_async_db)):
+    """部分更新任务（版本校验与返回内容同 PUT）"""
+    task = await AsyncTaskCRUD.read(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -61,16 +318,59 @@ async def patch_task(task_id: int, task_update: TaskUpdate, db: Session = Depend
     # 重新创建TaskUpdate对象
     final_update = TaskUpdate(**task_update_dict)
     
-    return TaskCRUD.update(db, task, final_update)
+    return await apply_update(db, task, final_update)
+
+@router.get("/{task_id}/subtree", response_model=List[TaskRead])
+def get_task_subtree(
+    task_id: int,
+    fields: Optional[str] = FIELDS_QUERY,
+    max_depth: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db)
+):
+    """获取任务及其全部子孙任务（按层级广度优先），每项附带 depth"""
+    columns = parse_fields(fields)
+    rows = hierarchy_subtree(db, task_id, columns, max_depth)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return FastJSONResponse(project_rows(rows, columns + ["depth"]))
+
+@router.get("/{task_id}/ancestors", response_model=List[TaskRead])
+def get_task_ancestors(
+    task_id: int,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_db)
+):
+    """获取任务的祖先链（从根到父任务），每项附带与该任务的距离 depth"""
+    if not TaskCRUD.read(db, task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    columns = parse_fields(fields)
+    rows = hierarchy_ancestors(db, task_id, columns)
+    return FastJSONResponse(project_rows(rows, columns + ["depth"]))
+
+@router.get("/{task_id}/rollup", response_model=TaskRollup)
+def get_task_rollup(task_id: int, db: Session = Depends(get_db)):
+    """子树汇总：预估/实际工时合计与完成比例（含任务本身）"""
+    result = hierarchy_rollup(db, task_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return result
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: int, db: Session = Depends(get_db)):
-    """删除任务"""
-    task = TaskCRUD.read(db, task_id)
+async def delete_task(
+    task_id: int,
+    subtree: bool = Query(False, description="同时删除全部子孙任务"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """删除任务；subtree=true 时连同整棵子任务树一起删除，否则子任务仅解除父子关系"""
+    task = await AsyncTaskCRUD.read(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    TaskCRUD.delete(db, task)
+    if subtree:
+        deleted = await AsyncTaskCRUD.delete_subtree(db, task)
+        return {"message": "Task subtree deleted successfully", "deleted": deleted}
+
+    await AsyncTaskCRUD.delete(db, task)
     return {"message": "Task deleted successfully"}
 
 @router.patch("/{task_id}/position")
@@ -78,26 +378,31 @@ async def update_task_position(
     task_id: int, 
     x: float, 
     y: float, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新任务位置"""
-    task = TaskCRUD.read(db, task_id)
-    if not task:
+    if not await AsyncTaskCRUD.update_positions(db, {task_id: (x, y)}):
         raise HTTPException(status_code=404, detail="Task not found")
     
-    position_update = TaskUpdate(x_position=x, y_position=y, updated_at=datetime.now())
-    return TaskCRUD.update(db, task, position_update)
-
-@router.get("/search/{query}")
-async def search_tasks(query: str, db: Session = Depends(get_db)):
-    """搜索任务"""
-    all_tasks = TaskCRUD.read_all(db)
-    query_lower = query.lower()
-    
-    matching_tasks = []
-    for task in all_tasks:
-        if (query_lower in task.title.lower() or 
-            (task.description and query_lower in task.description.lower())):
-            matching_tasks.append(task)
-    
-    return matching_tasks 
\ No newline at end of file
+    return await AsyncTaskCRUD.read(db, task_id)
+
+@router.get("/search/{query}", response_model=List[TaskSearchResult])
+def search_tasks(
+    query: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    include_archived: bool = Query(False, description="同时搜索已归档任务（排在工作区结果之后）"),
+    db: Session = Depends(get_db)
+):
+    """搜索任务（全文索引，按相关度排序）"""
+    results = []
+    for task, rank, snippets in fts_search_tasks(db, query, limit):
+        result = TaskSearchResult.model_validate(task)
+        result.rank = rank
+        result.snippets = snippets
+        results.append(result)
+    if include_archived and len(results) < limit:
+        for task in search_archived(db, query, limit - len(results)):
+            result = TaskSearchResult.model_validate(task)
+            result.archived = True
+            results.append(result)
+    return results
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
 from pydantic import BaseModel
 from .models import PriorityLevel, TaskStatus
@@ -16,6 +16,13 @@ class ModuleRead(ModuleBase):
     class Config:
         from_attributes = True
 
+class ModuleStats(BaseModel):
+    module_id: Optional[int] = None  # None groups tasks without a module
+    task_count: int
+    by_status: Dict[str, int]
+    estimated_hours: float
+    actual_hours: float
+
 class TaskBase(BaseModel):
     title: str
     description: str = ""
@@ -52,10 +59,42 @@ class TaskRead(TaskBase):
     created_at: datetime
     updated_at: datetime
     ocr_src: Optional[str] = None
+    version: int = 1
 
     class Config:
         from_attributes = True
 
+class TaskSearchResult(TaskRead):
+    rank: float = 0.0  # bm25 score, lower is more relevant
+    snippets: Dict[str, str] = {}  # highlighted title/description fragments
+    archived: bool = False  # found in the archive (include_archived=true)
+
+class TaskRollup(BaseModel):
+    task_id: int
+    task_count: int  # the task itself plus all descendants
+    descendant_count: int
+    depth: int  # deepest descendant level below the task
+    estimated_hours: float
+    actual_hours: float
+    done_count: int
+    done_ratio: float
+
+class TagCount(BaseModel):
+    tag: str
+    count: int  # tasks carrying the tag
+
+class ViewportCell(BaseModel):
+    cx: int  # grid column, counted from x0
+    cy: int  # grid row, counted from y0
+    count: int
+    x: float  # mean position of the notes in the cell
+    y: float
+
+class ViewportCellsResponse(BaseModel):
+    cell_size: float
+    total: int
+    cells: List[ViewportCell]
+
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -84,6 +123,37 @@ class TaskUpdate(BaseModel):
     island_override: Optional[int] = None
     vector_id: Optional[str] = None
     last_vector_update: Optional[datetime] = None
+    version: Optional[int] = None  # expected current version; a mismatch is a conflict
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBulkRequest(BaseModel):
+    create: List[TaskCreate] = []
+    update: List[TaskBulkUpdateItem] = []
+    delete: List[int] = []
+
+class TaskBulkItemResult(BaseModel):
+    op: str  # 'create', 'update', 'delete'
+    index: int  # position in the request array for this op
+    id: Optional[int] = None
+    success: bool = True
+    error: Optional[str] = None
+    version: Optional[int] = None  # new version of an updated task
+
+class TaskBulkResponse(BaseModel):
+    results: List[TaskBulkItemResult]
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+class TaskPositionBatch(BaseModel):
+    positions: Dict[int, Tuple[float, float]]  # task id -> (x, y)
+    record_history: bool = False  # one "position" History row per moved task
+
+class TaskPositionBatchResponse(BaseModel):
+    updated: List[int]
+    missing: List[int] = []
 
 class HistoryRead(BaseModel):
     id: int
@@ -217,6 +287,16 @@ class IslandRead(IslandBase):
     class Config:
         from_attributes = True
 
+# Change feed schemas
+class ChangeFeedResponse(BaseModel):
+    cursor: int  # pass back as ?since= on the next poll
+    has_more: bool = False
+    tasks: List[TaskRead] = []
+    dependencies: List[TaskDependencyRead] = []
+    modules: List[ModuleRead] = []
+    islands: List[IslandRead] = []
+    deleted: Dict[str, List[int]] = {}  # entity -> ids removed since the cursor
+
 # AI v3.0 Schemas
 class AITaskParseRequest(BaseModel):
     text: str
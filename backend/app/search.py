@@ -0,0 +1,294 @@
+"""
+Full-text task search backed by an SQLite FTS5 index.
+
+`task_fts` is an external-content FTS5 table over task.title, description
+and tags, kept in sync by triggers so every write path (ORM, bulk and
+set-based statements) is covered. The default trigram tokenizer matches
+arbitrary substrings, which works for Chinese text that has no word
+boundaries, but it cannot match terms shorter than three characters.
+
+Most Chinese words are two characters, so `task_fts_bigram` indexes the
+same columns as overlapping character bigrams ("用户登录" -> "用户 户登
+登录") under unicode61. A query containing two-character terms runs there,
+each term becoming the phrase of its bigrams, which is a substring match
+with bm25 ranking; its highlights are computed here rather than by
+snippet(). The bigrams are produced in SQL by the sync triggers, joining
+against the `task_fts_seq` numbers table, so only the first
+BIGRAM_MAX_CHARS characters of a field are covered. Only one-character
+terms still fall back to LIKE.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, text
+from sqlmodel import Session, select
+
+from .models import Task
+
+FTS_TABLE = "task_fts"
+FTS_TOKENIZER = os.getenv("TASKWALL_FTS_TOKENIZER", "trigram")
+
+# bm25 column weights: title matches outrank description, then tags
+BM25_WEIGHTS = (10.0, 4.0, 2.0)
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+SNIPPET_TOKENS = 16
+
+_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON task BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description, tags)
+            VALUES (new.id, new.title, new.description, new.tags);
+        END""",
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags)
+            VALUES ('delete', old.id, old.title, old.description, old.tags);
+        END""",
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, description, tags ON task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags)
+            VALUES ('delete', old.id, old.title, old.description, old.tags);
+            INSERT INTO {FTS_TABLE}(rowid, title, description, tags)
+            VALUES (new.id, new.title, new.description, new.tags);
+        END""",
+}
+
+
+BIGRAM_TABLE = "task_fts_bigram"
+SEQ_TABLE = "task_fts_seq"
+BIGRAM_MAX_CHARS = 10000
+
+
+def _bigrams_sql(column: str) -> str:
+    """Space-separated overlapping character pairs of column"""
+    return (
+        f"(SELECT group_concat(substr({column}, n, 2), ' ') FROM {SEQ_TABLE} "
+        f"WHERE n < length({column}))"
+    )
+
+
+def _bigram_insert(prefix: str) -> str:
+    return (
+        f"INSERT INTO {BIGRAM_TABLE}(rowid, title, description, tags) VALUES ("
+        f"{prefix}.id, {_bigrams_sql(prefix + '.title')}, "
+        f"{_bigrams_sql(prefix + '.description')}, {_bigrams_sql(prefix + '.tags')})"
+    )
+
+
+_BIGRAM_TRIGGERS = {
+    f"{BIGRAM_TABLE}_ai": f"""
+        CREATE TRIGGER {BIGRAM_TABLE}_ai AFTER INSERT ON task BEGIN
+            {_bigram_insert('new')};
+        END""",
+    f"{BIGRAM_TABLE}_ad": f"""
+        CREATE TRIGGER {BIGRAM_TABLE}_ad AFTER DELETE ON task BEGIN
+            DELETE FROM {BIGRAM_TABLE} WHERE rowid = old.id;
+        END""",
+    f"{BIGRAM_TABLE}_au": f"""
+        CREATE TRIGGER {BIGRAM_TABLE}_au AFTER UPDATE OF title, description, tags ON task BEGIN
+            DELETE FROM {BIGRAM_TABLE} WHERE rowid = old.id;
+            {_bigram_insert('new')};
+        END""",
+}
+
+
+def _tokenizer_supported(conn, tokenizer: str) -> bool:
+    try:
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='{tokenizer}')"
+        )
+        conn.exec_driver_sql("DROP TABLE temp._fts_probe")
+        return True
+    except Exception:
+        return False
+
+
+def ensure_fts_index(engine) -> bool:
+    """Create the FTS table and sync triggers if missing, populating it from
+    existing tasks. Returns True when the table was (re)built."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,)
+        ).first()
+        if exists:
+            return False
+
+        tokenizer = FTS_TOKENIZER
+        if not _tokenizer_supported(conn, tokenizer):
+            # trigram needs SQLite >= 3.34; unicode61 still handles latin text
+            tokenizer = "unicode61"
+            if not _tokenizer_supported(conn, tokenizer):
+                print("FTS5 not available, task search will use LIKE scans")
+                return False
+
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"title, description, tags, content='task', content_rowid='id', "
+            f"tokenize='{tokenizer}')"
+        )
+        for name, ddl in _TRIGGERS.items():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def ensure_bigram_index(engine) -> bool:
+    """Create the bigram FTS table, its numbers table and sync triggers if
+    missing, populating it from existing tasks. Returns True when the table
+    was (re)built."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        installed = conn.exec_driver_sql(
+            "SELECT count(*) FROM sqlite_master WHERE type='trigger' AND name IN (?, ?, ?)",
+            tuple(_BIGRAM_TRIGGERS)
+        ).scalar()
+        if installed == len(_BIGRAM_TRIGGERS):
+            return False
+        if not _tokenizer_supported(conn, "unicode61"):
+            return False
+
+        conn.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {SEQ_TABLE}(n INTEGER PRIMARY KEY)")
+        conn.exec_driver_sql(
+            f"INSERT OR IGNORE INTO {SEQ_TABLE}(n) "
+            f"WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {BIGRAM_MAX_CHARS}) "
+            f"SELECT n FROM seq"
+        )
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {BIGRAM_TABLE} "
+            f"USING fts5(title, description, tags, tokenize='unicode61')"
+        )
+        for name, ddl in _BIGRAM_TRIGGERS.items():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(f"DELETE FROM {BIGRAM_TABLE}")
+        conn.exec_driver_sql(
+            f"INSERT INTO {BIGRAM_TABLE}(rowid, title, description, tags) "
+            f"SELECT task.id, {_bigrams_sql('task.title')}, {_bigrams_sql('task.description')}, "
+            f"{_bigrams_sql('task.tags')} FROM task"
+        )
+    return True
+
+
+def fts_available(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    return db.connection().exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,)
+    ).first() is not None
+
+
+def _fts_tokenizer(db: Session) -> str:
+    sql = db.connection().exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE name=?", (FTS_TABLE,)
+    ).scalar() or ""
+    return "trigram" if "trigram" in sql else "unicode61"
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Quote each whitespace-separated term so user input is never parsed as
+    FTS syntax; terms are ANDed. Returns None for an empty query."""
+    terms = [t for t in query.split() if t]
+    if not terms:
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def bigram_available(db: Session) -> bool:
+    return db.connection().exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?", (f"{BIGRAM_TABLE}_ai",)
+    ).first() is not None
+
+
+def build_bigram_query(query: str) -> Optional[str]:
+    """Each term as the quoted phrase of its character bigrams; terms are ANDed"""
+    terms = [t for t in query.split() if t]
+    if not terms:
+        return None
+    phrases = []
+    for term in terms:
+        bigrams = " ".join(term[i:i + 2] for i in range(len(term) - 1))
+        phrases.append('"' + bigrams.replace('"', '""') + '"')
+    return " ".join(phrases)
+
+
+def highlight(value: Optional[str], terms: List[str], width: int = SNIPPET_TOKENS * 4) -> str:
+    """snippet()-like fragment of value around the first matching term, with
+    every match wrapped in SNIPPET_OPEN/SNIPPET_CLOSE"""
+    if not value:
+        return ""
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    match = pattern.search(value)
+    start = max(0, match.start() - width // 4) if match else 0
+    end = min(len(value), start + width)
+    fragment = pattern.sub(lambda m: SNIPPET_OPEN + m.group() + SNIPPET_CLOSE, value[start:end])
+    return ("…" if start else "") + fragment + ("…" if end < len(value) else "")
+
+
+def _like_search(db: Session, query: str, limit: int) -> List[Tuple[Task, float, Dict[str, Any]]]:
+    conditions = []
+    for term in query.split():
+        pattern = f"%{term}%"
+        conditions.append(or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+    statement = select(Task).where(*conditions).order_by(Task.updated_at.desc()).limit(limit)
+    return [(task, 0.0, {}) for task in db.exec(statement).all()]
+
+
+def search_tasks(db: Session, query: str, limit: int = 50) -> List[Tuple[Task, float, Dict[str, Any]]]:
+    """Return (task, rank, snippets) ordered by relevance. Lower rank is better
+    (bm25 convention); snippets hold highlighted title/description fragments."""
+    query = query.strip()
+    if not query:
+        return []
+
+    if not fts_available(db):
+        return _like_search(db, query, limit)
+    terms = query.split()
+    table, match = FTS_TABLE, build_match_query(query)
+    if _fts_tokenizer(db) == "trigram" and any(len(term) < 3 for term in terms):
+        # The trigram index cannot match terms shorter than three characters
+        if min(len(term) for term in terms) < 2 or not bigram_available(db):
+            return _like_search(db, query, limit)
+        table, match = BIGRAM_TABLE, build_bigram_query(query)
+
+    w_title, w_desc, w_tags = BM25_WEIGHTS
+    rows = db.connection().execute(
+        text(
+            f"SELECT rowid, bm25({table}, :w_title, :w_desc, :w_tags) AS rank, "
+            f"snippet({table}, 0, :open, :close, '…', :tokens) AS title_snippet, "
+            f"snippet({table}, 1, :open, :close, '…', :tokens) AS description_snippet "
+            f"FROM {table} WHERE {table} MATCH :match "
+            f"ORDER BY rank LIMIT :limit"
+        ),
+        {
+            "w_title": w_title, "w_desc": w_desc, "w_tags": w_tags,
+            "open": SNIPPET_OPEN, "close": SNIPPET_CLOSE, "tokens": SNIPPET_TOKENS,
+            "match": match, "limit": limit,
+        },
+    ).all()
+    if not rows:
+        return []
+
+    tasks = {
+        task.id: task
+        for task in db.exec(select(Task).where(Task.id.in_([row.rowid for row in rows]))).all()
+    }
+    results = []
+    for row in rows:
+        task = tasks.get(row.rowid)
+        if task is None:
+            continue
+        if table == BIGRAM_TABLE:
+            # The bigram columns hold segmented text, highlight the original instead
+            snippets = {"title": highlight(task.title, terms),
+                        "description": highlight(task.description, terms)}
+        else:
+            snippets = {"title": row.title_snippet, "description": row.description_snippet}
+        results.append((task, row.rank, snippets))
+    return results
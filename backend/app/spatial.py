@@ -0,0 +1,127 @@
+"""
+Spatial index over task canvas positions.
+
+`task_rtree` is an SQLite R*Tree holding one point per task, kept in sync by
+triggers so every write path (ORM, bulk inserts and the set-based position
+updates) is covered. Viewport queries use it as a coarse filter and then
+apply the exact bounds on task.position_x/position_y, so the 32-bit float
+rounding inside the R-tree never changes results. Without the rtree module
+(or on PostgreSQL) the same queries run against ix_task_position.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, cast, column, func, table
+from sqlmodel import Session, select
+
+from .crud import TaskCRUD
+from .models import Task
+
+RTREE_TABLE = "task_rtree"
+
+_rtree = table(RTREE_TABLE, column("id"), column("min_x"), column("max_x"),
+               column("min_y"), column("max_y"))
+
+_TRIGGERS = {
+    f"{RTREE_TABLE}_ai": f"""
+        CREATE TRIGGER {RTREE_TABLE}_ai AFTER INSERT ON task BEGIN
+            INSERT INTO {RTREE_TABLE}(id, min_x, max_x, min_y, max_y)
+            VALUES (new.id, new.position_x, new.position_x, new.position_y, new.position_y);
+        END""",
+    f"{RTREE_TABLE}_ad": f"""
+        CREATE TRIGGER {RTREE_TABLE}_ad AFTER DELETE ON task BEGIN
+            DELETE FROM {RTREE_TABLE} WHERE id = old.id;
+        END""",
+    f"{RTREE_TABLE}_au": f"""
+        CREATE TRIGGER {RTREE_TABLE}_au AFTER UPDATE OF position_x, position_y ON task BEGIN
+            UPDATE {RTREE_TABLE}
+            SET min_x = new.position_x, max_x = new.position_x,
+                min_y = new.position_y, max_y = new.position_y
+            WHERE id = new.id;
+        END""",
+}
+
+
+def ensure_spatial_index(engine) -> bool:
+    """Create the R-tree and sync triggers if missing, populating it from
+    existing tasks. Returns True when the index was (re)built."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (RTREE_TABLE,)
+        ).first()
+        if exists:
+            return False
+        try:
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {RTREE_TABLE} USING rtree(id, min_x, max_x, min_y, max_y)"
+            )
+        except Exception:
+            print("SQLite rtree module not available, viewport queries will use the position index")
+            return False
+        for name, ddl in _TRIGGERS.items():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(
+            f"INSERT INTO {RTREE_TABLE}(id, min_x, max_x, min_y, max_y) "
+            f"SELECT id, position_x, position_x, position_y, position_y FROM task"
+        )
+    return True
+
+
+def spatial_available(db: Session) -> bool:
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    return db.connection().exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (RTREE_TABLE,)
+    ).first() is not None
+
+
+def _in_viewport(db: Session, x0: float, y0: float, x1: float, y1: float) -> List[Any]:
+    """WHERE clauses selecting tasks whose position lies inside the box"""
+    conditions = [Task.position_x.between(x0, x1), Task.position_y.between(y0, y1)]
+    if spatial_available(db):
+        candidates = select(_rtree.c.id).where(
+            _rtree.c.max_x >= x0, _rtree.c.min_x <= x1,
+            _rtree.c.max_y >= y0, _rtree.c.min_y <= y1,
+        )
+        conditions.insert(0, Task.id.in_(candidates))
+    return conditions
+
+
+def tasks_in_viewport(
+    db: Session,
+    x0: float, y0: float, x1: float, y1: float,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None
+) -> List[Any]:
+    """Tasks positioned inside [x0, x1] x [y0, y1], in id order. Positions are
+    note anchors, so callers should pad the box by the note size."""
+    statement = TaskCRUD.select_fields(fields).where(*_in_viewport(db, x0, y0, x1, y1))
+    statement = statement.order_by(Task.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return db.exec(statement).all()
+
+
+def viewport_cells(
+    db: Session,
+    x0: float, y0: float, x1: float, y1: float,
+    cell_size: float
+) -> List[Dict[str, Any]]:
+    """Per-cell note counts for zoomed-out views. Cells are cell_size squares
+    anchored at (x0, y0); each carries its grid index, count and the mean
+    position of its notes so clusters can be drawn where the notes are."""
+    cx = cast((Task.position_x - x0) / cell_size, Integer).label("cx")
+    cy = cast((Task.position_y - y0) / cell_size, Integer).label("cy")
+    statement = (
+        select(cx, cy, func.count().label("count"),
+               func.avg(Task.position_x).label("x"), func.avg(Task.position_y).label("y"))
+        .where(*_in_viewport(db, x0, y0, x1, y1))
+        .group_by(cx, cy)
+        .order_by(cy, cx)
+    )
+    return [
+        {"cx": row.cx, "cy": row.cy, "count": row.count, "x": row.x, "y": row.y}
+        for row in db.exec(statement).all()
+    ]
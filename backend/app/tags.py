@@ -0,0 +1,146 @@
+"""
+Tag index over Task.tags.
+
+Task.tags keeps its JSON-array text (get_tags/set_tags are unchanged), and
+`task_tag` holds one (task_id, tag) row per text element. On SQLite it is
+kept in sync by triggers using json_each, like task_fts and task_closure,
+so every write path is covered; malformed or non-array values index as no
+tags, matching get_tags. Tag filters and facet counts are then indexed
+queries on ix_task_tag_tag. Where the triggers are not installed (e.g.
+PostgreSQL) the same functions fall back to decoding every row.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from .crud import TaskCRUD
+from .models import Task, TaskTag, decode_tags
+
+TAG_TABLE = "task_tag"
+
+
+def _tag_rows(tags_sql: str) -> str:
+    """json_each over a tags value, treating anything but a JSON array as empty"""
+    return (
+        f"json_each(CASE WHEN json_valid({tags_sql}) AND json_type({tags_sql}) = 'array' "
+        f"THEN {tags_sql} ELSE '[]' END)"
+    )
+
+
+_TRIGGERS = {
+    f"{TAG_TABLE}_ai": f"""
+        CREATE TRIGGER {TAG_TABLE}_ai AFTER INSERT ON task BEGIN
+            INSERT OR IGNORE INTO {TAG_TABLE}(task_id, tag)
+            SELECT new.id, value FROM {_tag_rows('new.tags')} WHERE type = 'text';
+        END""",
+    f"{TAG_TABLE}_au": f"""
+        CREATE TRIGGER {TAG_TABLE}_au AFTER UPDATE OF tags ON task
+        WHEN old.tags IS NOT new.tags BEGIN
+            DELETE FROM {TAG_TABLE} WHERE task_id = new.id;
+            INSERT OR IGNORE INTO {TAG_TABLE}(task_id, tag)
+            SELECT new.id, value FROM {_tag_rows('new.tags')} WHERE type = 'text';
+        END""",
+    f"{TAG_TABLE}_ad": f"""
+        CREATE TRIGGER {TAG_TABLE}_ad AFTER DELETE ON task BEGIN
+            DELETE FROM {TAG_TABLE} WHERE task_id = old.id;
+        END""",
+}
+
+
+def ensure_tag_index(engine) -> bool:
+    """Install the sync triggers if missing and rebuild task_tag from
+    Task.tags. Returns True when the index was (re)built."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        installed = conn.exec_driver_sql(
+            "SELECT count(*) FROM sqlite_master WHERE type='trigger' AND name IN (?, ?, ?)",
+            tuple(_TRIGGERS)
+        ).scalar()
+        if installed == len(_TRIGGERS):
+            return False
+
+        for name, ddl in _TRIGGERS.items():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(f"DELETE FROM {TAG_TABLE}")
+        conn.exec_driver_sql(
+            f"INSERT OR IGNORE INTO {TAG_TABLE}(task_id, tag) "
+            f"SELECT task.id, tags.value FROM task, {_tag_rows('task.tags')} AS tags "
+            f"WHERE tags.type = 'text'"
+        )
+    return True
+
+
+def tag_index_available(db: Session) -> bool:
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    return db.connection().exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?", (f"{TAG_TABLE}_ai",)
+    ).first() is not None
+
+
+def _scan_tags(db: Session) -> Dict[int, set]:
+    """Fallback: decode Task.tags for every task"""
+    return {
+        task_id: {tag for tag in decode_tags(raw) if isinstance(tag, str)} if raw else set()
+        for task_id, raw in db.exec(select(Task.id, Task.tags)).all()
+    }
+
+
+def _tagged_ids(db: Session, tags: Sequence[str], match_all: bool):
+    """Ids (a SELECT, or a list in the fallback) of tasks carrying all/any of tags"""
+    wanted = set(tags)
+    if tag_index_available(db):
+        statement = select(TaskTag.task_id).where(TaskTag.tag.in_(wanted))
+        if match_all and len(wanted) > 1:
+            statement = statement.group_by(TaskTag.task_id) \
+                .having(func.count(TaskTag.tag) == len(wanted))
+        return statement
+    return [
+        task_id for task_id, task_tags in _scan_tags(db).items()
+        if (wanted <= task_tags if match_all else wanted & task_tags)
+    ]
+
+
+def tasks_with_tags(
+    db: Session,
+    tags: Sequence[str],
+    match_all: bool = True,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None
+) -> List[Any]:
+    """Tasks carrying every tag (match_all) or any of them, in id order"""
+    statement = TaskCRUD.select_fields(fields) \
+        .where(Task.id.in_(_tagged_ids(db, tags, match_all))) \
+        .order_by(Task.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return db.exec(statement).all()
+
+
+def tag_counts(
+    db: Session,
+    within: Sequence[str] = (),
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Facet counts: number of tasks per tag, most used first. With `within`,
+    only tasks carrying all of those tags are counted (drill-down)."""
+    if tag_index_available(db):
+        count = func.count(TaskTag.task_id).label("count")
+        statement = select(TaskTag.tag, count).group_by(TaskTag.tag) \
+            .order_by(count.desc(), TaskTag.tag)
+        if within:
+            statement = statement.where(TaskTag.task_id.in_(_tagged_ids(db, within, True)))
+        if limit is not None:
+            statement = statement.limit(limit)
+        return [{"tag": tag, "count": n} for tag, n in db.exec(statement).all()]
+
+    wanted = set(within)
+    counter = Counter(
+        tag for task_tags in _scan_tags(db).values() if wanted <= task_tags for tag in task_tags
+    )
+    ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    return [{"tag": tag, "count": n} for tag, n in ranked[:limit]]
@@ -23,7 +23,8 @@ class BackupService:
         Returns: (json_filename, markdown_filename)
         """
         with Session(engine) as db:
-            export_service = ExportService(db)
+            # Backups cover the archive too, so restoring one loses nothing
+            export_service = ExportService(db, include_archived=True)
             
             # Create JSON backup
             json_data = export_service.export_to_json()
@@ -0,0 +1,56 @@
+import hashlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlmodel import Session
+
+from ..crud import ChangeLogCRUD
+from ..async_crud import AsyncChangeLogCRUD
+
+
+def _build_etag(versions: Dict[str, int], request: Request) -> str:
+    parts = [f"{entity}{version}" for entity, version in versions.items()]
+    if request.url.query:
+        parts.append(hashlib.md5(request.url.query.encode()).hexdigest()[:8])
+    return '"' + "-".join(parts) + '"'
+
+
+def list_etag(db: Session, entities: Iterable[str], request: Request) -> str:
+    """Strong ETag for a list endpoint: the change-feed version of each entity
+    the list is built from, plus the query string when there is one."""
+    return _build_etag({entity: ChangeLogCRUD.version(db, entity) for entity in entities}, request)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix is ignored"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(
+        tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates
+    )
+
+
+def _conditional(request: Request, etag: str) -> Tuple[Optional[Response], Dict[str, str]]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
+
+
+def conditional_list(
+    db: Session, entities: Iterable[str], request: Request
+) -> Tuple[Optional[Response], Dict[str, str]]:
+    """Check If-None-Match before any rows are loaded. Returns a bodyless 304
+    when the client's copy is current, plus the cache headers to send with
+    a full response otherwise."""
+    return _conditional(request, list_etag(db, entities, request))
+
+
+async def async_conditional_list(
+    db, entities: Iterable[str], request: Request
+) -> Tuple[Optional[Response], Dict[str, str]]:
+    """conditional_list for handlers using an AsyncSession"""
+    versions = {entity: await AsyncChangeLogCRUD.version(db, entity) for entity in entities}
+    return _conditional(request, _build_etag(versions, request))
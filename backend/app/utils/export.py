@@ -3,19 +3,33 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from sqlmodel import Session, select
 from ..models import Task, Module, TaskDependency
+from ..archive import archived_dependencies, archived_tasks
 
 class ExportService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, include_archived: bool = False):
         self.db = db
+        self.include_archived = include_archived
+
+    def _tasks(self) -> List[Task]:
+        tasks = self.db.exec(select(Task)).all()
+        if self.include_archived:
+            tasks = list(tasks) + archived_tasks(self.db)
+        return tasks
+
+    def _dependencies(self) -> List[TaskDependency]:
+        dependencies = self.db.exec(select(TaskDependency)).all()
+        if self.include_archived:
+            dependencies = list(dependencies) + archived_dependencies(self.db)
+        return dependencies
     
     def export_to_json(self) -> Dict:
         """
         Export all data to JSON format
         """
         # Get all data
-        tasks = self.db.exec(select(Task)).all()
+        tasks = self._tasks()
         modules = self.db.exec(select(Module)).all()
-        dependencies = self.db.exec(select(TaskDependency)).all()
+        dependencies = self._dependencies()
         
         # Convert to dict format
         export_data = {
@@ -60,9 +74,9 @@ class ExportService:
         """
         Export all data to Markdown format
         """
-        tasks = self.db.exec(select(Task)).all()
+        tasks = self._tasks()
         modules = self.db.exec(select(Module)).all()
-        dependencies = self.db.exec(select(TaskDependency)).all()
+        dependencies = self._dependencies()
         
         # Create module lookup
         module_lookup = {module.id: module.name for module in modules}
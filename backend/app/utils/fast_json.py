@@ -0,0 +1,45 @@
+"""
+Fast-path JSON for large list responses.
+
+List endpoints select plain column tuples, zip them into dicts (see
+projections.project_rows) and encode them here, bypassing per-row Pydantic
+validation and FastAPI's jsonable_encoder. orjson is used when installed;
+the stdlib fallback produces the same JSON. Output matches the Read schemas' JSON mode:
+enums by value and naive datetimes in ISO 8601.
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        # orjson serializes enums and datetimes natively, in the same format
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,134 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlmodel import Session
+
+from ..crud import HistoryCRUD
+from ..deps import engine
+
+
+@dataclass
+class HistoryRetention:
+    """History compaction policy, configurable through TASKWALL_HISTORY_* env vars"""
+    merge_window_seconds: float = 60.0    # same-field edits closer than this collapse into one entry
+    max_age_days: Optional[int] = None    # None = keep history forever
+    max_rows_per_task: Optional[int] = 1000
+    interval_hours: int = 24
+    vacuum: bool = False                  # SQLite: VACUUM afterwards to return pages to the OS
+
+    @classmethod
+    def from_env(cls) -> "HistoryRetention":
+        def optional_int(name: str, default: Optional[int]) -> Optional[int]:
+            value = os.getenv(name)
+            if value is None:
+                return default
+            return int(value) if int(value) > 0 else None
+
+        defaults = cls()
+        return cls(
+            merge_window_seconds=float(os.getenv("TASKWALL_HISTORY_MERGE_WINDOW", defaults.merge_window_seconds)),
+            max_age_days=optional_int("TASKWALL_HISTORY_MAX_AGE_DAYS", defaults.max_age_days),
+            max_rows_per_task=optional_int("TASKWALL_HISTORY_MAX_ROWS_PER_TASK", defaults.max_rows_per_task),
+            interval_hours=int(os.getenv("TASKWALL_HISTORY_COMPACT_HOURS", defaults.interval_hours)),
+            vacuum=os.getenv("TASKWALL_HISTORY_VACUUM", "0").lower() in ("1", "true", "yes"),
+        )
+
+
+def _sqlite_size(db: Session) -> Optional[dict]:
+    if db.get_bind().dialect.name != "sqlite":
+        return None
+    conn = db.connection()
+    page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+    return {
+        "file_bytes": conn.exec_driver_sql("PRAGMA page_count").scalar() * page_size,
+        "free_bytes": conn.exec_driver_sql("PRAGMA freelist_count").scalar() * page_size,
+    }
+
+
+def compact_history(db: Session, policy: HistoryRetention) -> dict:
+    """Merge edit bursts, then apply age and per-task size retention.
+    Returns row counts per step and the reclaimed space: `payload_bytes` is
+    the text freed inside the table; on SQLite `free_bytes` is what became
+    reusable in the file and `file_bytes_reclaimed` what VACUUM returned."""
+    before = _sqlite_size(db)
+    report = {"merged": 0, "deleted": 0, "payload_bytes": 0}
+
+    merged = HistoryCRUD.merge_runs(db, policy.merge_window_seconds)
+    report["merged"] = merged["merged"]
+    steps = [("merge", merged)]
+    if policy.max_age_days:
+        cutoff = datetime.utcnow() - timedelta(days=policy.max_age_days)
+        steps.append(("expired", HistoryCRUD.delete_older_than(db, cutoff)))
+    if policy.max_rows_per_task:
+        steps.append(("trimmed", HistoryCRUD.trim_per_task(db, policy.max_rows_per_task)))
+    db.commit()
+
+    for name, step in steps:
+        report[f"{name}_deleted"] = step["deleted"]
+        report["deleted"] += step["deleted"]
+        report["payload_bytes"] += step["bytes"]
+
+    after = _sqlite_size(db)
+    if before is not None:
+        report["free_bytes"] = after["free_bytes"]
+        report["file_bytes_reclaimed"] = 0
+        if policy.vacuum and report["deleted"]:
+            bind = db.get_bind()
+            db.close()
+            # VACUUM cannot run inside a transaction
+            with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.exec_driver_sql("VACUUM")
+            after = _sqlite_size(db)
+            report["free_bytes"] = after["free_bytes"]
+            report["file_bytes_reclaimed"] = max(before["file_bytes"] - after["file_bytes"], 0)
+        db.commit()
+    return report
+
+
+class HistoryCompactionService:
+    def __init__(self, policy: Optional[HistoryRetention] = None):
+        self.policy = policy or HistoryRetention.from_env()
+        self.scheduler: Optional[BackgroundScheduler] = None
+        self.last_report: Optional[dict] = None
+
+    def run(self) -> dict:
+        with Session(engine) as db:
+            self.last_report = compact_history(db, self.policy)
+        return self.last_report
+
+    def start_scheduler(self):
+        """Start the periodic history compaction job"""
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown()
+
+        self.scheduler = BackgroundScheduler()
+        self.scheduler.add_job(
+            func=self._scheduled_compaction,
+            trigger=IntervalTrigger(hours=self.policy.interval_hours),
+            id='history_compaction_job',
+            name='TaskWall History Compaction',
+            replace_existing=True
+        )
+        self.scheduler.start()
+        print(f"History compaction scheduler started with {self.policy.interval_hours}-hour interval")
+
+    def stop_scheduler(self):
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown()
+            print("History compaction scheduler stopped")
+
+    def _scheduled_compaction(self):
+        try:
+            report = self.run()
+            print(f"History compaction: merged {report['merged']}, deleted {report['deleted']}, "
+                  f"freed ~{report['payload_bytes']} bytes")
+        except Exception as e:
+            print(f"History compaction failed: {e}")
+
+
+# Global history compaction service instance
+history_compaction_service = HistoryCompactionService()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+已完成任务归档脚本
+把完成（或归档状态）超过指定天数的任务连同历史记录、依赖移入归档表，可配合 cron 定期运行
+
+用法: python archive_tasks.py [--days 90]
+"""
+import argparse
+
+from sqlmodel import Session
+
+from app.deps import DATABASE_URL, engine
+from app.archive import archive_tasks
+
+def archive(days: int):
+    print(f"归档 {days} 天前完成的任务: {DATABASE_URL}")
+    
+    try:
+        with Session(engine) as db:
+            moved = archive_tasks(db, days)
+        print(f"归档任务 {moved['tasks']} 个，历史记录 {moved['history']} 条，依赖 {moved['dependencies']} 条")
+        print("✅ 归档完成!")
+        
+    except Exception as e:
+        print(f"❌ 归档失败: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive finished tasks")
+    parser.add_argument("--days", type=int, default=90)
+    archive(parser.parse_args().days)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+AI 服务容器基准测试
+对比每个请求新建 AIServiceAggregator（旧做法：6 个服务各自的 AICache，两个 VectorDBManager
+各自加载 ChromaDB 与向量模型）与进程内共享服务容器时 /api/ai/v3 接口的请求延迟
+
+用法: python benchmark_ai_services.py [--requests 50] [--persist-directory ./data/chroma]
+
+注意: 使用临时数据库；安装了 chromadb 与 sentence-transformers 时差距最明显
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("TASKWALL_AI_CACHE_DISK", "off")
+
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.ai.aggregator import AIServiceAggregator
+from app.ai.container import ai_services
+from app.ai.vector_db import VectorDBManager, VectorResources
+from app.deps import create_db_engine, get_db
+from app.main import app
+from app.migrations import run_migrations
+from app.routers.ai_v3 import get_ai_aggregator
+
+
+def per_request_aggregator(persist_directory: str):
+    """旧做法：每个请求重新构建全部服务与向量资源"""
+    def build(db: Session = Depends(get_db)):
+        aggregator = AIServiceAggregator(db, vector_resources=VectorResources(persist_directory))
+        aggregator.similarity_service.vector_db = VectorDBManager(
+            db, resources=VectorResources(persist_directory)
+        )
+        return aggregator
+    return build
+
+
+def bench(client: TestClient, label: str, requests: int) -> dict:
+    """依次发送分类请求（内容各不相同，不命中缓存），返回延迟统计（毫秒）"""
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        response = client.post(
+            "/api/ai/v3/classification/classify",
+            params={"task_content": f"{label} 修复登录接口超时问题 #{i}"}
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    latencies.sort()
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI service container benchmark")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--persist-directory", default="./data/chroma")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        run_migrations(engine)
+
+        def override_get_db():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(app)
+        print(f"请求数: {args.requests}")
+        print("=" * 60)
+
+        results = {}
+        app.dependency_overrides[get_ai_aggregator] = per_request_aggregator(args.persist_directory)
+        results["每请求构建"] = bench(client, "before", args.requests)
+        del app.dependency_overrides[get_ai_aggregator]
+
+        ai_services.persist_directory = args.persist_directory
+        ai_services.warm_up()
+        results["共享容器"] = bench(client, "after", args.requests)
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    metrics = ["mean", "p50", "p95", "max"]
+    print(f"{'(ms)':<12}" + "".join(f"{metric:>12}" for metric in metrics))
+    for name, result in results.items():
+        print(f"{name:<12}" + "".join(f"{result[metric]:>12.1f}" for metric in metrics))
+    before, after = results["每请求构建"]["mean"], results["共享容器"]["mean"]
+    print(f"平均延迟降低 {before - after:.1f} ms（{before / after:.1f}x）")
+
+
+if __name__ == "__main__":
+    main()
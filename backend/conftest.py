@@ -0,0 +1,44 @@
+"""
+共享测试夹具：每个测试使用独立的临时 SQLite 数据库
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep tests away from the persistent AI cache under data/ (test_ai_cache.py passes its own)
+os.environ.setdefault("TASKWALL_AI_CACHE_DISK", "off")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.deps import create_db_engine, create_async_db_engine, async_session_factory, get_db, get_async_db
+from app.main import app
+from app.migrations import run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'taskwall.db'}")
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    """TestClient whose sync and async sessions both point at the test database"""
+    async_sessions = async_session_factory(create_async_db_engine(str(engine.url)))
+
+    def override_get_db():
+        with Session(engine) as session:
+            yield session
+
+    async def override_get_async_db():
+        async with async_sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
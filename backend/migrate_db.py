@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+数据库结构迁移脚本（不删除数据）
+为现有数据库补建缺失的表和索引，替代会清空数据的 recreate_tables.py
+"""
+from app.deps import DATABASE_URL, engine
+from app.migrations import run_migrations
+
+def migrate():
+    print(f"迁移数据库结构: {DATABASE_URL}")
+    
+    try:
+        result = run_migrations(engine)
+        for name in result["columns_added"]:
+            print(f"新增字段: {name}")
+        created = result["indexes_created"]
+        if created:
+            print(f"新建索引 {len(created)} 个:")
+            for name in created:
+                print(f"  - {name}")
+        else:
+            print("索引已是最新，无需迁移")
+        
+        print("✅ 迁移完成!")
+        
+    except Exception as e:
+        print(f"❌ 迁移失败: {e}")
+
+if __name__ == "__main__":
+    migrate()
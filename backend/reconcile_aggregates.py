@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+任务统计计数表校准脚本
+按任务表重建 (module_id, status, urgency) 计数与工时合计，可配合 cron 定期运行
+"""
+from sqlmodel import Session
+
+from app.deps import DATABASE_URL, engine
+from app.crud import TaskAggregateCRUD
+
+def reconcile():
+    print(f"校准统计计数表: {DATABASE_URL}")
+    
+    try:
+        with Session(engine) as db:
+            result = TaskAggregateCRUD.reconcile(db)
+        print(f"共 {result['buckets']} 个统计桶，其中 {result['drifted']} 个存在偏差并已修正")
+        print("✅ 校准完成!")
+        
+    except Exception as e:
+        print(f"❌ 校准失败: {e}")
+
+if __name__ == "__main__":
+    reconcile()
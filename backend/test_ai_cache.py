@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+AI 结果缓存测试：进程内 LRU 层、按操作类型的 TTL、字节预算淘汰、Redis 层回填、磁盘持久层、并发请求合并与统计计数
+"""
+import asyncio
+import json
+import threading
+import time
+
+from sqlmodel import Session
+
+from app.ai.base import AICache, AIOperationType, AIResult, AIServiceBase
+from app.ai.cache import DiskCacheTier, MemoryCacheTier
+
+
+def _result(value="x"):
+    return AIResult(success=True, data={"value": value}, confidence=0.9)
+
+
+class FakeRedis:
+    """只实现 AICache 用到的命令"""
+
+    def __init__(self):
+        self.store = {}
+
+    def setex(self, key, ttl, value):
+        self.store[key] = (value, ttl)
+
+    def pipeline(self):
+        redis, commands = self, []
+
+        class Pipeline:
+            def get(self, key):
+                commands.append(lambda: redis.store.get(key, (None, -2))[0])
+
+            def ttl(self, key):
+                commands.append(lambda: redis.store.get(key, (None, -2))[1])
+
+            def execute(self):
+                return [command() for command in commands]
+
+        return Pipeline()
+
+
+def test_memory_tier_hits_ttl_and_counters():
+    cache = AICache(memory=MemoryCacheTier(1024 * 1024))
+    assert cache.get(AIOperationType.CLASSIFY, {"title": "a"}) is None
+    cache.set(AIOperationType.CLASSIFY, {"title": "a"}, _result("a"))
+    assert cache.get(AIOperationType.CLASSIFY, {"title": "a"}).data == {"value": "a"}
+
+    cache.cache_ttl[AIOperationType.PRIORITY] = 0.05
+    cache.set(AIOperationType.PRIORITY, {"title": "a"}, _result())
+    time.sleep(0.06)
+    assert cache.get(AIOperationType.PRIORITY, {"title": "a"}) is None
+
+    stats = cache.get_stats()["operations"]
+    assert stats["classify"]["hits"] == stats["classify"]["memory_hits"] == 1
+    assert stats["classify"]["misses"] == 1 and stats["classify"]["hit_rate"] == 0.5
+    assert stats["priority"]["expired"] == 1 and stats["priority"]["misses"] == 1
+    assert set(stats) == {op.value for op in AIOperationType}
+
+
+def test_byte_budget_evicts_least_recently_used():
+    size = len(json.dumps(_result("0").to_dict()))
+    cache = AICache(memory=MemoryCacheTier(size * 3))
+    for i in range(3):
+        cache.set(AIOperationType.PARSE, {"text": str(i)}, _result(str(i)))
+    cache.get(AIOperationType.PARSE, {"text": "0"})  # 0 变为最近使用
+    cache.set(AIOperationType.SIMILARITY, {"text": "3"}, _result("3"))
+
+    assert cache.get(AIOperationType.PARSE, {"text": "1"}) is None
+    assert cache.get(AIOperationType.PARSE, {"text": "0"}) is not None
+    assert cache.memory.info()["bytes"] <= size * 3
+    assert cache.get_stats()["operations"]["parse"]["evictions"] == 1
+
+
+def test_redis_hits_are_promoted_to_memory():
+    redis = FakeRedis()
+    AICache(redis_client=redis, memory=MemoryCacheTier(1024 * 1024)) \
+        .set(AIOperationType.PARSE, {"text": "hi"}, _result("hi"))
+
+    # 另一个进程：本地层为空，从 Redis 读到后回填
+    cache = AICache(redis_client=redis, memory=MemoryCacheTier(1024 * 1024))
+    assert cache.get(AIOperationType.PARSE, {"text": "hi"}).data == {"value": "hi"}
+    redis.store.clear()
+    assert cache.get(AIOperationType.PARSE, {"text": "hi"}).data == {"value": "hi"}
+    stats = cache.get_stats()["operations"]["parse"]
+    assert (stats["remote_hits"], stats["memory_hits"]) == (1, 1)
+
+
+class CountingService(AIServiceBase):
+    calls = 0
+    delay = 0.0
+
+    def get_operation_type(self):
+        return AIOperationType.CLASSIFY
+
+    def _process_internal(self, input_data):
+        CountingService.calls += 1
+        time.sleep(self.delay)
+        return _result(input_data["title"])
+
+
+def test_process_serves_repeat_calls_from_cache(engine):
+    CountingService.calls = 0
+    memory = MemoryCacheTier(1024 * 1024)
+    with Session(engine) as db:
+        for _ in range(3):
+            # 每次请求都新建服务与 AICache，进程内缓存依然共享
+            service = CountingService(db, AICache(memory=memory))
+            assert service.process({"title": "登录"}).data == {"value": "登录"}
+    assert CountingService.calls == 1
+
+
+def test_disk_tier_survives_restart_and_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "ai_cache.db")
+    AICache(memory=MemoryCacheTier(1024 * 1024), disk=DiskCacheTier(path, 1024 * 1024)) \
+        .set(AIOperationType.PARSE, {"text": "hi"}, _result("hi"))
+
+    # 重启或另一个 worker：新的内存层和新的连接，读到同一个文件
+    cache = AICache(memory=MemoryCacheTier(1024 * 1024), disk=DiskCacheTier(path, 1024 * 1024))
+    assert cache.get(AIOperationType.PARSE, {"text": "hi"}).data == {"value": "hi"}
+    assert cache.get(AIOperationType.PARSE, {"text": "hi"}).data == {"value": "hi"}
+    stats = cache.get_stats()
+    assert (stats["operations"]["parse"]["disk_hits"], stats["operations"]["parse"]["memory_hits"]) == (1, 1)
+    assert stats["disk"]["entries"] == 1
+
+
+def test_disk_tier_expiry_and_budget(tmp_path):
+    disk = DiskCacheTier(str(tmp_path / "ai_cache.db"), 30)
+    disk.set("old", "parse", "x" * 10, ttl=-1)
+    assert disk.get("old") is None
+
+    for i in range(5):
+        disk.set(f"k{i}", "parse", "x" * 10, ttl=60)
+        time.sleep(0.01)
+    disk.TOUCH_INTERVAL = 0
+    disk.get("k0")  # k0 变为最近读取
+    assert disk.prune() == 2
+    assert disk.get("k0") is not None
+    assert disk.get("k1") is None and disk.get("k2") is None
+    assert disk.info()["bytes"] <= 30
+    assert disk.stats.snapshot()["parse"]["evictions"] == 2
+
+
+def test_concurrent_identical_calls_are_coalesced(engine):
+    CountingService.calls, CountingService.delay = 0, 0.3
+    memory = MemoryCacheTier(1024 * 1024)
+    results = []
+    barrier = threading.Barrier(5)
+
+    def request():
+        with Session(engine) as db:
+            barrier.wait()
+            results.append(CountingService(db, AICache(memory=memory)).process({"title": "并发"}))
+
+    try:
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        CountingService.delay = 0.0
+
+    assert CountingService.calls == 1
+    assert [r.data for r in results] == [{"value": "并发"}] * 5
+    assert len({id(r) for r in results}) == 5  # 每个调用方拿到独立副本
+    stats = AICache(memory=memory).get_stats()
+    assert stats["operations"]["classify"]["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_concurrent_async_calls_are_coalesced(engine):
+    CountingService.calls, CountingService.delay = 0, 0.2
+    memory = MemoryCacheTier(1024 * 1024)
+
+    async def gather():
+        with Session(engine) as db:
+            services = [CountingService(db, AICache(memory=memory)) for _ in range(5)]
+            return await asyncio.gather(*[s.aprocess({"title": "异步"}) for s in services])
+
+    try:
+        results = asyncio.run(gather())
+    finally:
+        CountingService.delay = 0.0
+
+    assert CountingService.calls == 1
+    assert [r.data for r in results] == [{"value": "异步"}] * 5
+    assert AICache(memory=memory).get_stats()["operations"]["classify"]["coalesced"] == 4
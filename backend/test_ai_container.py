@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+AI 服务容器测试：重量级资源（缓存、向量库与模型）进程内只加载一次，聚合器按请求绑定会话
+"""
+from sqlmodel import Session
+
+from app.ai import vector_db
+from app.ai.container import AIServiceContainer
+
+
+def test_aggregators_share_resources_but_not_sessions(engine, tmp_path, monkeypatch):
+    loads = []
+    original = vector_db.VectorResources.__init__
+
+    def counting_init(self, persist_directory="./data/chroma"):
+        loads.append(persist_directory)
+        original(self, persist_directory)
+
+    monkeypatch.setattr(vector_db.VectorResources, "__init__", counting_init)
+    container = AIServiceContainer(str(tmp_path / "chroma"))
+
+    with Session(engine) as first_db, Session(engine) as second_db:
+        first, second = container.aggregator(first_db), container.aggregator(second_db)
+
+    assert len(loads) == 1
+    assert first.vector_db.resources is second.vector_db.resources
+    assert first.similarity_service.vector_db is first.vector_db
+    assert first.nlp_service.cache is second.workload_service.cache is container.cache
+    assert first.db is first_db and second.similarity_service.db is second_db
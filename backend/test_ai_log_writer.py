@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+AI 日志后台批量写入测试：批量提交、按操作采样、大载荷压缩/截断、队列积压时去除载荷与丢弃
+"""
+import json
+import random
+import string
+
+from sqlmodel import Session, select
+
+from app.ai.base import AIMonitor, AIOperationType, AIResult
+from app.ai.log_writer import AILogWriter, decode_payload
+from app.models import AILog
+
+
+def _result():
+    return AIResult(success=True, data={"value": 1}, confidence=0.8, execution_time=0.25, model_used="test")
+
+
+def _logs(engine):
+    with Session(engine) as db:
+        return db.exec(select(AILog).order_by(AILog.id)).all()
+
+
+class PausedWriter(AILogWriter):
+    """不启动后台线程，便于观察队列状态"""
+
+    def _ensure_started(self):
+        pass
+
+    def resume(self):
+        AILogWriter._ensure_started(self)
+
+
+def test_log_operation_is_written_in_batches(engine):
+    writer = PausedWriter(flush_ms=50, batch_size=10)
+    with Session(engine) as db:
+        monitor = AIMonitor(db, log_writer=writer)
+        for i in range(25):
+            monitor.log_operation(AIOperationType.PARSE, "test", {"text": str(i)}, _result())
+        # 请求路径上没有写库
+        assert db.exec(select(AILog)).all() == []
+    writer.resume()
+    assert writer.flush()
+    writer.stop()
+
+    logs = _logs(engine)
+    assert len(logs) == 25
+    assert json.loads(logs[0].input_data) == {"text": "0"}
+    assert logs[0].duration_ms == 250 and logs[0].operation == "parse"
+    stats = writer.stats()
+    assert stats["written"] == 25 and stats["batches"] >= 3
+
+
+def test_sampling_keeps_errors(engine):
+    writer = AILogWriter(flush_ms=20, sample_rates={"similarity": 0.0})
+    with Session(engine) as db:
+        monitor = AIMonitor(db, log_writer=writer)
+        monitor.log_operation(AIOperationType.SIMILARITY, "test", {"task_id": None}, _result())
+        monitor.log_operation(AIOperationType.SIMILARITY, "test", {}, _result(), error="boom")
+        monitor.log_operation(AIOperationType.PARSE, "test", {}, _result())
+    writer.flush()
+    writer.stop()
+
+    assert [(log.operation, log.error_message) for log in _logs(engine)] == [
+        ("similarity", "boom"), ("parse", None)
+    ]
+    assert writer.stats()["sampled_out"] == 1
+
+
+def test_large_payloads_are_compressed_or_truncated(engine):
+    writer = AILogWriter(flush_ms=20, max_payload=200)
+    repetitive = {"text": "任务" * 500}
+    noise = {"text": "".join(random.choice(string.ascii_letters) for _ in range(2000))}
+    with Session(engine) as db:
+        monitor = AIMonitor(db, log_writer=writer)
+        monitor.log_operation(AIOperationType.PARSE, "test", repetitive, _result())
+        monitor.log_operation(AIOperationType.PARSE, "test", noise, _result())
+    writer.flush()
+    writer.stop()
+
+    compressed, truncated = _logs(engine)
+    assert len(compressed.input_data) <= 200
+    assert json.loads(decode_payload(compressed.input_data)) == repetitive
+    assert truncated.input_data.startswith(json.dumps(noise)[:200])
+    assert "truncated" in truncated.input_data
+    stats = writer.stats()
+    assert (stats["compressed"], stats["truncated"]) == (1, 1)
+
+
+def test_backpressure_strips_payloads_then_drops(engine):
+    writer = PausedWriter(flush_ms=20, max_queue=4, high_watermark=0.5)
+    with Session(engine) as db:
+        monitor = AIMonitor(db, log_writer=writer)
+        for i in range(5):
+            monitor.log_operation(AIOperationType.PARSE, "test", {"text": str(i)}, _result())
+    stats = writer.stats()
+    assert (stats["queued"], stats["stripped"], stats["dropped"]) == (4, 2, 1)
+
+    writer.resume()
+    writer.flush()
+    writer.stop()
+    logs = _logs(engine)
+    assert [log.input_data is not None for log in logs] == [True, True, False, False]
+    assert all(log.confidence == 0.8 for log in logs)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+增量变更接口测试
+"""
+from datetime import datetime
+
+
+def test_changes_since_cursor(client):
+    cursor = client.get("/api/changes/").json()["cursor"]
+    assert cursor == 0
+
+    a = client.post("/api/tasks/", json={"title": "A"}).json()["id"]
+    b = client.post("/api/tasks/", json={"title": "B"}).json()["id"]
+    client.post("/api/dependencies/", json={"from_task_id": a, "to_task_id": b})
+    module = client.post("/api/modules/", json={"name": "后端"}).json()["id"]
+
+    feed = client.get("/api/changes/", params={"since": cursor}).json()
+    assert {t["id"] for t in feed["tasks"]} == {a, b}
+    assert len(feed["dependencies"]) == 1
+    assert [m["id"] for m in feed["modules"]] == [module]
+    assert feed["deleted"] == {}
+    cursor = feed["cursor"]
+
+    # Nothing new since the last poll
+    feed = client.get("/api/changes/", params={"since": cursor}).json()
+    assert feed["tasks"] == [] and feed["cursor"] == cursor
+
+    client.patch(f"/api/tasks/{b}", json={"title": "B2"})
+    client.delete(f"/api/tasks/{a}")
+    feed = client.get("/api/changes/", params={"since": cursor}).json()
+    assert [t["title"] for t in feed["tasks"]] == ["B2"]
+    assert feed["deleted"]["task"] == [a]
+    assert len(feed["deleted"]["dependency"]) == 1
+
+
+def test_changes_paging(client):
+    for i in range(5):
+        client.post("/api/tasks/", json={"title": f"T{i}"})
+    feed = client.get("/api/changes/", params={"since": 0, "limit": 3}).json()
+    assert len(feed["tasks"]) == 3 and feed["has_more"]
+    feed = client.get("/api/changes/", params={"since": feed["cursor"], "limit": 3}).json()
+    assert len(feed["tasks"]) == 2 and not feed["has_more"]
+
+
+def test_vector_refs_are_in_change_feed(client, engine):
+    from sqlmodel import Session
+    from app.crud import TaskCRUD
+    from app.models import Task
+
+    a = client.post("/api/tasks/", json={"title": "A"}).json()["id"]
+    listed = client.get("/api/tasks/")
+    cursor = client.get("/api/changes/").json()["cursor"]
+    with Session(engine) as db:
+        task = db.get(Task, a)
+        updated_at = task.updated_at
+        TaskCRUD.set_vector_ref(db, task, "task_1", datetime.utcnow())
+        db.commit()
+        assert task.version == 2 and task.updated_at == updated_at
+
+    feed = client.get("/api/changes/", params={"since": cursor}).json()
+    assert [(t["id"], t["version"]) for t in feed["tasks"]] == [(a, 2)]
+    # 列表 ETag 随之变化，不会返回过期的 304
+    response = client.get("/api/tasks/", headers={"If-None-Match": listed.headers["etag"]})
+    assert response.status_code == 200
+
+    cursor = feed["cursor"]
+    with Session(engine) as db:
+        assert TaskCRUD.clear_vector_refs(db) == [a]
+        db.commit()
+        task = db.get(Task, a)
+        assert (task.vector_id, task.last_vector_update, task.version) == (None, None, 3)
+    feed = client.get("/api/changes/", params={"since": cursor}).json()
+    assert [t["id"] for t in feed["tasks"]] == [a]
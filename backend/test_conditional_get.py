@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+列表接口 ETag / If-None-Match 条件请求测试
+"""
+import pytest
+from sqlmodel import Session
+
+from app.crud import IslandCRUD
+from app.models import Island
+
+
+@pytest.mark.parametrize("path", ["/api/tasks/", "/api/tasks/stream", "/api/dependencies/", "/api/modules/", "/islands/"])
+def test_unchanged_list_returns_304(client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get(path, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+
+
+def test_write_changes_etag(client, engine):
+    etag = client.get("/api/tasks/").headers["ETag"]
+    module_etag = client.get("/api/modules/").headers["ETag"]
+
+    task_id = client.post("/api/tasks/", json={"title": "新任务"}).json()["id"]
+    response = client.get("/api/tasks/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [t["id"] for t in response.json()] == [task_id]
+    assert response.headers["ETag"] != etag
+
+    # Other lists are versioned independently
+    assert client.get("/api/modules/", headers={"If-None-Match": module_etag}).status_code == 304
+
+    with Session(engine) as db:
+        IslandCRUD.create(db, Island(name="岛", color="#fff", keywords='["a"]'))
+    assert client.get("/islands/").json()[0]["keywords"] == ["a"]
+
+
+def test_query_string_is_part_of_etag(client):
+    etag = client.get("/api/tasks/").headers["ETag"]
+    paged = client.get("/api/tasks/", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert paged.status_code == 200
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+列表接口快速 JSON 编码兼容性测试：输出字节须与 TaskRead 序列化结果一致
+"""
+import json
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session, select
+
+from app.models import PriorityLevel, Task, TaskDependency, TaskStatus
+from app.schemas import TaskDependencyRead, TaskRead
+from app.utils import fast_json
+
+
+@pytest.fixture
+def seeded(engine):
+    with Session(engine) as db:
+        db.add(Task(title="普通任务", category=None, vector_id=None))
+        db.add(Task(
+            title='含"引号"与\\反斜杠 ✓', description="多行\n描述", urgency=0,
+            priority=PriorityLevel.CRITICAL, status=TaskStatus.IN_PROGRESS,
+            category="开发", tags='["a", "b"]', estimated_hours=1.25, actual_hours=0.1,
+            position_x=-12.5, position_y=1e10, deadline=datetime(2025, 3, 1, 8, 30),
+            started_at=datetime(2025, 2, 1, 0, 0, 0, 123456), ai_generated=True,
+            ai_confidence=0.3333333333333333, ai_reasoning="理由", island_id=3,
+            island_override=4, vector_id="vec-1", ocr_src="ocr.png",
+        ))
+        db.commit()
+        db.add(TaskDependency(from_task_id=1, to_task_id=2))
+        db.commit()
+    return engine
+
+
+def _expected(engine, model, schema) -> bytes:
+    """What FastAPI's response_model path would have produced"""
+    with Session(engine) as db:
+        rows = db.exec(select(model).order_by(model.id)).all()
+        content = [schema.model_validate(row).model_dump(mode="json") for row in rows]
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def test_task_list_bytes_match_task_read(client, seeded):
+    response = client.get("/api/tasks/")
+    assert response.status_code == 200
+    assert response.content == _expected(seeded, Task, TaskRead)
+    for item in response.json():
+        TaskRead.model_validate(item)
+
+
+def test_task_stream_bytes_match_task_read(client, seeded):
+    response = client.get("/api/tasks/stream")
+    assert response.content == _expected(seeded, Task, TaskRead)
+
+
+def test_dependency_list_bytes_match_schema(client, seeded):
+    response = client.get("/api/dependencies/")
+    assert response.content == _expected(seeded, TaskDependency, TaskDependencyRead)
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch, seeded):
+    with Session(seeded) as db:
+        rows = [TaskRead.model_validate(t).model_dump() for t in db.exec(select(Task)).all()]
+    encoded = fast_json.dumps(rows)
+    monkeypatch.setattr(fast_json, "ORJSON_AVAILABLE", False)
+    assert fast_json.dumps(rows) == encoded
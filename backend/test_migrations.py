@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+数据库迁移测试：在已有数据的库上补建索引，不丢数据
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+
+from sqlalchemy import delete, inspect
+from sqlmodel import SQLModel, Session, select
+
+from app.deps import create_db_engine
+from app.migrations import ensure_indexes, run_migrations
+from app.models import Task
+
+
+def test_ensure_indexes_on_existing_database(tmp_path):
+    """旧库缺少索引时迁移补建，且数据保留"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Task(title="保留的任务", category=None, vector_id=None))
+        db.commit()
+
+    # Simulate a database created before the indexes were declared
+    with engine.begin() as conn:
+        for ix in inspect(conn).get_indexes("task"):
+            conn.exec_driver_sql(f"DROP INDEX {ix['name']}")
+
+    created = ensure_indexes(engine)
+    assert "ix_task_parent_id" in created
+    assert "ix_task_updated_at" in created
+
+    names = {ix["name"] for ix in inspect(engine).get_indexes("task")}
+    assert {"ix_task_parent_id", "ix_task_module_id", "ix_task_deadline"} <= names
+
+    with Session(engine) as db:
+        assert db.exec(select(Task)).one().title == "保留的任务"
+
+
+def test_run_migrations_is_idempotent(tmp_path):
+    """重复执行迁移不会再建索引"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    run_migrations(engine)
+    assert run_migrations(engine)["indexes_created"] == []
+
+
+def test_ensure_columns_adds_version_to_existing_tasks(tmp_path):
+    """旧库缺少 version 字段时迁移补齐，已有任务默认版本为 1"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Task(title="旧任务", category=None, vector_id=None))
+        db.commit()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE task DROP COLUMN version")
+
+    assert run_migrations(engine)["columns_added"] == ["task.version"]
+    with Session(engine) as db:
+        assert db.exec(select(Task)).one().version == 1
+
+
+def test_ensure_autoincrement_rebuilds_legacy_task_table(tmp_path):
+    """旧库的 task 表没有 AUTOINCREMENT：迁移重建表，新 id 不与已有或已归档的 id 重复"""
+    from sqlalchemy.schema import CreateTable
+
+    from app.models import archived_task
+
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    legacy = str(CreateTable(Task.__table__).compile(dialect=engine.dialect)).replace(" AUTOINCREMENT", "")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(legacy)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        for title in ("甲", "乙", "丙"):
+            db.add(Task(title=title, category=None, vector_id=None))
+            db.commit()
+        db.exec(archived_task.insert().values(id=5, title="已归档", archived_at=datetime.utcnow()))
+        db.exec(delete(Task).where(Task.id == 3))
+        db.commit()
+
+    run_migrations(engine)
+    with Session(engine) as db:
+        task = Task(title="新任务", category=None, vector_id=None)
+        db.add(task)
+        db.commit()
+        assert task.id == 6
+        assert [t.title for t in db.exec(select(Task).order_by(Task.id)).all()] == ["甲", "乙", "新任务"]
+        assert db.exec(select(Task.id).where(Task.title.like("%甲%"))).all() == [1]
+    with engine.connect() as conn:
+        triggers = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type='trigger'")}
+    assert "task_fts_ai" in triggers
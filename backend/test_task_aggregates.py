@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+任务统计计数表测试：随增删改同步更新、校准任务与读取接口
+"""
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from app.crud import TaskAggregateCRUD, TaskCRUD
+from app.models import Module, Task, TaskAggregate
+
+
+def _recomputed(engine):
+    """直接从任务表计算的期望值"""
+    expected = {}
+    with Session(engine) as db:
+        for task in db.exec(select(Task)).all():
+            key = (task.module_id or -1, task.status, task.urgency)
+            count, est, act, unest = expected.get(key, (0, 0.0, 0.0, 0))
+            expected[key] = (count + 1, est + task.estimated_hours, act + task.actual_hours,
+                             unest + (task.estimated_hours == 0))
+    return expected
+
+
+def _stored(engine):
+    with Session(engine) as db:
+        return {
+            (row.module_id, row.status, row.urgency):
+                (row.task_count, row.estimated_hours, row.actual_hours, row.unestimated_count)
+            for row in db.exec(select(TaskAggregate)).all()
+        }
+
+
+def test_counters_follow_every_write_path(client, engine):
+    with Session(engine) as db:
+        module = Module(name="后端")
+        db.add(module)
+        db.commit()
+        module_id = module.id
+
+    ids = [client.post("/api/tasks/", json={
+        "title": f"任务 {i}", "urgency": i % 3, "estimated_hours": i, "module_id": module_id if i % 2 else None
+    }).json()["id"] for i in range(6)]
+    assert _stored(engine) == _recomputed(engine)
+
+    client.patch(f"/api/tasks/{ids[0]}", json={"status": "done", "actual_hours": 2.5})
+    client.patch(f"/api/tasks/{ids[1]}", json={"module_id": None, "urgency": 4})
+    client.patch("/api/tasks/positions", json={"positions": {str(ids[2]): [1, 1]}})
+    assert _stored(engine) == _recomputed(engine)
+
+    client.post("/api/tasks/bulk", json={
+        "create": [{"title": "批量", "estimated_hours": 3}],
+        "update": [{"id": ids[3], "estimated_hours": 0}],
+        "delete": [ids[4]],
+    })
+    with Session(engine) as db:
+        TaskCRUD.bulk_load(db, [Task(title="导入", category=None, vector_id=None, urgency=1)])
+    client.delete(f"/api/tasks/{ids[5]}")
+    assert _stored(engine) == _recomputed(engine)
+
+
+def test_reconcile_repairs_drift(engine):
+    with Session(engine) as db:
+        TaskCRUD.bulk_load(db, [Task(title=f"t{i}", category=None, vector_id=None) for i in range(4)])
+        # 绕过 CRUD 的写入不会更新计数
+        db.add(Task(title="直接写入", category=None, vector_id=None, estimated_hours=5))
+        db.commit()
+        result = TaskAggregateCRUD.reconcile(db)
+    assert result["drifted"] == 1
+    assert _stored(engine) == _recomputed(engine)
+
+
+def test_workload_and_module_stats_read_counters(client, engine):
+    with Session(engine) as db:
+        TaskCRUD.bulk_load(db, [
+            Task(title="已估算", category=None, vector_id=None, estimated_hours=3, urgency=2),
+            Task(title="未估算 P0", category=None, vector_id=None, urgency=0),
+            Task(title="明天到期", category=None, vector_id=None, urgency=4,
+                 due_date=datetime(2030, 1, 2, 9, 0)),
+        ])
+
+    body = client.post("/api/ai/workload-analysis", json={"date": "2030-01-02"}).json()
+    assert body["success"]
+    assert body["total_hours"] == 3 + 8 + 1
+    body = client.post("/api/ai/workload-analysis", json={"date": "2030-01-03"}).json()
+    assert body["total_hours"] == 3 + 8
+
+    stats = client.get("/api/modules/stats").json()
+    assert stats == [{
+        "module_id": None, "task_count": 3, "by_status": {"todo": 3},
+        "estimated_hours": 3.0, "actual_hours": 0.0,
+    }]
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+任务归档测试：移入归档表、按 id 透明查询、搜索/导出包含归档与恢复
+"""
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.archive import archive_candidates, archive_tasks
+from app.models import History, Task, TaskDependency, TaskStatus, archived_history, archived_task
+
+
+def _board(engine):
+    old = datetime.utcnow() - timedelta(days=200)
+    with Session(engine) as db:
+        tasks = {
+            "done": Task(title="旧的登录任务", status=TaskStatus.DONE, updated_at=old),
+            "parent": Task(title="完成的父任务", status=TaskStatus.DONE, updated_at=old),
+            "recent": Task(title="最近完成", status=TaskStatus.DONE),
+            "todo": Task(title="进行中的登录任务"),
+        }
+        for task in tasks.values():
+            task.category, task.vector_id = None, None
+            db.add(task)
+            db.commit()
+        tasks["todo"].parent_id = tasks["parent"].id  # 父任务下还有未完成的子任务
+        db.add(History(task_id=tasks["done"].id, field="status", old_val="todo", new_val="done"))
+        db.add(TaskDependency(from_task_id=tasks["todo"].id, to_task_id=tasks["done"].id))
+        db.commit()
+        return {name: task.id for name, task in tasks.items()}
+
+
+def test_archive_moves_only_finished_cold_subtrees(client, engine):
+    ids = _board(engine)
+    with Session(engine) as db:
+        # 父任务仍有活跃子任务，留在工作区
+        assert archive_candidates(db, 90) == [ids["done"]]
+        assert archive_tasks(db, 90) == {"tasks": 1, "history": 1, "dependencies": 1}
+        assert db.get(Task, ids["done"]) is None
+        assert db.exec(select(archived_history.c.task_id)).all() == [ids["done"]]
+        assert db.exec(select(TaskDependency)).all() == []
+
+    response = client.get(f"/api/tasks/{ids['done']}")
+    assert response.status_code == 200 and response.headers["X-Archived"] == "true"
+    assert response.json()["title"] == "旧的登录任务"
+    assert len(client.get(f"/api/tasks/{ids['done']}/history").json()) == 1
+    assert ids["done"] not in [t["id"] for t in client.get("/api/tasks/").json()]
+
+    hits = client.get("/api/tasks/search/登录").json()
+    assert [h["id"] for h in hits] == [ids["todo"]]
+    hits = client.get("/api/tasks/search/登录", params={"include_archived": True}).json()
+    assert [(h["id"], h["archived"]) for h in hits] == [(ids["todo"], False), (ids["done"], True)]
+
+    exported = json.loads(client.get("/api/export/json").json()["data"])
+    assert ids["done"] not in [t["id"] for t in exported["tasks"]]
+    exported = json.loads(client.get("/api/export/json", params={"include_archived": True}).json()["data"])
+    assert ids["done"] in [t["id"] for t in exported["tasks"]]
+    assert len(exported["dependencies"]) == 1
+
+
+def test_restore_brings_back_task_history_and_live_dependencies(client, engine):
+    ids = _board(engine)
+    with Session(engine) as db:
+        archive_tasks(db, 90)
+
+    assert client.post(f"/api/tasks/{ids['done']}/restore").status_code == 200
+    assert client.post(f"/api/tasks/{ids['done']}/restore").status_code == 404
+    with Session(engine) as db:
+        assert db.get(Task, ids["done"]).title == "旧的登录任务"
+        assert db.exec(select(archived_task)).all() == []
+        assert len(db.exec(select(History).where(History.task_id == ids["done"])).all()) == 1
+        dependency = db.exec(select(TaskDependency)).one()
+        assert (dependency.from_task_id, dependency.to_task_id) == (ids["todo"], ids["done"])
+    assert "X-Archived" not in client.get(f"/api/tasks/{ids['done']}").headers
+
+
+def test_archived_ids_are_never_reused(client, engine):
+    ids = _board(engine)
+    with Session(engine) as db:
+        archive_tasks(db, 90)
+    # 删除比归档任务 id 更大的全部工作区任务，SQLite 不再记得这些 id
+    for name in ("todo", "recent", "parent"):
+        assert client.delete(f"/api/tasks/{ids[name]}").status_code == 200
+
+    old = datetime.utcnow() - timedelta(days=200)
+    created = [client.post("/api/tasks/", json={"title": f"新任务{i}"}).json()["id"] for i in range(2)]
+    assert min(created) > max(ids.values())
+    dependency = client.post("/api/dependencies/", json={"from_task_id": created[0], "to_task_id": created[1]})
+    assert dependency.status_code == 200
+
+    response = client.get(f"/api/tasks/{ids['done']}")
+    assert response.headers["X-Archived"] == "true" and response.json()["title"] == "旧的登录任务"
+
+    # 再次归档不会与已归档的 id 冲突
+    with Session(engine) as db:
+        db.exec(update(Task).values(status=TaskStatus.DONE, updated_at=old))
+        db.commit()
+        assert archive_tasks(db, 90)["tasks"] == 2
+        assert db.get(Task, created[0]) is None
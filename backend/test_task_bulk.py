@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+批量任务接口测试
+"""
+from sqlmodel import Session, select
+
+from app.crud import ChangeLogCRUD, TaskCRUD
+from app.models import ChangeLog, History, Task, TaskDependency, TaskStatus
+
+
+def test_bulk_create_update_delete(client, engine):
+    """一次请求完成创建、更新、删除并返回逐项结果"""
+    response = client.post("/api/tasks/bulk", json={
+        "create": [{"title": f"任务 {i}"} for i in range(3)]
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 3
+    ids = [r["id"] for r in body["results"]]
+
+    with Session(engine) as db:
+        db.add(TaskDependency(from_task_id=ids[0], to_task_id=ids[1]))
+        db.commit()
+
+    response = client.post("/api/tasks/bulk", json={
+        "update": [
+            {"id": ids[1], "title": "已改名", "urgency": 0},
+            {"id": 9999, "title": "不存在"},
+        ],
+        "delete": [ids[0], 8888],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == 1
+    assert body["deleted"] == 1
+    failures = [r for r in body["results"] if not r["success"]]
+    assert {(r["op"], r["id"]) for r in failures} == {("update", 9999), ("delete", 8888)}
+
+    with Session(engine) as db:
+        assert db.get(Task, ids[0]) is None
+        assert db.get(Task, ids[1]).title == "已改名"
+        fields = {h.field for h in db.exec(select(History).where(History.task_id == ids[1])).all()}
+        assert {"title", "urgency"} <= fields
+        assert db.exec(select(TaskDependency)).all() == []
+
+
+def test_batch_positions_single_round_trip(client, engine):
+    """多选拖拽：一次请求移动多个任务，纯移动不写历史"""
+    with Session(engine) as db:
+        tasks = [Task(title=f"便签 {i}", category=None, vector_id=None) for i in range(200)]
+        db.add_all(tasks)
+        db.commit()
+        ids = [t.id for t in tasks]
+
+    positions = {str(task_id): [task_id * 10.0, task_id * 5.0] for task_id in ids}
+    positions["99999"] = [1.0, 1.0]
+    response = client.patch("/api/tasks/positions", json={"positions": positions})
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(body["updated"]) == ids
+    assert body["missing"] == [99999]
+
+    with Session(engine) as db:
+        moved = db.get(Task, ids[5])
+        assert (moved.position_x, moved.position_y) == (ids[5] * 10.0, ids[5] * 5.0)
+        assert db.exec(select(History)).all() == []
+
+    response = client.patch("/api/tasks/positions", json={
+        "positions": {str(ids[0]): [1.0, 2.0]}, "record_history": True
+    })
+    assert response.status_code == 200
+    with Session(engine) as db:
+        history = db.exec(select(History)).all()
+        assert [(h.field, h.new_val) for h in history] == [("position", "1.0,2.0")]
+
+
+def test_single_position_endpoint(client, engine):
+    with Session(engine) as db:
+        task = Task(title="单个便签", category=None, vector_id=None)
+        db.add(task)
+        db.commit()
+        task_id = task.id
+
+    response = client.patch(f"/api/tasks/{task_id}/position", params={"x": 12.5, "y": 30})
+    assert response.status_code == 200
+    assert (response.json()["position_x"], response.json()["position_y"]) == (12.5, 30.0)
+    assert client.patch("/api/tasks/424242/position", params={"x": 1, "y": 1}).status_code == 404
+
+
+def test_bulk_load_returns_ids_in_order(engine):
+    with Session(engine) as db:
+        ids = TaskCRUD.bulk_load(db, [
+            Task(title=f"导入 {i}", status=TaskStatus.DONE, category=None, vector_id=None)
+            for i in range(20)
+        ])
+        assert len(ids) == 20
+        assert [db.get(Task, task_id).title for task_id in ids] == [f"导入 {i}" for i in range(20)]
+        assert db.get(Task, ids[0]).status == TaskStatus.DONE
+        logged = db.exec(select(ChangeLog.entity_id).where(ChangeLog.entity == ChangeLogCRUD.TASK)).all()
+        assert sorted(logged) == ids
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+任务删除测试：级联清理与整棵子树删除
+"""
+from sqlmodel import Session, select
+
+from app.models import History, Task, TaskDependency
+
+
+def _seed_tree(engine):
+    """root -> child -> grandchild，外加一个无关任务和依赖、历史记录"""
+    with Session(engine) as db:
+        root = Task(title="史诗")
+        other = Task(title="无关任务")
+        db.add(root)
+        db.add(other)
+        db.commit()
+        child = Task(title="子任务", parent_id=root.id)
+        db.add(child)
+        db.commit()
+        grandchild = Task(title="孙任务", parent_id=child.id)
+        db.add(grandchild)
+        db.commit()
+        db.add(TaskDependency(from_task_id=grandchild.id, to_task_id=other.id))
+        db.add(History(task_id=child.id, field="title", old_val="a", new_val="b"))
+        db.commit()
+        return root.id, child.id, grandchild.id, other.id
+
+
+def test_delete_detaches_children(client, engine):
+    root, child, grandchild, other = _seed_tree(engine)
+
+    response = client.delete(f"/api/tasks/{child}")
+    assert response.status_code == 200
+
+    with Session(engine) as db:
+        assert db.get(Task, child) is None
+        assert db.get(Task, grandchild).parent_id is None
+        assert db.get(Task, root) is not None
+        assert db.exec(select(History).where(History.task_id == child)).all() == []
+        # 孙任务的依赖不受影响
+        assert len(db.exec(select(TaskDependency)).all()) == 1
+
+
+def test_delete_subtree(client, engine):
+    root, child, grandchild, other = _seed_tree(engine)
+
+    response = client.delete(f"/api/tasks/{root}", params={"subtree": True})
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted"]) == sorted([root, child, grandchild])
+
+    with Session(engine) as db:
+        assert db.exec(select(Task.id)).all() == [other]
+        assert db.exec(select(TaskDependency)).all() == []
+        assert db.exec(select(History)).all() == []
+
+    assert client.delete(f"/api/tasks/{root}", params={"subtree": True}).status_code == 404
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+任务层级（闭包表）测试：子树、祖先链、汇总与重挂父任务
+"""
+import pytest
+from sqlmodel import Session, select
+
+from app.models import Task, TaskClosure, TaskStatus
+
+
+@pytest.fixture
+def tree(client, engine):
+    """epic -> (a -> a1, a2), b"""
+    def create(title, parent_id=None, **kwargs):
+        response = client.post("/api/tasks/", json={"title": title, "parent_id": parent_id, **kwargs})
+        assert response.status_code == 200
+        return response.json()["id"]
+
+    epic = create("史诗", estimated_hours=1)
+    a = create("A", epic, estimated_hours=2, actual_hours=1)
+    a1 = create("A1", a, estimated_hours=3, actual_hours=3, status="done")
+    a2 = create("A2", a, estimated_hours=4)
+    b = create("B", epic, status="done")
+    return {"epic": epic, "a": a, "a1": a1, "a2": a2, "b": b}
+
+
+def test_subtree_and_ancestors(client, tree):
+    response = client.get(f"/api/tasks/{tree['epic']}/subtree", params={"fields": "title"})
+    assert response.status_code == 200
+    assert [(t["title"], t["depth"]) for t in response.json()] == [
+        ("史诗", 0), ("A", 1), ("B", 1), ("A1", 2), ("A2", 2)
+    ]
+
+    response = client.get(f"/api/tasks/{tree['a2']}/ancestors", params={"fields": "title"})
+    assert [(t["title"], t["depth"]) for t in response.json()] == [("史诗", 2), ("A", 1)]
+    assert client.get("/api/tasks/9999/subtree").status_code == 404
+
+
+def test_rollup(client, tree):
+    body = client.get(f"/api/tasks/{tree['epic']}/rollup").json()
+    assert body["task_count"] == 5
+    assert body["estimated_hours"] == 10.0
+    assert body["actual_hours"] == 4.0
+    assert body["done_ratio"] == pytest.approx(2 / 5)
+
+    body = client.get(f"/api/tasks/{tree['a']}/rollup").json()
+    assert (body["task_count"], body["depth"], body["done_count"]) == (3, 1, 1)
+
+
+def test_reparent_and_delete_keep_closure_in_sync(client, engine, tree):
+    # 把 A 整棵子树挂到 B 下面
+    assert client.patch(f"/api/tasks/{tree['a']}", json={"parent_id": tree["b"]}).status_code == 200
+    response = client.get(f"/api/tasks/{tree['a1']}/ancestors", params={"fields": "title"})
+    assert [t["title"] for t in response.json()] == ["史诗", "B", "A"]
+
+    # 删除 B（非子树模式）后 A 脱离成为根
+    client.delete(f"/api/tasks/{tree['b']}")
+    response = client.get(f"/api/tasks/{tree['a1']}/ancestors", params={"fields": "title"})
+    assert [t["title"] for t in response.json()] == ["A"]
+    assert client.get(f"/api/tasks/{tree['epic']}/rollup").json()["task_count"] == 1
+
+    client.delete(f"/api/tasks/{tree['a']}", params={"subtree": True})
+    with Session(engine) as db:
+        assert db.exec(select(TaskClosure)).all() == [
+            TaskClosure(ancestor_id=tree["epic"], descendant_id=tree["epic"], depth=0)
+        ]
+
+
+def test_reparent_under_own_descendant_is_rejected(client, tree):
+    response = client.patch(f"/api/tasks/{tree['epic']}", json={"parent_id": tree["a1"]})
+    assert response.status_code == 400
+    response = client.patch(f"/api/tasks/{tree['a']}", json={"parent_id": tree["a"]})
+    assert response.status_code == 400
+    assert client.get(f"/api/tasks/{tree['epic']}").json()["parent_id"] is None
+
+
+def test_backfill_from_existing_parent_ids(engine):
+    from app.hierarchy import CLOSURE_TABLE, ensure_closure_table
+
+    with Session(engine) as db:
+        root = Task(title="根", category=None, vector_id=None)
+        db.add(root)
+        db.commit()
+        child = Task(title="子", parent_id=root.id, category=None, vector_id=None)
+        db.add(child)
+        db.commit()
+        root_id, child_id = root.id, child.id
+
+    # 模拟升级前的数据库：没有触发器、闭包表为空
+    with engine.begin() as conn:
+        for suffix in ("ai", "bu", "au", "ad"):
+            conn.exec_driver_sql(f"DROP TRIGGER {CLOSURE_TABLE}_{suffix}")
+        conn.exec_driver_sql(f"DELETE FROM {CLOSURE_TABLE}")
+
+    assert ensure_closure_table(engine)
+    with Session(engine) as db:
+        pairs = {(c.ancestor_id, c.descendant_id, c.depth) for c in db.exec(select(TaskClosure)).all()}
+    assert pairs == {(root_id, root_id, 0), (child_id, child_id, 0), (root_id, child_id, 1)}
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+任务历史记录测试：游标分页、字段过滤与后台压缩
+"""
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.crud import HistoryCRUD
+from app.models import History, Task
+from app.utils.history_compaction import HistoryRetention, compact_history
+
+
+def _seed(engine, entries):
+    """entries: (field, old, new, 相对起点的秒数)"""
+    start = datetime(2024, 1, 1, 9, 0, 0)
+    with Session(engine) as db:
+        task = Task(title="历史测试")
+        db.add(task)
+        db.commit()
+        db.add_all([
+            History(task_id=task.id, field=field, old_val=old, new_val=new, ts=start + timedelta(seconds=s))
+            for field, old, new, s in entries
+        ])
+        db.commit()
+        return task.id
+
+
+def _history(engine, task_id):
+    with Session(engine) as db:
+        rows = db.exec(select(History).where(History.task_id == task_id)
+                       .order_by(History.ts, History.id)).all()
+        return [(h.field, h.old_val, h.new_val) for h in rows]
+
+
+def test_history_cursor_pagination_and_field_filter(client, engine):
+    task_id = _seed(engine, [("title" if i % 2 else "urgency", str(i), str(i + 1), i * 600) for i in range(7)])
+
+    assert len(client.get(f"/api/tasks/{task_id}/history").json()) == 7
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/api/tasks/{task_id}/history", params=params)
+        assert response.status_code == 200
+        seen += [entry["id"] for entry in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    full = [entry["id"] for entry in client.get(f"/api/tasks/{task_id}/history").json()]
+    assert seen == full
+
+    titles = client.get(f"/api/tasks/{task_id}/history", params={"field": "title", "limit": 10}).json()
+    assert [entry["field"] for entry in titles] == ["title"] * 3
+    assert client.get(f"/api/tasks/{task_id}/history", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_compaction_merges_bursts_and_applies_retention(engine):
+    task_id = _seed(engine, [
+        ("title", "a", "ab", 0),
+        ("title", "ab", "abc", 30),
+        ("title", "abc", "abcd", 70),     # 距上一次 40 秒，仍在同一段
+        ("urgency", "2", "3", 40),        # 其他字段不参与合并
+        ("title", "abcd", "x", 1000),     # 超出窗口，新的一段
+        ("status", "todo", "done", 2000),
+        ("status", "done", "todo", 2010), # 净效果为无变化，整段删除
+    ])
+
+    with Session(engine) as db:
+        report = compact_history(db, HistoryRetention(merge_window_seconds=60, max_rows_per_task=None))
+    assert report["merged"] == 1
+    assert report["deleted"] == 4
+    assert report["payload_bytes"] > 0
+    assert sorted(_history(engine, task_id)) == sorted([
+        ("title", "a", "abcd"), ("urgency", "2", "3"), ("title", "abcd", "x"),
+    ])
+
+    with Session(engine) as db:
+        report = compact_history(db, HistoryRetention(merge_window_seconds=0, max_rows_per_task=2))
+    assert report["trimmed_deleted"] == 1
+    # 合并后的记录取最后一次修改的时间，因此最旧的是 urgency
+    assert _history(engine, task_id) == [("title", "a", "abcd"), ("title", "abcd", "x")]
+
+    with Session(engine) as db:
+        report = compact_history(db, HistoryRetention(merge_window_seconds=0, max_age_days=30, max_rows_per_task=None))
+        assert report["expired_deleted"] == 2
+        assert HistoryCRUD.read_by_task(db, task_id) == []
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+任务列表键集分页与流式接口测试
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.models import Task
+
+
+@pytest.fixture
+def client(client, engine):
+    base = datetime(2025, 1, 1)
+    with Session(engine) as db:
+        for i in range(250):
+            # Pairs of tasks share an updated_at to exercise the id tie-breaker
+            db.add(Task(title=f"任务 {i}", category=None, vector_id=None,
+                        updated_at=base + timedelta(minutes=i // 2)))
+        db.commit()
+    return client
+
+
+def test_list_without_limit_returns_everything(client):
+    """不带分页参数时不再截断到100条"""
+    response = client.get("/api/tasks/")
+    assert response.status_code == 200
+    assert len(response.json()) == 250
+    assert response.headers["X-Total-Count"] == "250"
+
+
+@pytest.mark.parametrize("order_by", ["id", "updated_at"])
+def test_keyset_pages_cover_all_tasks_once(client, order_by):
+    """逐页翻完所有任务，不重不漏"""
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 40, "order_by": order_by}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/tasks/", params=params)
+        assert response.status_code == 200
+        seen.extend(task["id"] for task in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == 250
+    assert len(set(seen)) == 250
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/tasks/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_stream_returns_all_tasks(client):
+    response = client.get("/api/tasks/stream")
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "250"
+    assert [task["id"] for task in response.json()] == list(range(1, 251))
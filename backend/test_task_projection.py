@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+任务列表字段投影（fields=）测试
+"""
+import pytest
+from sqlmodel import Session
+
+from app.models import Task
+from app.projections import TASK_PROJECTIONS
+
+
+@pytest.fixture
+def client(client, engine):
+    with Session(engine) as db:
+        for i in range(30):
+            db.add(Task(title=f"任务 {i}", category=None, vector_id=None,
+                        position_x=i * 10.0, ai_reasoning="很长的推理" * 50))
+        db.commit()
+    return client
+
+
+def test_canvas_projection_returns_only_canvas_fields(client):
+    response = client.get("/api/tasks/", params={"fields": "canvas"})
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "30"
+    assert "ETag" in response.headers
+    tasks = response.json()
+    assert len(tasks) == 30
+    assert set(tasks[0]) == set(TASK_PROJECTIONS["canvas"])
+    assert tasks[3]["position_x"] == 30.0
+
+
+def test_full_projection_matches_default_response(client):
+    default = client.get("/api/tasks/").json()
+    projected = client.get("/api/tasks/", params={"fields": "full"}).json()
+    assert projected == default
+
+
+def test_field_list_with_pagination(client):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 8, "fields": "title", "order_by": "updated_at"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/tasks/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert all(set(task) == {"id", "title"} for task in page)
+        seen.extend(task["id"] for task in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == list(range(1, 31))
+
+
+def test_stream_projection(client):
+    response = client.get("/api/tasks/stream", params={"fields": "id,position_x,position_y"})
+    assert response.status_code == 200
+    tasks = response.json()
+    assert len(tasks) == 30
+    assert set(tasks[0]) == {"id", "position_x", "position_y"}
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/api/tasks/", params={"fields": "title,password"})
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
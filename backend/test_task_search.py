@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+全文搜索测试：FTS5 索引同步、相关度排序、高亮片段与中文匹配
+"""
+from sqlmodel import Session
+
+from app.models import Task
+
+
+def add_task(engine, **fields) -> int:
+    with Session(engine) as db:
+        task = Task(category=None, vector_id=None, **fields)
+        db.add(task)
+        db.commit()
+        return task.id
+
+
+def test_title_match_ranks_above_description(client, engine):
+    desc_id = add_task(engine, title="周会", description="讨论用户登录功能的排期")
+    title_id = add_task(engine, title="完成用户登录功能开发", description="")
+    add_task(engine, title="无关任务", description="整理文档")
+
+    response = client.get("/api/tasks/search/用户登录")
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["id"] for r in results] == [title_id, desc_id]
+    assert "<mark>用户登录</mark>" in results[0]["snippets"]["title"]
+
+
+def test_index_follows_updates_and_deletes(client, engine):
+    task_id = add_task(engine, title="Refactor parser", description="")
+    assert [r["id"] for r in client.get("/api/tasks/search/parser").json()] == [task_id]
+
+    client.patch(f"/api/tasks/{task_id}", json={"title": "Rewrite tokenizer"})
+    assert client.get("/api/tasks/search/parser").json() == []
+    assert [r["id"] for r in client.get("/api/tasks/search/tokenizer").json()] == [task_id]
+
+    client.delete(f"/api/tasks/{task_id}")
+    assert client.get("/api/tasks/search/tokenizer").json() == []
+
+
+def test_short_terms_and_fts_syntax_are_safe(client, engine):
+    task_id = add_task(engine, title="修复 bug", description='含有"引号"和 AND OR')
+    assert [r["id"] for r in client.get("/api/tasks/search/修复").json()] == [task_id]
+    assert client.get('/api/tasks/search/"引号" AND (').status_code == 200
+
+
+def test_two_character_terms_use_bigram_index(client, engine):
+    desc_id = add_task(engine, title="周会", description="讨论支付接口的排期")
+    title_id = add_task(engine, title="修复支付回调", description="")
+    add_task(engine, title="支援前端", description="付款页面")  # 只含“支”和“付”，不应命中
+
+    results = client.get("/api/tasks/search/支付").json()
+    assert [r["id"] for r in results] == [title_id, desc_id]
+    assert results[0]["rank"] < 0  # bm25 相关度，而非 LIKE 的 0
+    assert results[0]["snippets"]["title"] == "修复<mark>支付</mark>回调"
+    assert "<mark>支付</mark>" in results[1]["snippets"]["description"]
+
+    # 两字词与更长的词混合时同样走索引；索引随修改与删除同步
+    assert [r["id"] for r in client.get("/api/tasks/search/支付 回调").json()] == [title_id]
+    client.patch(f"/api/tasks/{title_id}", json={"title": "修复退款回调"})
+    assert [r["id"] for r in client.get("/api/tasks/search/支付").json()] == [desc_id]
+    assert [r["id"] for r in client.get("/api/tasks/search/退款").json()] == [title_id]
+    client.delete(f"/api/tasks/{desc_id}")
+    assert client.get("/api/tasks/search/支付").json() == []
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+任务标签索引测试：触发器同步、按标签筛选、分面统计与旧数据回填
+"""
+import json
+
+from sqlmodel import Session, select
+
+from app.models import Task, TaskTag
+from app.tags import TAG_TABLE, ensure_tag_index, tag_counts, tasks_with_tags
+
+
+def _create(client, title, tags):
+    return client.post("/api/tasks/", json={"title": title, "tags": json.dumps(tags)}).json()["id"]
+
+
+def test_filter_and_facets_follow_writes(client, engine):
+    a = _create(client, "登录", ["backend", "urgent"])
+    b = _create(client, "报表", ["backend"])
+    c = _create(client, "样式", ["frontend", "urgent"])
+    client.post("/api/tasks/", json={"title": "无标签"})
+
+    ids = lambda resp: [t["id"] for t in resp.json()]
+    assert ids(client.get("/api/tasks/by-tag", params={"tag": "backend"})) == [a, b]
+    assert ids(client.get("/api/tasks/by-tag", params=[("tag", "backend"), ("tag", "urgent")])) == [a]
+    assert ids(client.get("/api/tasks/by-tag", params=[("tag", "backend"), ("tag", "urgent"), ("match", "any")])) == [a, b, c]
+
+    facets = client.get("/api/tasks/tags").json()
+    assert facets == [{"tag": "backend", "count": 2}, {"tag": "urgent", "count": 2}, {"tag": "frontend", "count": 1}]
+    assert client.get("/api/tasks/tags", params={"within": "urgent"}).json() == [
+        {"tag": "urgent", "count": 2}, {"tag": "backend", "count": 1}, {"tag": "frontend", "count": 1}
+    ]
+
+    client.patch(f"/api/tasks/{b}", json={"tags": json.dumps(["frontend"])})
+    client.delete(f"/api/tasks/{a}")
+    assert ids(client.get("/api/tasks/by-tag", params={"tag": "frontend"})) == [b, c]
+    assert {f["tag"]: f["count"] for f in client.get("/api/tasks/tags").json()} == {"frontend": 2, "urgent": 1}
+
+
+def test_backfill_matches_get_tags(engine):
+    with Session(engine) as db:
+        for raw in ['["x", "y", "x"]', "not json", '{"x": 1}', '["y", 3]', ""]:
+            db.add(Task(title="旧", tags=raw, category=None, vector_id=None))
+        db.commit()
+
+    # 模拟升级前的数据库：没有触发器、标签表为空
+    with engine.begin() as conn:
+        for suffix in ("ai", "au", "ad"):
+            conn.exec_driver_sql(f"DROP TRIGGER {TAG_TABLE}_{suffix}")
+        conn.exec_driver_sql(f"DELETE FROM {TAG_TABLE}")
+
+    with Session(engine) as db:
+        # 无触发器时退回逐行解码，结果一致
+        fallback = tag_counts(db)
+        assert ensure_tag_index(engine)
+        assert tag_counts(db) == fallback == [{"tag": "y", "count": 2}, {"tag": "x", "count": 1}]
+
+        expected = {(t.id, tag) for t in db.exec(select(Task)).all() for tag in t.get_tags() if isinstance(tag, str)}
+        assert {(r.task_id, r.tag) for r in db.exec(select(TaskTag)).all()} == expected
+        assert [row.id for row in tasks_with_tags(db, ["x"], fields=["id", "title"])] == [1]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+任务乐观并发测试：版本号校验、409 冲突与精简的更新响应
+"""
+from sqlmodel import Session, select
+
+from app.models import History, Task
+
+
+def test_patch_returns_new_version_and_changed_fields(client, engine):
+    task = client.post("/api/tasks/", json={"title": "原标题", "urgency": 2}).json()
+    assert task["version"] == 1
+
+    response = client.patch(f"/api/tasks/{task['id']}", json={"title": "新标题", "urgency": 2, "version": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == task["id"] and body["version"] == 2
+    assert body["title"] == "新标题"
+    assert "urgency" not in body and "description" not in body
+
+    assert client.get(f"/api/tasks/{task['id']}").json()["version"] == 2
+    with Session(engine) as db:
+        fields = db.exec(select(History.field).where(History.task_id == task["id"])).all()
+    assert "title" in fields and "urgency" not in fields
+
+
+def test_stale_version_is_rejected_with_409(client, engine):
+    task_id = client.post("/api/tasks/", json={"title": "并发"}).json()["id"]
+    assert client.patch(f"/api/tasks/{task_id}", json={"title": "甲的修改", "version": 1}).status_code == 200
+
+    response = client.patch(f"/api/tasks/{task_id}", json={"title": "乙的修改", "version": 1})
+    assert response.status_code == 409
+    assert response.json()["detail"]["current_version"] == 2
+    with Session(engine) as db:
+        assert db.get(Task, task_id).title == "甲的修改"
+
+    # Without a version the write is checked against the row as just read
+    assert client.patch(f"/api/tasks/{task_id}", json={"title": "乙重试"}).json()["version"] == 3
+
+
+def test_bulk_and_position_writes_bump_version(client):
+    task_id = client.post("/api/tasks/", json={"title": "批量"}).json()["id"]
+    client.patch("/api/tasks/positions", json={"positions": {str(task_id): [10, 10]}})
+    assert client.get(f"/api/tasks/{task_id}").json()["version"] == 2
+
+    results = client.post("/api/tasks/bulk", json={"update": [
+        {"id": task_id, "title": "过期", "version": 1},
+        {"id": task_id, "title": "最新", "version": 2},
+    ]}).json()["results"]
+    assert [r["success"] for r in results] == [False, True]
+    assert results[0]["error"] == "Version conflict"
+    assert results[1]["version"] == 3
+
+
+def test_bulk_update_rechecks_version_in_sql(engine, monkeypatch):
+    from sqlalchemy import update
+
+    from app.crud import TaskCRUD
+
+    with Session(engine) as db:
+        task_id = TaskCRUD.create(db, Task(title="并发")).id
+
+    history_rows = TaskCRUD._history_rows
+
+    def concurrent_write(db_obj, values):
+        # 另一写入者在批量读取任务之后、更新之前提交了修改
+        with engine.begin() as conn:
+            conn.execute(update(Task).where(Task.id == db_obj.id).values(title="他人", version=Task.version + 1))
+        return history_rows(db_obj, values)
+
+    monkeypatch.setattr(TaskCRUD, "_history_rows", staticmethod(concurrent_write))
+    with Session(engine) as db:
+        results = TaskCRUD.bulk_apply(db, updates=[(task_id, {"title": "覆盖"})])
+    assert results[0]["error"] == "Version conflict"
+    with Session(engine) as db:
+        task = db.get(Task, task_id)
+        assert (task.title, task.version) == ("他人", 2)
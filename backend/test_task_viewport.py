@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+画布视口查询与空间索引测试
+"""
+import pytest
+from sqlmodel import Session
+
+from app.crud import TaskCRUD
+from app.models import Task
+from app.projections import TASK_PROJECTIONS
+
+
+@pytest.fixture
+def client(client, engine):
+    """10 x 10 网格，间距 100"""
+    with Session(engine) as db:
+        TaskCRUD.bulk_load(db, [
+            Task(title=f"便签 {i}", category=None, vector_id=None,
+                 position_x=(i % 10) * 100.0, position_y=(i // 10) * 100.0)
+            for i in range(100)
+        ])
+    return client
+
+
+def _ids(response):
+    assert response.status_code == 200
+    return sorted(task["id"] for task in response.json())
+
+
+def test_viewport_returns_only_visible_tasks(client):
+    response = client.get("/api/tasks/viewport", params={"x0": 150, "y0": 0, "x1": 350, "y1": 100})
+    tasks = response.json()
+    assert set(tasks[0]) == set(TASK_PROJECTIONS["canvas"])
+    # x 为 200、300，y 为 0、100 → 4 个
+    assert sorted((t["position_x"], t["position_y"]) for t in tasks) == [
+        (200.0, 0.0), (200.0, 100.0), (300.0, 0.0), (300.0, 100.0)
+    ]
+
+
+def test_viewport_follows_position_updates_and_deletes(client):
+    params = {"x0": -10, "y0": -10, "x1": 10, "y1": 10}
+    assert _ids(client.get("/api/tasks/viewport", params=params)) == [1]
+
+    client.patch("/api/tasks/positions", json={"positions": {"2": [5.0, 5.0]}})
+    client.patch("/api/tasks/1/position", params={"x": 5000, "y": 5000})
+    assert _ids(client.get("/api/tasks/viewport", params=params)) == [2]
+
+    client.delete("/api/tasks/2")
+    assert _ids(client.get("/api/tasks/viewport", params=params)) == []
+
+    created = client.post("/api/tasks/", json={"title": "新便签", "position_x": 1, "position_y": -1}).json()
+    assert _ids(client.get("/api/tasks/viewport", params=params)) == [created["id"]]
+
+
+def test_viewport_cells(client):
+    response = client.get("/api/tasks/viewport/cells",
+                          params={"x0": 0, "y0": 0, "x1": 999, "y1": 999, "cell_size": 500})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 100
+    assert {(c["cx"], c["cy"]): c["count"] for c in body["cells"]} == {
+        (0, 0): 25, (1, 0): 25, (0, 1): 25, (1, 1): 25
+    }
+
+
+def test_inverted_viewport_is_rejected(client):
+    response = client.get("/api/tasks/viewport", params={"x0": 10, "y0": 0, "x1": 0, "y1": 10})
+    assert response.status_code == 400
@@ -15,6 +15,7 @@ export interface Task {
   created_at: string
   updated_at: string
   ocr_src?: string
+  version?: number
 }
 
 export interface Module {
@@ -148,20 +149,60 @@ export const useTaskStore = defineStore('tasks', () => {
     }
   }
 
+  // 每个任务正在进行的修改；同一任务的修改排队发送，每次都带上前一次返回的版本号
+  const pendingUpdates = new Map<number, Promise<Task>>()
+  const POSITION_FIELDS = ['position_x', 'position_y']
+
   async function updateTask(taskId: number, updates: Partial<Task>) {
+    const previous = pendingUpdates.get(taskId)
+    const run = (previous ? previous.catch(() => undefined) : Promise.resolve())
+      .then(() => sendTaskUpdate(taskId, updates))
+    pendingUpdates.set(taskId, run)
+    try {
+      return await run
+    } finally {
+      if (pendingUpdates.get(taskId) === run) {
+        pendingUpdates.delete(taskId)
+      }
+    }
+  }
+
+  async function sendTaskUpdate(taskId: number, updates: Partial<Task>) {
     loading.value = true
     try {
-      const response = await axios.patch<Task>(`${API_BASE}/tasks/${taskId}`, updates)
       const index = tasks.value.findIndex(t => t.id === taskId)
+      const current = index !== -1 ? tasks.value[index] : selectedTask.value?.id === taskId ? selectedTask.value : null
+      // 带上本地版本号，服务端发现他人已修改时返回 409；
+      // 仅拖动位置时不做校验，以最后一次拖动为准
+      const positionOnly = Object.keys(updates).every(field => POSITION_FIELDS.includes(field))
+      const payload = current?.version !== undefined && !positionOnly
+        ? { ...updates, version: current.version }
+        : updates
+      // 响应只包含 id、新版本号和发生变化的字段，合并进本地任务即可，无需重新拉取
+      const response = await axios.patch<Partial<Task>>(`${API_BASE}/tasks/${taskId}`, payload)
+      const updated = { ...(current ?? {}), ...updates, ...response.data } as Task
       if (index !== -1) {
-        tasks.value[index] = response.data
+        tasks.value[index] = updated
       }
       if (selectedTask.value?.id === taskId) {
-        selectedTask.value = response.data
+        selectedTask.value = updated
       }
       error.value = null
-      return response.data
-    } catch (err) {
+      return updated
+    } catch (err: any) {
+      if (err.response?.status === 409) {
+        // 任务已被他人修改：重新加载最新内容，由用户决定是否再次修改
+        error.value = 'Task was modified by someone else and has been reloaded'
+        const latest = await axios.get<Task>(`${API_BASE}/tasks/${taskId}`)
+        const index = tasks.value.findIndex(t => t.id === taskId)
+        if (index !== -1) {
+          tasks.value[index] = latest.data
+        }
+        if (selectedTask.value?.id === taskId) {
+          selectedTask.value = latest.data
+        }
+        throw err
+      }
       error.value = 'Failed to update task'
       console.error('Error updating task:', err)
       throw err